@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Audio format selection benchmark: bytes downloaded for each requested MP3 bitrate.
+
+Every video of the local server of e2e_throughput.py offers audio streams at
+several bitrates (by default those of a typical YouTube video). The same playlist
+is downloaded with the previous 'bestaudio/best' selection and with the
+bitrate-aware selector for each requested bitrate, and the bytes sent by the
+server are compared.
+
+Usage: python benchmarks/audio_format_selection.py [--bitrates 32,96,128,192] [--streams 48,70,129,160]
+"""
+import argparse
+import contextlib
+import io
+import os
+import tempfile
+import threading
+import time
+
+# Importing the end-to-end benchmark also puts src and the stub extractors on sys.path
+from e2e_throughput import MediaServer, generate_thumbnail, isolate_caches
+
+from controllers.download_controller import DownloadController
+from models import DownloadConfig, DownloadJob
+
+
+class BestAudioController(DownloadController):
+    """The selection before bitrate-aware formats: always the best audio stream."""
+    
+    def _add_mp3_options(self, opts, config):
+        opts = super()._add_mp3_options(opts, config)
+        opts['format'] = 'bestaudio/best'
+        return opts
+
+
+def run_mode(server: MediaServer, bitrate: str, items: int, directory: str) -> dict:
+    """Download the playlist at a bitrate ('best' for the previous selection)."""
+    output_directory = os.path.join(directory, f"bitrate-{bitrate}")
+    os.makedirs(output_directory)
+    config = DownloadConfig(
+        url=f"{server.base_url}/playlist/{items}", output_directory=output_directory, file_format='mp3',
+        bitrate=bitrate, is_playlist=True, playlist_start=1, playlist_end=items, archive_scope='off',
+        resumable=False, verbose=False
+    )
+    # The application prints its own progress, only the selection report is kept
+    output = io.StringIO()
+    with contextlib.redirect_stdout(output):
+        controller = BestAudioController() if bitrate == 'best' else DownloadController()
+        controller.notifications_enabled = False
+        # The streams are random bytes, nothing to convert
+        controller.ffmpeg_path = None
+        
+        video_info, error_message = controller.fetch_video_info(config)
+        if not video_info:
+            raise RuntimeError(error_message)
+        bytes_before = server.bytes_sent
+        start_time = time.perf_counter()
+        controller.download(DownloadJob.create(config))
+    report = [line for line in output.getvalue().splitlines() if line.startswith("Audio formats:")]
+    return {
+        'seconds': time.perf_counter() - start_time,
+        'bytes': server.bytes_sent - bytes_before,
+        'failed': len(controller.progress.failed_items),
+        'report': report[0] if report else ""
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--bitrates', default='32,96,128,192', help="requested MP3 bitrates in Kbps")
+    parser.add_argument('--streams', default='48,70,129,160', help="audio stream bitrates offered by every video")
+    parser.add_argument('--items', type=int, default=10, help="videos in the playlist")
+    parser.add_argument('--media-kb', type=int, default=3072, help="size of the highest bitrate stream")
+    args = parser.parse_args()
+    
+    streams = tuple(int(kbps) for kbps in args.streams.split(','))
+    server = MediaServer(os.urandom(args.media_kb * 1024), 'm4a', 160, generate_thumbnail(), audio_bitrates=streams)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    
+    print(f"{args.items} videos with audio streams of {args.streams} Kbps")
+    with tempfile.TemporaryDirectory() as directory:
+        isolate_caches(os.path.join(directory, 'cache'))
+        baseline = run_mode(server, 'best', args.items, directory)
+        print(f"  bestaudio      {baseline['bytes'] / 1048576:8.1f} MiB  {baseline['seconds']:6.2f}s  "
+              f"{baseline['failed']} failed")
+        for bitrate in args.bitrates.split(','):
+            result = run_mode(server, bitrate, args.items, directory)
+            saved = 1 - result['bytes'] / baseline['bytes']
+            print(f"  {bitrate + ' Kbps':<14} {result['bytes'] / 1048576:8.1f} MiB  {result['seconds']:6.2f}s  "
+                  f"{result['failed']} failed  {saved:4.0%} fewer bytes  ({result['report']})")
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
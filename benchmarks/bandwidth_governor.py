@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Bandwidth governor check: concurrent jobs against a local server must hold the global limit.
+
+Several playlist jobs with different weights download at the same time from the
+local server of e2e_throughput.py (unthrottled). The bytes each job received
+are measured on disk, in the files of its output directory. Once every job is
+downloading, their combined rate is compared with the limit for a few seconds,
+then the limit is halved while the jobs run to check that live changes apply.
+The bytes of each job are compared with its weighted share while all of them
+are still running. The server-side average rate is reported as a cross-check
+(it runs ahead of the downloads by the socket buffers).
+
+Usage: python benchmarks/bandwidth_governor.py [--limit 2048] [--weights 1,1,2] [--items 5]
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import threading
+import time
+
+# Importing the end-to-end benchmark also puts src and the stub extractors on sys.path
+from e2e_throughput import MediaServer, generate_thumbnail, isolate_caches
+
+from controllers.bandwidth import bandwidth_governor
+from controllers.download_controller import DownloadController
+from models import DownloadConfig, DownloadJob
+
+SAMPLE_INTERVAL = 0.25
+
+
+def run_job(server: MediaServer, job: DownloadJob):
+    """Fetch and download one playlist job (runs in its own thread)."""
+    controller = DownloadController()
+    controller.notifications_enabled = False
+    # The media is random bytes, nothing to convert
+    controller.ffmpeg_path = None
+    video_info, error_message = controller.fetch_video_info(job.config)
+    if not video_info:
+        raise RuntimeError(error_message)
+    controller.download(job)
+
+
+def written_bytes(directory: str) -> int:
+    """Bytes of the media written to a directory so far, partial files included."""
+    total = 0
+    with os.scandir(directory) as it:
+        for entry in it:
+            if entry.is_file() and entry.name.endswith(('.m4a', '.part')):
+                try:
+                    total += entry.stat().st_size
+                except OSError:
+                    # Renamed from .part to its final name meanwhile
+                    pass
+    return total
+
+
+def rate_between(samples: list, start: float, end: float, counter) -> float:
+    """Average rate (per second) of a sampled counter between two times."""
+    window = [sample for sample in samples if start <= sample['time'] <= end]
+    if len(window) < 2:
+        return 0.0
+    return (counter(window[-1]) - counter(window[0])) / (window[-1]['time'] - window[0]['time'])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--limit', type=float, default=2048, help="global limit in KB/s (below what the jobs reach unthrottled)")
+    parser.add_argument('--weights', default='1,1,2', help="comma-separated weight of each concurrent job")
+    parser.add_argument('--items', type=int, default=5, help="playlist items per job")
+    parser.add_argument('--media-kb', type=int, default=2048, help="size of each item")
+    parser.add_argument('--phase', type=float, default=5.0, help="seconds measured before the limit is halved")
+    parser.add_argument('--tolerance', type=float, default=0.1, help="allowed relative error")
+    args = parser.parse_args()
+    
+    weights = [float(weight) for weight in args.weights.split(',')]
+    server = MediaServer(os.urandom(args.media_kb * 1024), 'm4a', 30, generate_thumbnail())
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    limit = args.limit * 1024
+    
+    with tempfile.TemporaryDirectory() as directory:
+        isolate_caches(os.path.join(directory, 'cache'))
+        bandwidth_governor.configure(limit)
+        
+        jobs = []
+        for number, weight in enumerate(weights):
+            output_directory = os.path.join(directory, f"job{number}")
+            os.makedirs(output_directory)
+            # Every job lists a playlist of its own size so the items are distinct
+            count = args.items + number
+            jobs.append(DownloadJob.create(DownloadConfig(
+                url=f"{server.base_url}/playlist/{count}", output_directory=output_directory,
+                is_playlist=True, playlist_start=1, playlist_end=count, archive_scope='off',
+                resumable=False, verbose=False, bandwidth_weight=weight
+            )))
+        
+        samples = []
+        start_time = time.perf_counter()
+        threads = [threading.Thread(target=run_job, args=(server, job), daemon=True) for job in jobs]
+        all_started = change_time = all_running_until = None
+        with contextlib.redirect_stdout(io.StringIO()):
+            for thread in threads:
+                thread.start()
+            while any(thread.is_alive() for thread in threads):
+                now = time.perf_counter() - start_time
+                received = [written_bytes(job.config.output_directory) for job in jobs]
+                samples.append({'time': now, 'server': server.bytes_sent, 'received': received})
+                if all_started is None and all(received):
+                    all_started = now
+                if change_time is None and all_started is not None and now >= all_started + args.phase:
+                    bandwidth_governor.set_limit(limit / 2)
+                    change_time = now
+                if all_running_until is None and not all(thread.is_alive() for thread in threads):
+                    all_running_until = now
+                time.sleep(SAMPLE_INTERVAL)
+        total_seconds = time.perf_counter() - start_time
+    
+    if change_time is None or all_running_until is None or all_running_until < change_time + 1.0:
+        print("The jobs finished too early to measure, use more --items")
+        sys.exit(1)
+    
+    def total_received(sample):
+        return sum(sample['received'])
+    
+    phases = (
+        ("before the change", rate_between(samples, all_started, change_time, total_received), limit),
+        # The second after the change is left out, downloads already granted finish at the old rate
+        ("after the change", rate_between(samples, change_time + 1.0, all_running_until, total_received), limit / 2)
+    )
+    shares = [
+        rate_between(samples, all_started, all_running_until, lambda sample, number=number: sample['received'][number])
+        for number in range(len(jobs))
+    ]
+    expected_shares = [weight / sum(weights) for weight in weights]
+    
+    failures = 0
+    print(f"{len(jobs)} jobs, weights {args.weights}, finished in {total_seconds:.1f}s")
+    for name, measured, expected in phases:
+        error = abs(measured - expected) / expected
+        failures += error > args.tolerance
+        print(f"  Received {name}: {measured / 1024:8.0f} KB/s (limit {expected / 1024:.0f} KB/s, {error:.1%} off)")
+    for number, (measured, expected) in enumerate(zip(shares, expected_shares)):
+        share = measured / max(1.0, sum(shares))
+        failures += abs(share - expected) > args.tolerance
+        print(f"  Job {number + 1} (weight {weights[number]:g}): {share:.1%} of the bandwidth (expected {expected:.1%})")
+    server_rate = rate_between(samples, all_started, total_seconds, lambda sample: sample['server'])
+    print(f"  Sent by the server over the whole run: {server_rate / 1024:.0f} KB/s")
+    if failures:
+        print("Out of tolerance")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
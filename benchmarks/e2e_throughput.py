@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+"""
+End-to-end throughput benchmark of DownloadController against a local fake site.
+
+A local HTTP server serves generated media with configurable bandwidth and
+latency. Stub yt-dlp extractors (benchmarks/yt_dlp_plugins) resolve fake single
+video and playlist URLs from it. Every scenario runs the full fetch, download,
+transcode and tag path, then reports items per minute, bytes per second and
+the latency of each stage.
+
+When ffmpeg is installed the media is real AAC audio converted to MP3, otherwise
+it is random bytes downloaded without conversion.
+
+Usage: python benchmarks/e2e_throughput.py [--scenarios single,10,100,1000] [--bandwidth 0] [--latency 0.02]
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Optional
+
+BENCHMARKS_DIR = os.path.dirname(os.path.abspath(__file__))
+# The benchmarks directory holds the stub extractors, loaded by yt-dlp as plugins
+sys.path.insert(0, BENCHMARKS_DIR)
+sys.path.insert(0, os.path.join(BENCHMARKS_DIR, '..', 'src'))
+
+from controllers.download_controller import DownloadController
+from models import DownloadConfig, DownloadJob
+from utils import metadata_cache, stage_metrics, thumbnail_cache
+
+CHUNK_SIZE = 64 * 1024
+
+
+class MediaRequestHandler(BaseHTTPRequestHandler):
+    """Serves the fake site: metadata API, media files and thumbnails."""
+    protocol_version = 'HTTP/1.1'
+    
+    def log_message(self, format, *args):
+        pass
+    
+    def do_GET(self):
+        server: MediaServer = self.server
+        time.sleep(server.latency)
+        
+        match = re.fullmatch(r'/api/video/([\w-]+)', self.path)
+        if match:
+            return self._send_json({
+                'title': f"Benchmark track {match.group(1)}",
+                'duration': server.media_seconds,
+                'ext': server.media_ext,
+                'streams': [[kbps, len(server.audio_stream(kbps))] for kbps in server.audio_bitrates]
+            })
+        match = re.fullmatch(r'/api/playlist/(\d+)', self.path)
+        if match:
+            count = int(match.group(1))
+            return self._send_json({
+                'title': f"Benchmark playlist ({count} items)",
+                'entries': [[f"p{count}-{number}", f"Benchmark track p{count}-{number}"] for number in range(count)]
+            })
+        match = re.fullmatch(r'/hls/([\w-]+)\.m3u8', self.path)
+        if match:
+            segments = "".join(f"#EXTINF:4.0,\n{match.group(1)}/{number}.ts\n" for number in range(server.segment_count))
+            playlist = f"#EXTM3U\n#EXT-X-VERSION:3\n#EXT-X-TARGETDURATION:4\n{segments}#EXT-X-ENDLIST\n"
+            return self._send_body(playlist.encode('utf-8'), 'application/vnd.apple.mpegurl')
+        if re.fullmatch(r'/hls/[\w-]+/\d+\.ts', self.path):
+            return self._send_bytes(server.segment, 'video/mp2t')
+        match = re.fullmatch(r'/media/([\w-]+)-(\d+)k\.\w+', self.path)
+        if match:
+            status = server.take_failure(match.group(1), self.headers.get('Range'))
+            if status:
+                return self.send_error(status)
+            return self._send_bytes(server.audio_stream(int(match.group(2))), 'audio/mp4',
+                                    cut_after=server.take_cut(match.group(1)))
+        if self.path.startswith('/thumb/'):
+            return self._send_bytes(server.thumbnail, 'image/jpeg')
+        self.send_error(404)
+    
+    def _send_json(self, data: Dict):
+        self._send_body(json.dumps(data).encode('utf-8'), 'application/json')
+    
+    def _send_body(self, body: bytes, content_type: str):
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def _send_bytes(self, data: bytes, content_type: str, cut_after: Optional[int] = None):
+        """Send data, honouring a Range header and the bandwidth limit, closing the connection after cut_after bytes."""
+        start, end = 0, len(data) - 1
+        match = re.fullmatch(r'bytes=(\d+)-(\d*)', self.headers.get('Range', ''))
+        if match:
+            start = int(match.group(1))
+            end = int(match.group(2)) if match.group(2) else end
+            self.send_response(206)
+            self.send_header('Content-Range', f'bytes {start}-{end}/{len(data)}')
+        else:
+            self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(end - start + 1))
+        self.send_header('Accept-Ranges', 'bytes')
+        self.end_headers()
+        
+        server: MediaServer = self.server
+        position = start
+        while position <= end:
+            if cut_after is not None and position - start >= cut_after:
+                # The connection drops mid-transfer, the client got fewer bytes than announced
+                self.close_connection = True
+                return
+            chunk_end = min(position + CHUNK_SIZE, end + 1)
+            if cut_after is not None:
+                chunk_end = min(chunk_end, start + cut_after)
+            chunk = data[position:chunk_end]
+            self.wfile.write(chunk)
+            position += len(chunk)
+            server.count_bytes(len(chunk))
+            if server.bandwidth:
+                time.sleep(len(chunk) / server.bandwidth)
+
+
+class MediaServer(ThreadingHTTPServer):
+    """Local server with a per-connection bandwidth limit (bytes/s, 0 for none) and a fixed latency.
+    
+    Every video offers one audio stream per bitrate of audio_bitrates, the highest
+    being the media and the others a proportional part of it. HLS streams
+    (/hls/<id>.m3u8) list segment_count copies of the segment bytes. The media
+    requests of each video are recorded, and some can be answered with an HTTP
+    error (see inject_failures) or cut off mid-transfer (see inject_cuts).
+    """
+    daemon_threads = True
+    
+    def __init__(self, media: bytes, media_ext: str, media_seconds: int, thumbnail: bytes,
+                 bandwidth: int = 0, latency: float = 0.0, segment: bytes = b'', segment_count: int = 0,
+                 audio_bitrates: tuple = (128,)):
+        super().__init__(('127.0.0.1', 0), MediaRequestHandler)
+        self.media = media
+        self.media_ext = media_ext
+        self.media_seconds = media_seconds
+        self.thumbnail = thumbnail
+        self.bandwidth = bandwidth
+        self.latency = latency
+        self.segment = segment
+        self.segment_count = segment_count
+        self.audio_bitrates = audio_bitrates
+        self.bytes_sent = 0
+        self.media_requests: Dict[str, list] = {}  # Range header of each media request, by video id
+        self._failures: Dict[str, tuple] = {}
+        self._cuts: Dict[str, tuple] = {}
+        self._lock = threading.Lock()
+    
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server_address[1]}"
+    
+    def audio_stream(self, kbps: int) -> bytes:
+        """Media bytes of the audio stream of a bitrate."""
+        return self.media[:len(self.media) * kbps // max(self.audio_bitrates)]
+    
+    def count_bytes(self, count: int):
+        with self._lock:
+            self.bytes_sent += count
+    
+    def inject_failures(self, video_id: str, status: int, count: Optional[int] = None):
+        """Answer the next count media requests of a video with an HTTP error (all of them for None)."""
+        with self._lock:
+            self._failures[video_id] = (status, count)
+    
+    def inject_cuts(self, video_id: str, after_bytes: int, count: int = 1):
+        """Close the connection of the next count media requests of a video after sending after_bytes."""
+        with self._lock:
+            self._cuts[video_id] = (after_bytes, count)
+    
+    def take_cut(self, video_id: str) -> Optional[int]:
+        """Return the number of bytes after which to cut a media request of a video, if it is to be cut."""
+        with self._lock:
+            after_bytes, count = self._cuts.get(video_id, (None, 0))
+            if not count:
+                return None
+            self._cuts[video_id] = (after_bytes, count - 1)
+            return after_bytes
+    
+    def take_failure(self, video_id: str, range_header: Optional[str]) -> Optional[int]:
+        """Record a media request of a video, return the error status to answer it with, if any."""
+        with self._lock:
+            self.media_requests.setdefault(video_id, []).append(range_header)
+            status, count = self._failures.get(video_id, (None, None))
+            if status is None:
+                return None
+            if count is not None:
+                if count <= 0:
+                    return None
+                self._failures[video_id] = (status, count - 1)
+            return status
+
+
+def generate_media(seconds: int, size_kb: int) -> tuple:
+    """Return (media bytes, extension, real) with FFmpeg, or random bytes without it."""
+    ffmpeg = shutil.which('ffmpeg')
+    if ffmpeg and shutil.which('ffprobe'):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'media.m4a')
+            subprocess.run([ffmpeg, '-y', '-loglevel', 'error', '-f', 'lavfi', '-i', f'sine=duration={seconds}',
+                            '-c:a', 'aac', '-b:a', '128k', path], check=True)
+            with open(path, 'rb') as f:
+                return f.read(), 'm4a', True
+    return os.urandom(size_kb * 1024), 'm4a', False
+
+
+def generate_thumbnail() -> bytes:
+    """A small JPEG used as every video's thumbnail."""
+    from PIL import Image
+    with io.BytesIO() as output:
+        Image.new('RGB', (320, 180), color='teal').save(output, format='JPEG')
+        return output.getvalue()
+
+
+def isolate_caches(directory: str):
+    """Keep the user's caches and metrics files out of the measurement."""
+    metadata_cache.path = os.path.join(directory, 'metadata.sqlite3')
+    stage_metrics.json_path = os.path.join(directory, 'metrics.json')
+    stage_metrics.prometheus_path = os.path.join(directory, 'metrics.prom')
+    thumbnail_cache.cache_dir = os.path.join(directory, 'thumbnails')
+    thumbnail_cache.objects_dir = os.path.join(thumbnail_cache.cache_dir, 'objects')
+    thumbnail_cache.refs_dir = os.path.join(thumbnail_cache.cache_dir, 'refs')
+
+
+def run_scenario(server: MediaServer, count: Optional[int], workers: int, real_media: bool) -> Dict:
+    """Fetch and download one URL end to end and collect the timings."""
+    url = f"{server.base_url}/watch/single-0" if count is None else f"{server.base_url}/playlist/{count}"
+    with tempfile.TemporaryDirectory() as output_directory:
+        config = DownloadConfig(
+            url=url, output_directory=output_directory, file_format='mp3', bitrate='128',
+            is_playlist=count is not None, playlist_start=1, playlist_end=count or 1,
+            concurrent_downloads=workers, archive_scope='off', resumable=False, verbose=False
+        )
+        controller = DownloadController()
+        controller.notifications_enabled = False
+        if not real_media:
+            # Random bytes cannot be converted
+            controller.ffmpeg_path = None
+        
+        bytes_before = server.bytes_sent
+        start_time = time.perf_counter()
+        video_info, error_message = controller.fetch_video_info(config)
+        fetch_seconds = time.perf_counter() - start_time
+        if not video_info:
+            raise RuntimeError(error_message)
+        controller.download(DownloadJob.create(config))
+        total_seconds = time.perf_counter() - start_time
+    
+    items = count or 1
+    transferred = server.bytes_sent - bytes_before
+    stages = {
+        stage['name']: stage['busy_seconds'] / max(1, stage['processed'] + stage['dropped'])
+        for stage in controller.get_pipeline_stats()
+    }
+    return {
+        'items': items,
+        'failed': len(controller.progress.failed_items),
+        'seconds': total_seconds,
+        'items_per_minute': items / total_seconds * 60,
+        'bytes_per_second': transferred / total_seconds,
+        'stage_latency': {'fetch': fetch_seconds, **stages}
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--scenarios', default='single,10,100,1000',
+                        help="comma-separated list of 'single' and playlist sizes")
+    parser.add_argument('--workers', type=int, default=3, help="concurrent playlist downloads")
+    parser.add_argument('--bandwidth', type=int, default=0, help="bytes/s per connection, 0 for unlimited")
+    parser.add_argument('--latency', type=float, default=0.02, help="seconds added to every request")
+    parser.add_argument('--media-seconds', type=int, default=30, help="length of the generated audio")
+    parser.add_argument('--media-kb', type=int, default=512, help="media size when ffmpeg is not available")
+    parser.add_argument('--json', action='store_true', help="print the results as JSON")
+    args = parser.parse_args()
+    
+    media, media_ext, real_media = generate_media(args.media_seconds, args.media_kb)
+    server = MediaServer(media, media_ext, args.media_seconds, generate_thumbnail(), args.bandwidth, args.latency)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    
+    results = {}
+    with tempfile.TemporaryDirectory() as cache_directory:
+        isolate_caches(cache_directory)
+        
+        for scenario in args.scenarios.split(','):
+            count = None if scenario == 'single' else int(scenario)
+            name = 'single video' if count is None else f"playlist of {count}"
+            # The application prints its own progress, only the results are shown
+            with contextlib.redirect_stdout(io.StringIO()):
+                results[name] = run_scenario(server, count, args.workers, real_media)
+            if not args.json:
+                result = results[name]
+                latencies = ", ".join(f"{stage} {seconds * 1000:.0f}ms"
+                                      for stage, seconds in result['stage_latency'].items())
+                print(f"{name:<18} {result['items_per_minute']:>9.1f} items/min "
+                      f"{result['bytes_per_second'] / 1024 / 1024:>8.2f} MiB/s "
+                      f"{result['seconds']:>8.2f}s  {result['failed']} failed  ({latencies})")
+    
+    server.shutdown()
+    if args.json:
+        print(json.dumps({
+            'media': {'bytes': len(media), 'real': real_media},
+            'bandwidth': args.bandwidth,
+            'latency': args.latency,
+            'workers': args.workers,
+            'results': results
+        }, indent=2))
+
+
+if __name__ == '__main__':
+    main()
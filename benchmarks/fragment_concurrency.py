@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Fragment concurrency benchmark: HLS playlists from a local server with per-request latency.
+
+Every item is an HLS stream of many small segments served by the local server of
+e2e_throughput.py, each request delayed by --latency. The same playlist is
+downloaded with fixed fragment concurrencies (1 is yt-dlp's default) and with the
+auto-tuned concurrency, which starts at the configured initial level and adapts
+from item to item.
+
+Usage: python benchmarks/fragment_concurrency.py [--modes 1,4,16,auto] [--latency 0.05] [--segments 40]
+"""
+import argparse
+import contextlib
+import io
+import os
+import tempfile
+import threading
+import time
+
+# Importing the end-to-end benchmark also puts src and the stub extractors on sys.path
+from e2e_throughput import MediaServer, generate_thumbnail, isolate_caches
+
+from controllers.download_controller import DownloadController
+from controllers.fragments import FragmentTuner
+from models import DownloadConfig, DownloadJob
+
+
+def run_mode(server: MediaServer, mode: str, items: int, workers: int, directory: str) -> dict:
+    """Download the HLS playlist with a fixed ('1', '4', ...) or the 'auto' fragment concurrency."""
+    output_directory = os.path.join(directory, f"mode-{mode}")
+    os.makedirs(output_directory)
+    config = DownloadConfig(
+        url=f"{server.base_url}/hls-playlist/{items}", output_directory=output_directory, file_format='mp4',
+        quality='1080', is_playlist=True, playlist_start=1, playlist_end=items, concurrent_downloads=workers,
+        archive_scope='off', resumable=False, verbose=False
+    )
+    controller = DownloadController()
+    controller.notifications_enabled = False
+    # The segments are random bytes, nothing to convert
+    controller.ffmpeg_path = None
+    if mode != 'auto':
+        level = int(mode)
+        controller.fragment_tuner = FragmentTuner(initial=level, minimum=level, maximum=level)
+    
+    video_info, error_message = controller.fetch_video_info(config)
+    if not video_info:
+        raise RuntimeError(error_message)
+    bytes_before = server.bytes_sent
+    start_time = time.perf_counter()
+    controller.download(DownloadJob.create(config))
+    seconds = time.perf_counter() - start_time
+    
+    history = list(controller.fragment_tuner.history)
+    return {
+        'seconds': seconds,
+        'failed': len(controller.progress.failed_items),
+        'items_per_minute': items / seconds * 60,
+        'bytes_per_second': (server.bytes_sent - bytes_before) / seconds,
+        'concurrency': [entry['concurrency'] for entry in history],
+        'fragment_latency': sum(entry['fragment_latency'] for entry in history) / max(1, len(history))
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--modes', default='1,4,16,auto', help="fixed concurrencies and/or 'auto'")
+    parser.add_argument('--items', type=int, default=6, help="HLS videos in the playlist")
+    parser.add_argument('--workers', type=int, default=1, help="playlist items downloaded in parallel")
+    parser.add_argument('--segments', type=int, default=40, help="segments per video")
+    parser.add_argument('--segment-kb', type=int, default=256, help="size of each segment")
+    parser.add_argument('--latency', type=float, default=0.05, help="seconds added to every request")
+    parser.add_argument('--bandwidth', type=int, default=0, help="bytes/s per connection, 0 for unlimited")
+    args = parser.parse_args()
+    
+    server = MediaServer(
+        b'', 'ts', 160, generate_thumbnail(), args.bandwidth, args.latency,
+        segment=os.urandom(args.segment_kb * 1024), segment_count=args.segments
+    )
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    
+    print(f"{args.items} videos of {args.segments} x {args.segment_kb} KB segments, "
+          f"{args.latency * 1000:.0f}ms per request, {args.workers} playlist worker(s)")
+    with tempfile.TemporaryDirectory() as directory:
+        isolate_caches(os.path.join(directory, 'cache'))
+        for mode in args.modes.split(','):
+            # The application and yt-dlp print their own progress and warnings, only the results are shown
+            with contextlib.redirect_stdout(io.StringIO()), contextlib.redirect_stderr(io.StringIO()):
+                result = run_mode(server, mode, args.items, args.workers, directory)
+            print(f"  concurrency {mode:<5} {result['seconds']:7.2f}s {result['items_per_minute']:7.1f} items/min "
+                  f"{result['bytes_per_second'] / 1024 / 1024:7.2f} MiB/s  "
+                  f"fragment latency {result['fragment_latency'] * 1000:5.0f}ms  {result['failed']} failed"
+                  + (f"  (levels {' '.join(map(str, result['concurrency']))})" if mode == 'auto' else ""))
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
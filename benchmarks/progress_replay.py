@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Progress replay: percentage, speed and ETA computed from a stream of yt-dlp hook events.
+
+The stream is that of an HTTP download recorded block by block: the rate drops
+halfway (another download starting on the same link) and the connection stalls
+for a moment. The events carry what yt-dlp reports: the bytes, the total, its
+speed (the average since the download started), its ETA and the '_percent_str'
+with the escape codes of the terminal. Both the ETAs of yt-dlp and those of
+DownloadProgress are compared with the time actually left over the second
+half, and the percentage is checked against the bytes whatever the escape codes.
+A merged video+audio download (two files, one after the other) is replayed as
+well: the item must go from 0 to 100% once and only finish with its second file.
+
+Usage: python benchmarks/progress_replay.py [--size-mib 64] [--fast-mib 4] [--slow-mib 1]
+"""
+import argparse
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from models import DownloadProgress
+
+BLOCK_SIZE = 64 * 1024
+STALL = (0.6, 2.0)  # fraction of the download at which the connection stalls, for how many seconds
+
+
+def record_stream(size: int, fast: float, slow: float, seed: int = 1) -> list:
+    """Hook events of a download whose rate drops from fast to slow halfway, with jitter and a stall."""
+    rng = random.Random(seed)
+    events, downloaded, now = [], 0, 0.0
+    stalled = False
+    while downloaded < size:
+        rate = fast if downloaded < size / 2 else slow
+        block = min(BLOCK_SIZE, size - downloaded)
+        now += block / rate * rng.uniform(0.3, 1.7)
+        if not stalled and downloaded >= size * STALL[0]:
+            now += STALL[1]
+            stalled = True
+        downloaded += block
+        speed = downloaded / now
+        percent = downloaded / size * 100
+        # The escape codes depend on the terminal and the yt-dlp version
+        escape = rng.choice(["\x1b[0;94m", "\x1b[0;32m", ""])
+        events.append({
+            'status': 'downloading', 'time': now, 'downloaded_bytes': downloaded, 'total_bytes': size,
+            'speed': speed, 'eta': (size - downloaded) / speed, '_percent_str': f"{escape}{percent:5.1f}%\x1b[0m"
+        })
+    return events
+
+
+def previous_percentage(event: dict) -> float:
+    """The percentage as the GUI parsed it before: only one escape code was known."""
+    try:
+        progress_str = event['_percent_str'].replace("\x1b[0;94m ", "").replace("\x1b[0m", "")
+        return float(progress_str.replace('%', ''))
+    except (ValueError, KeyError):
+        return 0.0
+
+
+def replay(events: list) -> dict:
+    """Feed a stream to DownloadProgress: wrong percentages and ETA errors over the second half."""
+    size = events[-1]['total_bytes']
+    end = events[-1]['time']
+    progress = DownloadProgress()
+    progress.set_total_items(1)
+    
+    errors = {'yt-dlp': [], 'smoothed': []}
+    wrong_percentages = {'previous': 0, 'bytes': 0}
+    for event in events:
+        progress.update_item_bytes(0, event['downloaded_bytes'], event['total_bytes'], now=event['time'])
+        percentage, _, eta = progress.item_transfer(0)
+        exact = event['downloaded_bytes'] / event['total_bytes'] * 100
+        wrong_percentages['previous'] += abs(previous_percentage(event) - exact) > 0.1
+        wrong_percentages['bytes'] += abs(percentage - exact) > 0.1
+        # No estimate can foresee the rate change, the ETAs are compared once it happened
+        if event['downloaded_bytes'] > size / 2 and eta is not None:
+            left = end - event['time']
+            errors['yt-dlp'].append(abs(event['eta'] - left))
+            errors['smoothed'].append(abs(eta - left))
+    return {'wrong_percentages': wrong_percentages, 'errors': errors}
+
+
+def replay_merged(video_events: list, audio_events: list) -> list:
+    """Feed a video then an audio stream of one item: (percentage, finished) after each event."""
+    progress = DownloadProgress()
+    progress.set_total_items(1)
+    progress.expect_files(0, 2)
+    states = []
+    offset = video_events[-1]['time']
+    for filename, events, start in (('video.f247.webm', video_events, 0.0), ('video.f140.m4a', audio_events, offset)):
+        for event in events:
+            progress.update_item_bytes(0, event['downloaded_bytes'], event['total_bytes'], now=start + event['time'])
+            states.append((progress.total_percentage, 0 in progress.finished_items))
+        progress.finish_file(0, filename)
+        states.append((progress.total_percentage, 0 in progress.finished_items))
+    return states
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--size-mib', type=float, default=64.0, help="size of the download")
+    parser.add_argument('--fast-mib', type=float, default=4.0, help="rate of the first half in MiB/s")
+    parser.add_argument('--slow-mib', type=float, default=1.0, help="rate of the second half in MiB/s")
+    args = parser.parse_args()
+    
+    size = int(args.size_mib * 1048576)
+    events = record_stream(size, args.fast_mib * 1048576, args.slow_mib * 1048576)
+    result = replay(events)
+    wrong_percentages, errors = result['wrong_percentages'], result['errors']
+    
+    print(f"{args.size_mib:g} MiB at {args.fast_mib:g} then {args.slow_mib:g} MiB/s, a {STALL[1]:g}s stall, "
+          f"{len(events)} events over {events[-1]['time']:.1f}s")
+    for name, count in wrong_percentages.items():
+        print(f"  percentage from {name + ':':<10} {count} of {len(events)} events wrong")
+    for name, values in errors.items():
+        print(f"  ETA {name + ':':<10} {sum(values) / len(values):5.1f}s mean error, {max(values):5.1f}s worst "
+              f"(second half)")
+    
+    # The audio stream of a merged download is about a tenth of the video one
+    states = replay_merged(events, record_stream(size // 10, args.fast_mib * 1048576, args.slow_mib * 1048576, seed=2))
+    percentages = [percentage for percentage, _ in states]
+    finished_at = next(index for index, (_, finished) in enumerate(states) if finished)
+    print(f"  merged formats: {len(states)} updates, finished at update {finished_at + 1}, "
+          f"{percentages[len(events)]:.0f}% after the video file")
+    
+    assert wrong_percentages['bytes'] == 0, "percentage not following the bytes"
+    mean_errors = {name: sum(values) / len(values) for name, values in errors.items()}
+    assert mean_errors['smoothed'] < mean_errors['yt-dlp'], "smoothed ETA no better than yt-dlp's"
+    assert percentages == sorted(percentages), "merged download going backwards"
+    assert finished_at == len(states) - 1 and percentages[-1] == 100.0, "merged download finished early"
+    assert percentages[len(events)] == 50.0, "video file of the merged download not counted as half"
+
+if __name__ == '__main__':
+    main()
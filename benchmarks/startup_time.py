@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Startup benchmark: import time per module and time to first paint of the GUI.
+
+Import times come from `python -X importtime` in fresh interpreters (median of
+several runs). Time to first paint starts the application with the startup
+probe enabled: it reports when the main window is mapped and when yt-dlp and
+its extractors have finished loading in the background, then exits. This part
+needs a display (run it under xvfb-run on a headless machine).
+
+Usage: python benchmarks/startup_time.py [--runs 5] [--budget 1.5]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+SRC_DIR = os.path.join(ROOT_DIR, 'src')
+sys.path.insert(0, SRC_DIR)
+
+from config import STARTUP_PROBE_ENV
+
+# Modules reported in the import table: the application and its heavy dependencies
+APP_PACKAGES = ('config', 'models', 'views', 'controllers', 'utils')
+HEAVY_MODULES = ('tkinter', 'ttkthemes', 'PIL', 'yt_dlp', 'mutagen', 'plyer')
+
+
+def measure_imports(runs: int) -> dict:
+    """Cumulative import time (ms) of each module the GUI loads before its window, per run."""
+    samples = {}
+    for _ in range(runs):
+        result = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', 'import controllers.app_controller'],
+            cwd=SRC_DIR, capture_output=True, text=True, check=True
+        )
+        for line in result.stderr.splitlines():
+            if not line.startswith('import time:') or 'cumulative' in line:
+                continue
+            _, cumulative, name = line.split('|')
+            name = name.strip()
+            if name.split('.')[0] in APP_PACKAGES or name in HEAVY_MODULES:
+                samples.setdefault(name, []).append(int(cumulative) / 1000)
+    return {name: statistics.median(values) for name, values in samples.items()}
+
+
+def measure_first_paint(timeout: float) -> dict:
+    """Start the GUI with the startup probe and return the seconds to first paint and to warm-up."""
+    env = dict(os.environ, **{STARTUP_PROBE_ENV: '1'})
+    start_time = time.time()
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(SRC_DIR, 'main.py')],
+        cwd=ROOT_DIR, env=env, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True
+    )
+    timings = {}
+    try:
+        output, _ = process.communicate(timeout=timeout)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        output, _ = process.communicate()
+    for line in output.splitlines():
+        if line.startswith('{"startup"'):
+            event = json.loads(line)
+            timings[event['startup']] = event['time'] - start_time
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--runs', type=int, default=5, help="interpreter runs per measurement")
+    parser.add_argument('--budget', type=float, default=1.5, help="time to first paint budget in seconds")
+    parser.add_argument('--timeout', type=float, default=60.0)
+    args = parser.parse_args()
+
+    imports = measure_imports(args.runs)
+    print(f"Import time before the window (median of {args.runs} runs, cumulative ms)")
+    for name, milliseconds in sorted(imports.items(), key=lambda item: -item[1]):
+        print(f"  {name:<40} {milliseconds:>8.1f}")
+    deferred = [name for name in HEAVY_MODULES if name not in imports]
+    print(f"Deferred until after the first paint: {', '.join(deferred) or 'nothing'}")
+
+    if not os.environ.get('DISPLAY') and os.name != 'nt':
+        print("\nNo display, skipping time to first paint (try xvfb-run).")
+        return
+
+    paints, warm_ups = [], []
+    for _ in range(args.runs):
+        timings = measure_first_paint(args.timeout)
+        if 'paint' in timings:
+            paints.append(timings['paint'])
+        if 'warm' in timings:
+            warm_ups.append(timings['warm'])
+    if not paints:
+        print("\nThe window did not report its first paint.")
+        sys.exit(1)
+
+    paint = statistics.median(paints)
+    print(f"\nTime to first paint: {paint:.2f}s (median of {len(paints)} runs, budget {args.budget:.2f}s)")
+    if warm_ups:
+        print(f"yt-dlp and extractors ready: {statistics.median(warm_ups):.2f}s after launch")
+    if paint > args.budget:
+        print("Over budget")
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Benchmark of the FFmpeg transcoding pool on locally generated audio and video files.
+
+Each run converts the same set of files through the pipeline's transcode stage
+with a different number of workers, and reports the speedup over one worker.
+The plan chosen automatically for this machine is marked with '*'.
+
+Usage: python benchmarks/transcode_scaling.py [--files 16] [--kind audio|video|both] [--max-workers 4]
+"""
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import yt_dlp
+
+from controllers.pipeline import Pipeline, PipelineStage
+from controllers.transcoding import TranscodePlan, plan_transcoding
+
+# Generated source files and the post-processors the application runs on them
+SOURCES = {
+    'audio': {
+        'ext': 'wav',
+        'format': 'mp3',
+        'ffmpeg_args': ['-f', 'lavfi', '-i', 'sine=frequency=440:duration=120'],
+        'postprocessors': [{'key': 'FFmpegExtractAudio', 'preferredcodec': 'mp3', 'preferredquality': '192'}]
+    },
+    'video': {
+        'ext': 'avi',
+        'format': 'mp4',
+        'ffmpeg_args': [
+            '-f', 'lavfi', '-i', 'testsrc=duration=10:size=1280x720:rate=30',
+            '-f', 'lavfi', '-i', 'sine=frequency=440:duration=10',
+            '-c:v', 'mpeg4', '-q:v', '5', '-c:a', 'pcm_s16le', '-shortest'
+        ],
+        'postprocessors': [{'key': 'FFmpegVideoConvertor', 'preferedformat': 'mp4'}]
+    }
+}
+
+
+def generate_sources(ffmpeg: str, kind: str, directory: str, count: int) -> list:
+    """Generate one source file with FFmpeg and copy it count times."""
+    source = SOURCES[kind]
+    first = os.path.join(directory, f"source.{source['ext']}")
+    subprocess.run([ffmpeg, '-y', '-loglevel', 'error', *source['ffmpeg_args'], first], check=True)
+    paths = []
+    for number in range(count):
+        path = os.path.join(directory, f"{kind}-{number}.{source['ext']}")
+        shutil.copyfile(first, path)
+        paths.append(path)
+    os.remove(first)
+    return paths
+
+
+def run_pool(ffmpeg: str, kind: str, sources: list, plan: TranscodePlan) -> float:
+    """Convert copies of the sources with a transcoding pool. Returns the elapsed seconds."""
+    source = SOURCES[kind]
+    ydl_opts = {
+        'quiet': True,
+        'ffmpeg_location': os.path.dirname(ffmpeg),
+        'postprocessors': source['postprocessors'],
+        'postprocessor_args': plan.postprocessor_args
+    }
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        infos = []
+        for number, path in enumerate(sources):
+            copy = os.path.join(work_dir, os.path.basename(path))
+            shutil.copyfile(path, copy)
+            infos.append({'id': str(number), 'title': f"{kind} {number}", 'ext': source['ext'], 'filepath': copy})
+
+        def transcode(info):
+            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
+                return ydl.post_process(info['filepath'], info)
+
+        pipeline = Pipeline([PipelineStage("transcode", transcode, workers=plan.workers)])
+        start_time = time.perf_counter()
+        pipeline.run(infos)
+        elapsed = time.perf_counter() - start_time
+        if pipeline.stages[0].dropped:
+            print(f"Warning: {pipeline.stages[0].dropped} conversions failed")
+        return elapsed
+
+
+def benchmark(ffmpeg: str, kind: str, count: int, max_workers: int):
+    """Print the scaling table for one kind of file."""
+    cores = os.cpu_count() or 1
+    chosen = plan_transcoding(SOURCES[kind]['format'], max_workers)
+    worker_counts = sorted({1, chosen.workers} | {2 ** n for n in range(1, 8) if 2 ** n <= cores})
+
+    with tempfile.TemporaryDirectory() as source_dir:
+        sources = generate_sources(ffmpeg, kind, source_dir, count)
+        print(f"\n{kind}: {count} files -> {SOURCES[kind]['format']}, {cores} cores")
+        print(f"{'workers':>8} {'threads':>8} {'seconds':>9} {'files/s':>8} {'speedup':>8}")
+
+        baseline = None
+        for workers in worker_counts:
+            threads = 1 if kind == 'audio' else max(1, cores // workers)
+            plan = TranscodePlan(workers=workers, ffmpeg_threads=threads)
+            elapsed = run_pool(ffmpeg, kind, sources, plan)
+            baseline = baseline or elapsed
+            marker = '*' if plan == chosen else ' '
+            print(f"{workers:>7}{marker} {threads:>8} {elapsed:>9.2f} {count / elapsed:>8.2f} {baseline / elapsed:>7.2f}x")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--files', type=int, default=16, help="number of files converted per run")
+    parser.add_argument('--kind', choices=['audio', 'video', 'both'], default='both')
+    parser.add_argument('--max-workers', type=int, default=os.cpu_count() or 1,
+                        help="cap used for the automatic plan (the application default is lower)")
+    args = parser.parse_args()
+
+    ffmpeg = shutil.which('ffmpeg')
+    if ffmpeg is None or shutil.which('ffprobe') is None:
+        print("ffmpeg and ffprobe must be in PATH to generate and convert the files.")
+        sys.exit(1)
+
+    for kind in (['audio', 'video'] if args.kind == 'both' else [args.kind]):
+        benchmark(ffmpeg, kind, args.files, args.max_workers)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""
+Video format policies on a recorded format list: bytes, FFmpeg work and time of each choice.
+
+The format lists are those of a 10 minute YouTube video up to 1080p, with H.264
+and VP9 streams, and with AV1 streams as well (popular videos). For each target
+height, the previous MP4-only format string is compared with the "smallest",
+"fastest" and "best" policies of VideoFormatSelector.
+
+Usage: python benchmarks/video_format_policies.py [--heights 360,720,1080] [--bandwidth-mib 4]
+"""
+import argparse
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+import yt_dlp
+
+from config import VIDEO_FORMAT_POLICIES
+from controllers.video_formats import VideoFormatSelector
+
+DURATION = 600
+
+
+def _format(format_id, ext, vcodec, acodec, height=None, fps=None, kbps=None, abr=None):
+    """A recorded format, its size following from its bitrate."""
+    bitrate = kbps or abr
+    return {
+        'format_id': format_id, 'url': f'https://example.com/{format_id}', 'ext': ext, 'protocol': 'https',
+        'vcodec': vcodec, 'acodec': acodec, 'height': height, 'fps': fps, 'abr': abr,
+        'vbr': kbps if acodec == 'none' else None, 'tbr': bitrate, 'filesize': int(bitrate * 125 * DURATION)
+    }
+
+
+# Sorted worst to best, as yt-dlp hands them to format selectors
+H264_VP9_FORMATS = [
+    _format('139', 'm4a', 'none', 'mp4a.40.5', abr=48),
+    _format('249', 'webm', 'none', 'opus', abr=55),
+    _format('140', 'm4a', 'none', 'mp4a.40.2', abr=129),
+    _format('251', 'webm', 'none', 'opus', abr=140),
+    _format('18', 'mp4', 'avc1.42001E', 'mp4a.40.2', 360, 30, kbps=550),
+    _format('134', 'mp4', 'avc1.4d401e', 'none', 360, 30, kbps=420),
+    _format('243', 'webm', 'vp9', 'none', 360, 30, kbps=280),
+    _format('136', 'mp4', 'avc1.4d401f', 'none', 720, 30, kbps=1500),
+    _format('247', 'webm', 'vp9', 'none', 720, 30, kbps=1000),
+    _format('137', 'mp4', 'avc1.640028', 'none', 1080, 30, kbps=3000),
+    _format('248', 'webm', 'vp9', 'none', 1080, 30, kbps=1900),
+]
+AV1_FORMATS = H264_VP9_FORMATS + [
+    _format('396', 'mp4', 'av01.0.01M.08', 'none', 360, 30, kbps=250),
+    _format('398', 'mp4', 'av01.0.05M.08', 'none', 720, 30, kbps=900),
+    _format('399', 'mp4', 'av01.0.08M.08', 'none', 1080, 30, kbps=1700),
+]
+RECORDED_FORMATS = {'H.264 and VP9': H264_VP9_FORMATS, 'H.264, VP9 and AV1': AV1_FORMATS}
+
+
+def previous_selection(formats: list, height: int) -> dict:
+    """What the MP4-only format string chose, through yt-dlp's own selector."""
+    format_string = f'bestvideo[height<={height}][vbr<=12000][ext=mp4]+bestaudio[ext=m4a]/best[vbr<=12000][ext=mp4]/best'
+    with yt_dlp.YoutubeDL({'quiet': True}) as ydl:
+        selector = ydl.build_format_selector(format_string)
+        return next(iter(selector({
+            'formats': formats, 'has_merged_format': True, 'incomplete_formats': False
+        })))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--heights', default='360,720,1080', help="target heights")
+    parser.add_argument('--bandwidth-mib', type=float, default=4.0, help="expected download rate in MiB/s")
+    args = parser.parse_args()
+    bandwidth = args.bandwidth_mib * 1024 * 1024
+    
+    for name, formats in RECORDED_FORMATS.items():
+        for height in args.heights.split(','):
+            print(f"{name}, {height}p, {DURATION // 60} minutes at {args.bandwidth_mib:g} MiB/s")
+            previous = previous_selection(formats, int(height))
+            # Scored with the same model, the policy only changes the weights
+            rankings = {'previous': VideoFormatSelector(height, 'smallest', bandwidth).rank(formats)}
+            rankings.update({policy: VideoFormatSelector(height, policy, bandwidth).rank(formats)
+                             for policy in VIDEO_FORMAT_POLICIES})
+            for policy, ranking in rankings.items():
+                if policy == 'previous':
+                    candidate = next((candidate for candidate in ranking
+                                      if candidate['format']['format_id'] == previous['format_id']), None)
+                    if candidate is None:
+                        print(f"  {policy:<9} {previous['format_id']:<8} (not at the same height, not scored)")
+                        continue
+                else:
+                    candidate = ranking[0]
+                chosen = candidate['format']
+                print(f"  {policy:<9} {chosen['format_id']:<8} {chosen.get('vcodec', '?').split('.')[0]:<5} "
+                      f"{chosen['ext']:<5} {candidate['size'] / 1048576:7.1f} MiB  FFmpeg {candidate['plan']:<9} "
+                      f"~{candidate['seconds']:5.1f}s  quality {candidate['quality']:6.0f}")
+
+if __name__ == '__main__':
+    main()
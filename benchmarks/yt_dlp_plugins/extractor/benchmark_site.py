@@ -0,0 +1,81 @@
+"""
+Stub yt-dlp extractors for the local benchmark server (benchmarks/e2e_throughput.py).
+
+yt-dlp loads them as plugins when the benchmarks directory is on sys.path. They
+only match URLs of a server on the loopback interface:
+
+    http://127.0.0.1:<port>/watch/<id>            a single video
+    http://127.0.0.1:<port>/hls-watch/<id>        a single video streamed over HLS
+    http://127.0.0.1:<port>/playlist/<count>      a playlist of <count> videos
+    http://127.0.0.1:<port>/hls-playlist/<count>  a playlist of <count> HLS videos
+"""
+from yt_dlp.extractor.common import InfoExtractor
+
+_BASE_URL_RE = r'(?P<base>https?://(?:127\.0\.0\.1|localhost):\d+)'
+
+
+class BenchmarkVideoIE(InfoExtractor):
+    IE_NAME = 'benchmark:video'
+    _VALID_URL = _BASE_URL_RE + r'/watch/(?P<id>[\w-]+)'
+    
+    def _real_extract(self, url):
+        base_url, video_id = self._match_valid_url(url).group('base', 'id')
+        metadata = self._download_json(f'{base_url}/api/video/{video_id}', video_id)
+        return {
+            'id': video_id,
+            'title': metadata['title'],
+            'uploader': 'Benchmark',
+            'duration': metadata['duration'],
+            'thumbnail': f'{base_url}/thumb/{video_id}.jpg',
+            'formats': [{
+                'format_id': f'audio-{kbps}',
+                'url': f'{base_url}/media/{video_id}-{kbps}k.{metadata["ext"]}',
+                'ext': metadata['ext'],
+                'acodec': 'mp4a.40.2',
+                'vcodec': 'none',
+                'abr': kbps,
+                'filesize': size
+            } for kbps, size in metadata['streams']]
+        }
+
+
+class BenchmarkHlsIE(InfoExtractor):
+    IE_NAME = 'benchmark:hls'
+    _VALID_URL = _BASE_URL_RE + r'/hls-watch/(?P<id>[\w-]+)'
+    
+    def _real_extract(self, url):
+        base_url, video_id = self._match_valid_url(url).group('base', 'id')
+        metadata = self._download_json(f'{base_url}/api/video/{video_id}', video_id)
+        return {
+            'id': video_id,
+            'title': metadata['title'],
+            'uploader': 'Benchmark',
+            'duration': metadata['duration'],
+            'thumbnail': f'{base_url}/thumb/{video_id}.jpg',
+            # MPEG-TS segments of random bytes: the .ts extension keeps yt-dlp's MP4 fixup away
+            'formats': [{
+                'format_id': 'hls-1080',
+                'url': f'{base_url}/hls/{video_id}.m3u8',
+                'protocol': 'm3u8_native',
+                'ext': 'ts',
+                'vcodec': 'avc1.640028',
+                'acodec': 'mp4a.40.2',
+                'width': 1920,
+                'height': 1080
+            }]
+        }
+
+
+class BenchmarkPlaylistIE(InfoExtractor):
+    IE_NAME = 'benchmark:playlist'
+    _VALID_URL = _BASE_URL_RE + r'/(?P<kind>playlist|hls-playlist)/(?P<id>\d+)'
+    
+    def _real_extract(self, url):
+        base_url, kind, count = self._match_valid_url(url).group('base', 'kind', 'id')
+        metadata = self._download_json(f'{base_url}/api/playlist/{count}', count)
+        path, ie = ('hls-watch', BenchmarkHlsIE) if kind == 'hls-playlist' else ('watch', BenchmarkVideoIE)
+        entries = [
+            self.url_result(f'{base_url}/{path}/{video_id}', ie, video_id, title)
+            for video_id, title in metadata['entries']
+        ]
+        return self.playlist_result(entries, f'benchmark-{count}', metadata['title'])
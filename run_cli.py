@@ -0,0 +1,24 @@
+#!/usr/bin/env python3
+"""
+Launcher script for the headless command line interface of yt-dlp Convenient GUI
+"""
+import sys
+import os
+
+# Get the directory where this script is located
+script_dir = os.path.dirname(os.path.abspath(__file__))
+
+# Add src directory to Python path
+src_dir = os.path.join(script_dir, 'src')
+sys.path.insert(0, src_dir)
+
+# Import and run the command line interface
+try:
+    from cli import main
+except ImportError as e:
+    print(f"Error importing application modules: {e}", file=sys.stderr)
+    print("Make sure all dependencies are installed:", file=sys.stderr)
+    print("pip install yt-dlp Pillow plyer mutagen", file=sys.stderr)
+    sys.exit(1)
+
+sys.exit(main())
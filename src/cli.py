@@ -0,0 +1,227 @@
+"""
+Headless command line entry point for yt-dlp Convenient GUI.
+
+Downloads the given URLs with the same engine and settings as the GUI, without
+loading tkinter, and reports progress on stdout as JSON lines (one object per
+line, with an "event" field). Everything else the application prints goes to
+stderr, so stdout can be piped straight into another program.
+
+Usage:
+    python run_cli.py URL [URL ...] [-i urls.txt] [-o DIR] [-f mp3|mp4] [-b 192] [-q 720] [--playlist]
+    python run_cli.py --rebuild-archive [-o DIR]
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from typing import Dict, List, Optional, TextIO
+
+# Add the src directory to the Python path so we can import our modules
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from config import CLI_PROGRESS_INTERVAL, FILE_FORMATS, VIDEO_FORMAT_POLICIES
+from controllers.bandwidth import bandwidth_governor
+from controllers.download_controller import DownloadController
+from models import DownloadConfig, DownloadJob, DownloadProgress
+from utils import settings_manager, get_download_archive
+
+
+class JsonLinesReporter:
+    """Writes download events as JSON lines, limiting progress ticks per item."""
+    
+    def __init__(self, stream: TextIO, interval: float = CLI_PROGRESS_INTERVAL):
+        self.stream = stream
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._last_tick: Dict[tuple, float] = {}
+    
+    def emit(self, event: str, **fields):
+        """Write one event (safe to call from any thread)."""
+        line = json.dumps({'event': event, 'time': round(time.time(), 3), **fields}, default=str)
+        with self._lock:
+            self.stream.write(line + '\n')
+            self.stream.flush()
+    
+    def on_progress(self, job: DownloadJob, progress_data: Dict, video_info: Dict, progress: DownloadProgress):
+        """Progress callback of the download controller."""
+        status = progress_data.get('status')
+        info_dict = progress_data.get('info_dict') or {}
+        item = info_dict.get('playlist_autonumber', 1)
+        
+        if status == 'downloading':
+            key = (job.job_id, item)
+            now = time.monotonic()
+            with self._lock:
+                if now - self._last_tick.get(key, 0.0) < self.interval:
+                    return
+                self._last_tick[key] = now
+        
+        fields = {
+            'job': job.job_id,
+            'item': item,
+            'status': status,
+            'title': info_dict.get('title')
+        }
+        if status == 'downloading':
+            percentage, speed, eta = progress.item_transfer(item - 1)
+            fields.update({
+                'downloaded_bytes': progress_data.get('downloaded_bytes'),
+                'total_bytes': progress_data.get('total_bytes') or progress_data.get('total_bytes_estimate'),
+                'percent': round(percentage, 1) if percentage is not None else None,
+                'speed': round(speed) if speed is not None else None,
+                'eta': round(eta, 1) if eta is not None else None
+            })
+        elif status == 'retrying':
+            fields.update({
+                'attempt': progress_data.get('attempt'),
+                'max_attempts': progress_data.get('max_attempts'),
+                'reason': progress_data.get('reason')
+            })
+        if job.is_playlist:
+            fields['total_percent'] = round(progress.total_percentage, 1)
+        self.emit('progress', **fields)
+
+
+def read_url_file(path: str) -> List[str]:
+    """Read URLs from a file, one per line (blank lines and # comments are ignored)."""
+    with open(path, 'r', encoding='utf-8') as f:
+        return [line.strip() for line in f if line.strip() and not line.strip().startswith('#')]
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    """Parse the command line, with defaults taken from the GUI settings."""
+    preferences = settings_manager.get_last_format_preferences()
+    
+    parser = argparse.ArgumentParser(description="Download videos and audio with yt-dlp, without the GUI.")
+    parser.add_argument('urls', nargs='*', help="URLs to download")
+    parser.add_argument('-i', '--input', help="file with one URL per line")
+    parser.add_argument('-o', '--output', default=settings_manager.get_last_download_directory() or os.getcwd(),
+                        help="output directory (default: last directory used in the GUI)")
+    parser.add_argument('-f', '--format', choices=list(FILE_FORMATS.values()),
+                        default=FILE_FORMATS.get(preferences['format_var'], "mp3"))
+    parser.add_argument('-b', '--bitrate', default=preferences['bitrate'].split("Kbps")[0],
+                        help="MP3 bitrate in Kbps")
+    parser.add_argument('--passthrough', action=argparse.BooleanOptionalAction, default=None,
+                        help="keep M4A/Opus audio as downloaded instead of encoding MP3 (default: the settings)")
+    parser.add_argument('-q', '--quality', default=preferences['quality'].split("p")[0],
+                        help="maximum MP4 height in pixels")
+    parser.add_argument('--policy', choices=list(VIDEO_FORMAT_POLICIES), default=None,
+                        help="MP4 format choice: fewest bytes, quickest to finish or best quality (default: the settings)")
+    parser.add_argument('--playlist', action=argparse.BooleanOptionalAction, default=preferences['playlist_mode'],
+                        help="download the whole playlist of the URLs")
+    parser.add_argument('--start', type=int, default=1, help="first playlist item")
+    parser.add_argument('--end', type=int, default=None, help="last playlist item (default: the last one)")
+    parser.add_argument('--limit', type=float, default=None,
+                        help="total download rate in KB/s, 0 for unlimited (default: the settings, with their schedule)")
+    parser.add_argument('--rebuild-archive', action='store_true',
+                        help="add the tagged files of the output directory to the download archive first")
+    parser.add_argument('--verbose', action='store_true', help="print yt-dlp debug output on stderr")
+    
+    args = parser.parse_args(argv)
+    if args.input:
+        try:
+            args.urls += read_url_file(args.input)
+        except OSError as e:
+            parser.error(f"could not read {args.input}: {e}")
+    if not args.urls and not args.rebuild_archive:
+        parser.error("no URL given")
+    if not os.path.isdir(args.output):
+        parser.error(f"output directory {args.output} does not exist")
+    return args
+
+
+def build_config(args: argparse.Namespace, url: str) -> DownloadConfig:
+    """Create the download configuration of a URL, with the tuning options of the settings file."""
+    options = settings_manager.get_download_options()
+    if args.passthrough is not None:
+        options['audio_passthrough'] = args.passthrough
+    if args.policy is not None:
+        options['video_format_policy'] = args.policy
+    return DownloadConfig(
+        url=url,
+        output_directory=os.path.abspath(args.output),
+        file_format=args.format,
+        bitrate=args.bitrate,
+        quality=args.quality,
+        is_playlist=args.playlist,
+        playlist_start=args.start,
+        playlist_end=args.end,
+        verbose=args.verbose,
+        **options
+    )
+
+
+def rebuild_archive(args: argparse.Namespace, reporter: JsonLinesReporter) -> bool:
+    """Add the tagged files of the output directory to its download archive. Returns False if it is off."""
+    output_directory = os.path.abspath(args.output)
+    archive = get_download_archive(output_directory, settings_manager.get_download_options()['archive_scope'])
+    if archive is None:
+        reporter.emit('error', message="The download archive is off in the settings (download_archive_scope).")
+        return False
+    found = archive.rebuild(output_directory)
+    reporter.emit('archive_rebuilt', path=archive.path, found=found, items=len(archive))
+    return True
+
+
+def run(args: argparse.Namespace, reporter: JsonLinesReporter) -> int:
+    """Download every URL in turn. Returns the exit code (1 if anything failed)."""
+    if args.rebuild_archive and not rebuild_archive(args, reporter):
+        return 1
+    if not args.urls:
+        return 0
+    
+    controller = DownloadController()
+    controller.notifications_enabled = False
+    controller.set_progress_callback(reporter.on_progress)
+    bandwidth_settings = settings_manager.get_bandwidth_settings()
+    if args.limit is not None:
+        bandwidth_settings = {'limit_kbps': args.limit, 'schedule': []}
+    bandwidth_governor.apply_settings(bandwidth_settings)
+    exit_code = 0
+    
+    for url in args.urls:
+        job = DownloadJob.create(build_config(args, url))
+        reporter.emit('fetching', job=job.job_id, url=url)
+        video_info, error_message = controller.fetch_video_info(job.config)
+        if not video_info:
+            reporter.emit('error', job=job.job_id, url=url, message=error_message or "Could not retrieve video information.")
+            exit_code = 1
+            continue
+        
+        entries = video_info.get('entries') if job.is_playlist else None
+        reporter.emit('started', job=job.job_id, url=url, title=video_info.get('title'),
+                      items=len(entries) if entries is not None else 1)
+        
+        controller.progress.reset()
+        start_time = time.perf_counter()
+        controller.download(job)
+        failed = controller.progress.failed_items
+        if failed:
+            exit_code = 1
+        reporter.emit('complete', job=job.job_id, url=url, seconds=round(time.perf_counter() - start_time, 2),
+                      failed={str(index + 1): reason for index, reason in sorted(failed.items())})
+    
+    return exit_code
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Command line entry point."""
+    args = parse_args(argv)
+    
+    # stdout carries only the JSON lines, other output goes to stderr
+    reporter = JsonLinesReporter(sys.stdout)
+    sys.stdout = sys.stderr
+    try:
+        return run(args, reporter)
+    except KeyboardInterrupt:
+        reporter.emit('interrupted')
+        return 130
+    finally:
+        sys.stdout = reporter.stream
+        settings_manager.flush()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -49,6 +49,97 @@ DEFAULT_QUALITIES = ["144p", "360p", "480p", "720p", "1080p", "1440p", "2160p"]
 DEFAULT_BITRATE = "192Kbps"
 DEFAULT_QUALITY = "720p"
 
+# Number of playlist items downloaded in parallel (most items are latency-bound)
+DEFAULT_CONCURRENT_DOWNLOADS = 3
+MAX_CONCURRENT_DOWNLOADS = 8
+
+# Download pipeline: FFmpeg and tagging run in their own stages while the next items download
+PIPELINE_SETTINGS = {
+    'tag_workers': 1,
+    'queue_size': 2  # downloaded items waiting per stage before downloads pause
+}
+
+# FFmpeg transcoding pool, sized from the CPU count (the cap is configurable in the settings)
+DEFAULT_MAX_TRANSCODE_WORKERS = 4
+VIDEO_TRANSCODE_THREADS = 2  # FFmpeg threads per video conversion, audio encoders are single-threaded
+
+# Audio downloads: the smallest stream meeting the bitrate, passthrough keeps AAC/Opus audio without encoding
+DEFAULT_AUDIO_PASSTHROUGH = False
+AUDIO_PASSTHROUGH_CODECS = ('mp4a', 'aac', 'opus')
+AUDIO_BITRATE_TOLERANCE = 0.9  # streams slightly below the requested bitrate still meet it
+
+# MP4 format selection: candidates at the target height are scored by the policy's weights (lower is better)
+DEFAULT_VIDEO_FORMAT_POLICY = "smallest"
+VIDEO_FORMAT_POLICIES = {
+    'smallest': {'size': 1.0, 'ffmpeg': 0.1, 'quality': 0.1},  # fewest bytes downloaded
+    'fastest': {'time': 1.0, 'quality': 0.1},  # download and FFmpeg time at the expected bandwidth
+    'best': {'quality': 1.0, 'fps': 0.2, 'size': 0.1}
+}
+VIDEO_CODEC_EFFICIENCY = {  # quality per bit relative to H.264
+    'avc1': 1.0, 'avc3': 1.0, 'h264': 1.0, 'mp4v': 0.7, 'vp8': 0.9, 'vp09': 1.4, 'vp9': 1.4,
+    'hev1': 1.5, 'hvc1': 1.5, 'h265': 1.5, 'hevc': 1.5, 'av01': 1.8, 'av1': 1.8
+}
+FORMAT_SELECTION_SETTINGS = {
+    'bandwidth': 4 * 1024 * 1024,  # bytes/s expected when no bandwidth limit is set
+    'copy_speed': 100 * 1024 * 1024,  # bytes/s of an FFmpeg stream copy (merge or remux)
+    'media_seconds': 300,  # assumed length when the formats do not tell
+    'audio_kbps': 128  # audio bitrate paired with the video, except for the best quality policy
+}
+
+# Remux-first MP4 post-processing: streams MP4 can hold are copied, only the others are re-encoded
+MP4_VIDEO_CODECS = ('avc1', 'avc3', 'h264', 'hev1', 'hvc1', 'h265', 'hevc', 'av01', 'av1', 'vp09', 'vp9', 'mp4v')
+MP4_AUDIO_CODECS = ('mp4a', 'aac', 'mp3', 'opus', 'ac-3', 'ac3', 'ec-3', 'eac3', 'flac', 'alac')
+POSTPROCESS_SETTINGS = {
+    'transcode_speed': 1.0,  # media seconds re-encoded per second, until a transcode is measured
+    'smoothing': 0.5  # weight of the newest measured transcode speed
+}
+
+# Bandwidth governor shared by all downloads (the limit and schedule are in the settings, 0 is unlimited)
+DEFAULT_BANDWIDTH_LIMIT_KBPS = 0
+BANDWIDTH_SETTINGS = {
+    'burst_seconds': 0.5,  # bytes a job may receive at once, in seconds of its rate
+    'active_window': 2.0,  # seconds without data after which a job stops taking a share of the limit
+    'wait_slice': 0.25  # longest wait before limit and schedule changes are picked up
+}
+
+# DASH/HLS fragments downloaded in parallel, tuned per extractor from the measured throughput
+FRAGMENT_SETTINGS = {
+    'initial': 4,
+    'min': 1,
+    'max': 16,
+    'buffer_bytes': 64 * 1024 * 1024,  # fragments in flight waiting to be reassembled in order
+    'min_fragments': 4,  # shorter downloads say too little about the stream
+    'min_gain': 0.15,  # throughput gain needed to keep a higher concurrency
+    'smoothing': 0.5,  # weight of the newest measurement of a level
+    'history': 100
+}
+
+# Retry engine: per-item and per-job retry budgets, exponential backoff with jitter
+RETRY_SETTINGS = {
+    'max_item_retries': 3,
+    'max_job_retries': 10,
+    'base_delay': 2.0,
+    'max_delay': 60.0
+}
+
+# Interval at which queued download progress is applied to the UI (10 refreshes per second)
+PROGRESS_REFRESH_INTERVAL_MS = 100
+
+# Download speed and ETA: moving average of the byte rates reported by yt-dlp
+PROGRESS_SPEED_SETTINGS = {
+    'sample_seconds': 0.25,  # shortest interval a byte rate is measured over
+    'smoothing_seconds': 3.0  # older byte rates fade out over this time
+}
+
+# Minimum interval (seconds) between JSON progress lines of an item in the command line interface
+CLI_PROGRESS_INTERVAL = 0.5
+
+# Environment variable making the GUI report its startup timings and exit (used by the startup benchmark)
+STARTUP_PROBE_ENV = "YTDLP_GUI_STARTUP_PROBE"
+
+# Delay (seconds) before pending settings changes are written to disk
+SETTINGS_FLUSH_DELAY = 1.0
+
 # File formats
 FILE_FORMATS = {
     1: "mp3",
@@ -58,6 +149,52 @@ FILE_FORMATS = {
 # Paths
 SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 ICON_PATH = os.path.join(SCRIPT_DIR, '..', 'assets', 'icon.ico')
+CACHE_DIR = os.path.join(SCRIPT_DIR, '..', '.cache')
+
+# Download archive ("directory": one per output folder, "global": shared, "off": disabled)
+DEFAULT_DOWNLOAD_ARCHIVE_SCOPE = "directory"
+DOWNLOAD_ARCHIVE_FILENAME = ".yt-dlp-gui-archive.txt"
+GLOBAL_DOWNLOAD_ARCHIVE_PATH = os.path.join(CACHE_DIR, 'download-archive.txt')
+MEDIA_EXTENSIONS = ('.mp3', '.mp4', '.m4a', '.opus')
+
+# Resumable downloads keep yt-dlp .part files and a journal of the unfinished job
+DEFAULT_RESUMABLE_DOWNLOADS = True
+RESUME_JOURNAL_PREFIX = ".yt-dlp-gui-job-"
+
+# Incremental playlists: list the playlist flat, then resolve entries just ahead of the downloads
+DEFAULT_INCREMENTAL_PLAYLISTS = True
+PLAYLIST_RESOLVER_WORKERS = 2
+PLAYLIST_RESOLVER_LOOKAHEAD = 3  # entries resolved ahead of the one being downloaded
+
+# Metadata cache: extract_info results kept on disk, TTL in seconds per extractor
+METADATA_CACHE_PATH = os.path.join(CACHE_DIR, 'metadata.sqlite3')
+METADATA_CACHE_MAX_BYTES = 64 * 1024 * 1024
+METADATA_CACHE_TTLS = {
+    'default': 1800,
+    'Youtube': 3600,  # stream URLs expire after a few hours
+    'YoutubeTab': 3600,
+    'Generic': 600
+}
+METADATA_CACHE_STRIPPED_FIELDS = {
+    'automatic_captions', 'subtitles', 'requested_subtitles', 'heatmap', 'comments'
+}
+
+# Stage timing metrics, written after every job (JSON and Prometheus text format)
+METRICS_JSON_PATH = os.path.join(CACHE_DIR, 'metrics.json')
+METRICS_PROMETHEUS_PATH = os.path.join(CACHE_DIR, 'metrics.prom')
+METRICS_MAX_JOBS = 50  # most recent jobs kept with their own timings
+METRICS_PANEL_REFRESH_MS = 1000
+
+# Thumbnail cache limits
+THUMBNAIL_CACHE_DIR = os.path.join(CACHE_DIR, 'thumbnails')
+THUMBNAIL_MEMORY_CACHE_ENTRIES = 64
+THUMBNAIL_DISK_CACHE_BYTES = 50 * 1024 * 1024
+THUMBNAIL_FETCH_TIMEOUT = 10  # seconds before a stalled thumbnail host is given up
+
+# Background thumbnail loading
+THUMBNAIL_WORKERS = 2
+THUMBNAIL_POLL_INTERVAL_MS = 30
+THUMBNAIL_PREFETCH_COUNT = 3  # upcoming playlist entries whose thumbnails are prefetched
 
 # FFmpeg configuration
 def get_ffmpeg_path():
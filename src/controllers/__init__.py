@@ -4,7 +4,22 @@ Controllers package for yt-dlp Convenient GUI.
 This package contains all business logic and application control flow.
 """
 
-from .app_controller import ApplicationController
-from .download_controller import DownloadController
+from .progress_bus import ProgressEventBus
 
-__all__ = ['ApplicationController', 'DownloadController']
+
+def __getattr__(name):
+    """Import the controllers on first use.
+    
+    The GUI controller loads tkinter and the download controller loads yt-dlp,
+    so neither is paid for by code that does not need it.
+    """
+    if name == 'ApplicationController':
+        from .app_controller import ApplicationController
+        return ApplicationController
+    if name == 'DownloadController':
+        from .download_controller import DownloadController
+        return DownloadController
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+__all__ = ['ApplicationController', 'DownloadController', 'ProgressEventBus']
@@ -1,13 +1,22 @@
 """
 Main application controller coordinating view and download operations.
 """
-import datetime
-from typing import Dict, Any, Optional
+import json
+import os
+import threading
+import time
+from typing import TYPE_CHECKING, Dict, Optional
 
 from views import MainApplicationView
-from controllers.download_controller import DownloadController
-from models import VideoInfo, PlaylistInfo, DownloadProgress
-from config import FILE_FORMATS
+from controllers.progress_bus import ProgressEventBus
+from controllers.bandwidth import bandwidth_governor
+from models import DownloadConfig, DownloadJob, VideoInfo, DownloadProgress
+from config import PROGRESS_REFRESH_INTERVAL_MS, THUMBNAIL_PREFETCH_COUNT, STARTUP_PROBE_ENV
+from utils import settings_manager, find_unfinished_jobs, get_partial_bytes, stage_metrics
+
+# yt-dlp is imported in the background once the window is up
+if TYPE_CHECKING:
+    from controllers.download_controller import DownloadController
 
 
 class ApplicationController:
@@ -15,16 +24,59 @@ class ApplicationController:
     
     def __init__(self):
         self.view = MainApplicationView()
-        self.download_controller = DownloadController()
+        self._download_controller: Optional["DownloadController"] = None
+        self._download_controller_lock = threading.Lock()
         self.current_video_info: Optional[Dict] = None
+        self.current_job: Optional[DownloadJob] = None
+        self.progress_bus = ProgressEventBus()
         
         # Connect view callbacks to controller methods
         self.setup_callbacks()
         
-        # Set download progress callback
-        self.download_controller.set_progress_callback(self.on_download_progress)
-        # Set download completion callback
-        self.download_controller.set_completion_callback(self.on_download_complete)
+        # Download threads only queue events, the Tk main loop applies them
+        self.view.root.after(PROGRESS_REFRESH_INTERVAL_MS, self._dispatch_progress_events)
+        
+        # Load yt-dlp and its extractors once the window has been drawn
+        self.view.root.after_idle(self.start_warm_up)
+        
+        # Offer to resume jobs interrupted by a crash or app close, once the window is up
+        self.view.root.after(500, self.check_unfinished_jobs)
+    
+    @property
+    def download_controller(self) -> "DownloadController":
+        """The download controller, created on first use (it imports yt-dlp)."""
+        with self._download_controller_lock:
+            if self._download_controller is None:
+                from controllers.download_controller import DownloadController
+                controller = DownloadController()
+                # Download threads only queue events, the Tk main loop applies them
+                controller.set_progress_callback(self.queue_download_progress)
+                controller.set_completion_callback(self.queue_download_complete)
+                self._download_controller = controller
+            return self._download_controller
+    
+    def start_warm_up(self):
+        """Warm up the downloader in a background thread."""
+        warm_up_thread = threading.Thread(target=self._warm_up, name="warm-up")
+        warm_up_thread.daemon = True
+        warm_up_thread.start()
+    
+    def _warm_up(self):
+        """Import yt-dlp and load its extractor registry (runs in separate thread)."""
+        start_time = time.perf_counter()
+        self.download_controller
+        import yt_dlp
+        yt_dlp.extractor.gen_extractor_classes()
+        elapsed = time.perf_counter() - start_time
+        print(f"Downloader ready after {elapsed:.2f}s of background loading")
+        
+        if os.environ.get(STARTUP_PROBE_ENV):
+            self._report_startup('warm', elapsed)
+            self.view.root.after(0, self.view.root.destroy)
+    
+    def _report_startup(self, stage: str, elapsed: Optional[float] = None):
+        """Print a startup timing line for the startup benchmark."""
+        print(json.dumps({'startup': stage, 'time': time.time(), 'elapsed': elapsed}), flush=True)
     
     def setup_callbacks(self):
         """Connect view callbacks to controller methods."""
@@ -32,6 +84,7 @@ class ApplicationController:
         self.view.on_format_change_callback = self.on_format_change
         self.view.on_playlist_change_callback = self.on_playlist_change
         self.view.on_browse_callback = self.on_browse_directory
+        self.view.stats_provider = stage_metrics.rows
     
     def start_conversion(self):
         """Start the conversion process."""
@@ -46,19 +99,46 @@ class ApplicationController:
             print("Error: Please provide both URL and output directory")
             return
         
+        self.start_job(config)
+    
+    def start_job(self, config: DownloadConfig):
+        """Fetch information and download for a validated configuration."""
+        # Snapshot the configuration once, progress handling never reads the UI again
+        job = DownloadJob.create(config)
+        self.current_job = job
+        bandwidth_governor.apply_settings(settings_manager.get_bandwidth_settings())
+        
         # Show fetching progress with animated progress bar
-        self.view.show_fetching_progress(config.is_playlist)
+        self.view.show_fetching_progress(job.is_playlist)
         
         # Start fetching in a separate thread to avoid blocking UI
-        import threading
-        fetch_thread = threading.Thread(target=self._fetch_and_start_download, args=(config,))
+        fetch_thread = threading.Thread(target=self._fetch_and_start_download, args=(job,))
         fetch_thread.daemon = True
         fetch_thread.start()
     
-    def _fetch_and_start_download(self, config):
+    def check_unfinished_jobs(self):
+        """Offer to resume an interrupted job found in the last download directory."""
+        directory = settings_manager.get_last_download_directory()
+        if not directory or self.current_job is not None:
+            return
+        
+        for journal in find_unfinished_jobs(directory):
+            config = journal.config
+            partial_mb = get_partial_bytes(directory) / (1024 * 1024)
+            description = (
+                f"{config.url}\n{config.file_format.upper()}, "
+                f"{len(journal.completed_items)} items completed, {partial_mb:.1f} MB partially downloaded"
+            )
+            if self.view.ask_resume_download(description):
+                self.start_job(config)
+            else:
+                journal.discard()
+            return
+    
+    def _fetch_and_start_download(self, job: DownloadJob):
         """Fetch video information and start download (runs in separate thread)."""
         # Fetch video information
-        video_info, error_message = self.download_controller.fetch_video_info(config)
+        video_info, error_message = self.download_controller.fetch_video_info(job.config)
         if not video_info:
             if error_message:
                 # Show the yt-dlp error message on main thread
@@ -72,21 +152,21 @@ class ApplicationController:
         self.current_video_info = video_info
         
         # Update UI on main thread
-        self.view.root.after(0, lambda: self._start_download_ui(config, video_info))
+        self.view.root.after(0, lambda: self._start_download_ui(job, video_info))
     
-    def _start_download_ui(self, config, video_info):
+    def _start_download_ui(self, job: DownloadJob, video_info):
         """Update UI and start download (runs on main thread)."""
         # Hide fetching progress
         self.view.hide_fetching_progress()
         
         # Show download progress widgets
-        self.view.show_progress_widgets(config.is_playlist)
+        self.view.show_progress_widgets(job.is_playlist)
         
         # Update initial progress display
-        self.update_initial_progress_display(video_info, config)
+        self.update_initial_progress_display(video_info, job.config)
         
         # Start download
-        self.download_controller.start_download(config)
+        self.download_controller.start_download(job)
     
     def update_initial_progress_display(self, video_info: Dict, config):
         """Update the initial progress display with video information."""
@@ -112,6 +192,10 @@ class ApplicationController:
                 
                 song_name = f"Downloading video {current_index + 1} of {playlist_length} from the playlist \"{playlist_title}\""
                 self.view.update_progress_info(video, song_name, is_playlist=True)
+                
+                # Prefetch the next thumbnails so they show instantly
+                upcoming = video_info['entries'][current_index + 1:current_index + 1 + THUMBNAIL_PREFETCH_COUNT]
+                self.view.prefetch_thumbnails([self.get_thumbnail_url(entry) for entry in upcoming if entry])
             else:
                 # Fallback for invalid playlist data
                 video = VideoInfo()
@@ -125,70 +209,111 @@ class ApplicationController:
     
     def extract_video_info(self, video_data: Dict) -> VideoInfo:
         """Extract VideoInfo object from video data dictionary."""
+        # Flat playlist entries may not have every field until they are resolved
         return VideoInfo(
-            title=video_data.get('title', 'Unknown'),
-            uploader=video_data.get('uploader', 'Unknown').replace(' - Topic', ''),
-            duration=video_data.get('duration', 0),
-            thumbnail=video_data.get('thumbnail', ''),
-            categories=video_data.get('categories', [])
+            title=video_data.get('title') or 'Unknown',
+            uploader=(video_data.get('uploader') or video_data.get('channel') or 'Unknown').replace(' - Topic', ''),
+            duration=video_data.get('duration') or 0,
+            thumbnail=self.get_thumbnail_url(video_data),
+            categories=video_data.get('categories') or []
         )
     
-    def on_download_progress(self, progress_data: Dict, video_info: Dict, progress: DownloadProgress):
+    @staticmethod
+    def get_thumbnail_url(video_data: Dict) -> str:
+        """Thumbnail URL of a video, falling back to the thumbnail list of flat entries."""
+        if video_data.get('thumbnail'):
+            return video_data['thumbnail']
+        thumbnails = video_data.get('thumbnails') or []
+        return thumbnails[-1].get('url', '') if thumbnails else ''
+    
+    def queue_download_progress(self, job: DownloadJob, progress_data: Dict, video_info: Dict, progress: DownloadProgress):
+        """Queue a progress update from a download thread, coalescing ticks per job item."""
+        info_dict = progress_data.get('info_dict') or {}
+        key = (job.job_id, info_dict.get('playlist_autonumber', 0))
+        self.progress_bus.publish(
+            key, self.on_download_progress, job, dict(progress_data), video_info, progress,
+            coalesce=progress_data.get('status') == 'downloading'
+        )
+    
+    def queue_download_complete(self):
+        """Queue the download completion from a download thread."""
+        self.progress_bus.publish('complete', self.on_download_complete, coalesce=False)
+    
+    def _dispatch_progress_events(self):
+        """Apply queued progress events on the Tk main loop at a fixed rate."""
+        self.progress_bus.dispatch()
+        self.view.root.after(PROGRESS_REFRESH_INTERVAL_MS, self._dispatch_progress_events)
+    
+    def on_download_progress(self, job: DownloadJob, progress_data: Dict, video_info: Dict, progress: DownloadProgress):
         """Handle download progress updates."""
-        # Get video index for playlists
+        # Get video index for playlists (items may report out of order when downloaded concurrently)
         if 'info_dict' in progress_data and 'playlist_autonumber' in progress_data['info_dict']:
             video_index = progress_data['info_dict']['playlist_autonumber'] - 1
         else:
             video_index = 0
         
         if progress_data['status'] == 'downloading':
-            self.handle_downloading_status(progress_data, video_info, video_index, progress)
+            self.handle_downloading_status(job, progress_data, video_info, video_index, progress)
         elif progress_data['status'] == 'finished':
-            self.handle_finished_status(progress_data, video_info, video_index, progress)
+            self.handle_finished_status(job, progress_data, video_info, video_index, progress)
+        elif progress_data['status'] == 'retrying':
+            self.handle_retrying_status(job, progress_data, video_index, progress)
+        elif progress_data['status'] == 'resolved':
+            self.handle_resolved_status(job, video_info, video_index, progress)
     
-    def handle_downloading_status(self, progress_data: Dict, video_info: Dict, video_index: int, progress: DownloadProgress):
+    def handle_downloading_status(self, job: DownloadJob, progress_data: Dict, video_info: Dict, video_index: int, progress: DownloadProgress):
         """Handle downloading status updates."""
-        # Update video information if song changed
-        if progress.current_song != progress.previous_song:
-            config = self.view.get_download_config()
-            if config.is_playlist:
+        # The download controller already recorded the bytes of this update
+        percentage, speed, eta = progress.item_transfer(video_index)
+        
+        # Update video information if the displayed item changed
+        if progress.claim_display(video_index):
+            if job.is_playlist:
                 self.update_playlist_display(video_info, video_index)
             else:
                 self.update_single_video_display(video_info)
             
             progress.update_current_song(video_index)
         
-        # Update progress percentage
-        try:
-            progress_str = progress_data.get('_percent_str', '0.0%')
-            progress_str = progress_str.replace("\x1b[0;94m ", "").replace("\x1b[0m", "")
-            percentage = float(progress_str.replace('%', ''))
-            self.view.update_video_progress(percentage)
-        except (ValueError, KeyError):
-            self.view.update_video_progress(0.0)
-    
-    def handle_finished_status(self, progress_data: Dict, video_info: Dict, video_index: int, progress: DownloadProgress):
+        # Only the displayed item drives the video progress bar
+        if video_index == progress.displayed_item:
+            self.view.update_video_progress(percentage or 0.0)
+            self.view.update_transfer_info(speed, eta, progress.total_speed() if job.is_playlist else None)
+        
+        if job.is_playlist:
+            self.view.update_total_progress(progress.total_percentage)
+    
+    def handle_finished_status(self, job: DownloadJob, progress_data: Dict, video_info: Dict, video_index: int, progress: DownloadProgress):
         """Handle finished status updates."""
+        # The download controller already recorded the file, merged formats finish with their last one
+        if job.is_playlist:
+            # Update total progress for playlists
+            self.view.update_total_progress(progress.total_percentage)
+        
+        # Another item is on screen, leave its display untouched
+        if video_index != progress.displayed_item:
+            return
+        
+        if video_index not in progress.finished_items:
+            # More files of this item to download
+            percentage, _, _ = progress.item_transfer(video_index)
+            self.view.update_video_progress(percentage or 0.0)
+            return
+        
         # Update to processing mode
         self.view.update_video_progress(100.0, "processing")
+        self.view.update_transfer_info(None, None)
         
         # Update song name for finished video
-        config = self.view.get_download_config()
-        if config.is_playlist:
+        if job.is_playlist:
             try:
                 if 'entries' in video_info and video_index < len(video_info['entries']):
                     title = video_info['entries'][video_index].get('title', 'Unknown')
                 else:
                     title = 'Unknown'
                 song_name = f"Finished downloading \"{title}\""
-            except (KeyError, IndexError):
+            except (KeyError, IndexError, AttributeError):
                 song_name = "Finished downloading video"
-                
-            # Update total progress for playlists
-            playlist_length = len(video_info.get('entries', []))
-            if playlist_length > 0:
-                total_percentage = ((video_index + 1) / playlist_length) * 100
-                self.view.update_total_progress(total_percentage)
         else:
             title = video_info.get('title', 'Unknown') if video_info else 'Unknown'
             song_name = f"Finished downloading \"{title}\""
@@ -199,6 +324,34 @@ class ApplicationController:
         
         progress.update_current_song(video_index + 1)
     
+    def handle_retrying_status(self, job: DownloadJob, progress_data: Dict, video_index: int, progress: DownloadProgress):
+        """Handle an item being retried after a failure."""
+        if job.is_playlist:
+            self.view.update_total_progress(progress.total_percentage)
+        
+        if video_index != progress.displayed_item:
+            return
+        
+        title = progress_data.get('info_dict', {}).get('title', 'Unknown')
+        self.view.update_video_progress(0.0)
+        if hasattr(self.view, 'song_label'):
+            self.view.song_label.configure(
+                text=f"Retrying \"{title}\" (attempt {progress_data['attempt']} of {progress_data['max_attempts']})"
+            )
+    
+    def handle_resolved_status(self, job: DownloadJob, video_info: Dict, video_index: int, progress: DownloadProgress):
+        """Fill in the title and thumbnail of a playlist entry once it is resolved."""
+        entries = (video_info or {}).get('entries') or []
+        if not job.is_playlist or video_index >= len(entries):
+            return
+        
+        displayed_item = progress.displayed_item if progress.displayed_item is not None else 0
+        if video_index == displayed_item:
+            self.update_playlist_display(video_info, video_index)
+        else:
+            # Entries resolved ahead are shown next, warm their thumbnails
+            self.view.prefetch_thumbnails([self.get_thumbnail_url(entries[video_index])])
+    
     def on_download_complete(self):
         """Handle download completion."""
         # Reset progress
@@ -228,7 +381,16 @@ class ApplicationController:
     
     def run(self):
         """Start the application."""
+        if os.environ.get(STARTUP_PROBE_ENV):
+            # The startup benchmark measures the time until the window is mapped
+            self.view.root.bind('<Map>', self._on_first_map, add='+')
         self.view.run()
+    
+    def _on_first_map(self, event):
+        """Report the first paint of the main window once."""
+        if event.widget is self.view.root:
+            self.view.root.unbind('<Map>')
+            self._report_startup('paint')
 
 
 def main():
@@ -0,0 +1,100 @@
+"""
+Bitrate-aware selection of the audio stream to download.
+"""
+import threading
+from typing import Dict, Iterator, List, Optional
+
+from config import AUDIO_PASSTHROUGH_CODECS, AUDIO_BITRATE_TOLERANCE
+
+
+def is_audio_only(fmt: Dict) -> bool:
+    """Whether a format is an audio stream without video."""
+    return fmt.get('vcodec') == 'none' and fmt.get('acodec') != 'none'
+
+
+def audio_bitrate(fmt: Dict) -> Optional[float]:
+    """Audio bitrate of a format in Kbps, if known."""
+    return fmt.get('abr') or (fmt.get('tbr') if is_audio_only(fmt) else None)
+
+
+def format_size(fmt: Dict) -> Optional[int]:
+    """Exact or approximate size of a format in bytes, if known."""
+    return fmt.get('filesize') or fmt.get('filesize_approx')
+
+
+def is_passthrough_codec(fmt: Dict) -> bool:
+    """Whether a format's audio can be kept without encoding (AAC or Opus)."""
+    return (fmt.get('acodec') or '').lower().split('.')[0] in AUDIO_PASSTHROUGH_CODECS
+
+
+class AudioFormatSelector:
+    """yt-dlp format selector downloading the smallest audio stream that meets a bitrate.
+    
+    Passed as the 'format' option, it replaces 'bestaudio/best': encoding a 160 Kbps
+    stream to a 96 Kbps MP3 throws most of its bytes away. Streams whose bitrate
+    meets the requested one (within the tolerance) are candidates and the lowest of
+    them wins. When none does, the highest available bitrate is taken. In passthrough
+    mode AAC and Opus streams are preferred, since they are kept as downloaded.
+    
+    The selector also sums, over the downloaded items, the size of the chosen
+    streams against the size of the best audio stream yt-dlp would have chosen.
+    """
+    
+    def __init__(self, bitrate: str, passthrough: bool = False, tolerance: float = AUDIO_BITRATE_TOLERANCE):
+        try:
+            self.bitrate = float(bitrate)
+        except (TypeError, ValueError):
+            self.bitrate = 0.0
+        self.passthrough = passthrough
+        self.tolerance = tolerance
+        self._lock = threading.Lock()
+        self._items = 0
+        self._selected_bytes = 0
+        self._best_bytes = 0
+    
+    def __call__(self, ctx: Dict) -> Iterator[Dict]:
+        """Format selection function called by yt-dlp with the formats sorted worst to best."""
+        selected = self.select(ctx['formats'])
+        if selected is not None:
+            yield selected
+    
+    def select(self, formats: List[Dict]) -> Optional[Dict]:
+        """Choose the format to download among formats sorted worst to best."""
+        audio = [fmt for fmt in formats if is_audio_only(fmt)]
+        if self.passthrough:
+            audio = [fmt for fmt in audio if is_passthrough_codec(fmt)] or audio
+        if not audio:
+            # Like the '/best' fallback, the best format that has audio at all
+            with_audio = [fmt for fmt in formats if fmt.get('acodec') != 'none']
+            return with_audio[-1] if with_audio else None
+        
+        rated = [(position, fmt) for position, fmt in enumerate(audio) if audio_bitrate(fmt)]
+        if not rated:
+            return audio[-1]
+        meeting = [(position, fmt) for position, fmt in rated if audio_bitrate(fmt) >= self.bitrate * self.tolerance]
+        if meeting:
+            # Lowest bitrate, then smallest, then the one yt-dlp ranks best
+            return min(meeting, key=lambda item: (
+                audio_bitrate(item[1]), format_size(item[1]) or float('inf'), -item[0]
+            ))[1]
+        return max(rated, key=lambda item: (audio_bitrate(item[1]), item[0]))[1]
+    
+    def record(self, video_infos: Dict):
+        """Count a downloaded item, comparing its stream with the best audio stream of its formats."""
+        best = [fmt for fmt in video_infos.get('formats') or [] if is_audio_only(fmt)]
+        selected_size = format_size(video_infos)
+        best_size = format_size(best[-1]) if best else None
+        with self._lock:
+            self._items += 1
+            if selected_size and best_size:
+                self._selected_bytes += selected_size
+                self._best_bytes += best_size
+    
+    def format_stats(self) -> str:
+        """One-line summary of the bytes downloaded and saved against 'bestaudio'."""
+        with self._lock:
+            saved = self._best_bytes - self._selected_bytes
+            ratio = saved / self._best_bytes if self._best_bytes else 0.0
+            return (f"{self._items} items, {self._selected_bytes / 1048576:.1f} MiB instead of "
+                    f"{self._best_bytes / 1048576:.1f} MiB with the best audio stream "
+                    f"({saved / 1048576:.1f} MiB, {ratio:.0%} saved)")
@@ -0,0 +1,186 @@
+"""
+Process-wide bandwidth governor shared by every download.
+"""
+import datetime
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from config import BANDWIDTH_SETTINGS
+
+
+@dataclass(frozen=True)
+class ScheduleWindow:
+    """Bandwidth limit applied between two times of day (the window may wrap past midnight)."""
+    start: datetime.time
+    end: datetime.time
+    limit: float  # bytes per second, 0 for unlimited
+    
+    def contains(self, moment: datetime.time) -> bool:
+        """Whether a time of day falls in the window."""
+        if self.start <= self.end:
+            return self.start <= moment < self.end
+        return moment >= self.start or moment < self.end
+
+
+def parse_schedule(entries: List[Dict]) -> List[ScheduleWindow]:
+    """
+    Parse schedule entries from the settings file.
+    
+    Args:
+        entries: Dictionaries with "start" and "end" ("HH:MM") and "limit_kbps" (0 for unlimited)
+    
+    Returns:
+        The valid windows, in order (the first matching window wins)
+    """
+    windows = []
+    for entry in entries or []:
+        try:
+            windows.append(ScheduleWindow(
+                start=datetime.time.fromisoformat(entry['start']),
+                end=datetime.time.fromisoformat(entry['end']),
+                limit=float(entry['limit_kbps']) * 1024
+            ))
+        except (KeyError, TypeError, ValueError) as e:
+            print(f"Warning: Ignoring invalid bandwidth schedule entry {entry}: {e}")
+    return windows
+
+
+class BandwidthGovernor:
+    """Token-bucket rate limiter shared by all active downloads.
+    
+    Downloads report their progress through a yt-dlp progress hook, which blocks
+    the downloading thread until the bytes it just received fit the rate. The
+    global rate is split between the jobs currently downloading in proportion to
+    their weights, each job having its own bucket that the job's workers share.
+    Changes to the limit, the schedule or the weights apply to running downloads
+    within a fraction of a second.
+    """
+    
+    def __init__(self, limit: float = 0.0, schedule: Optional[List[ScheduleWindow]] = None,
+                 burst_seconds: float = BANDWIDTH_SETTINGS['burst_seconds'],
+                 active_window: float = BANDWIDTH_SETTINGS['active_window']):
+        self.burst_seconds = burst_seconds
+        self.active_window = active_window
+        self._condition = threading.Condition()
+        self._limit = limit
+        self._schedule = list(schedule or [])
+        self._weights: Dict[int, float] = {}
+        self._last_active: Dict[int, float] = {}
+        # Per job: [tokens, last refill time], tokens go negative while a download waits
+        self._buckets: Dict[int, List[float]] = {}
+        self._positions: Dict[Tuple[int, str], int] = {}
+        self._granted: Dict[int, int] = {}
+    
+    def configure(self, limit: float, schedule: Optional[List[ScheduleWindow]] = None):
+        """Set the global limit (bytes/s, 0 for unlimited) and the time-of-day schedule."""
+        with self._condition:
+            self._limit = max(0.0, limit)
+            self._schedule = list(schedule or [])
+            self._condition.notify_all()
+    
+    def apply_settings(self, settings: Dict):
+        """Configure from the settings file values (see SettingsManager.get_bandwidth_settings)."""
+        self.configure(float(settings.get('limit_kbps') or 0) * 1024, parse_schedule(settings.get('schedule')))
+    
+    def set_limit(self, limit: float):
+        """Change the global limit (bytes/s, 0 for unlimited), running downloads included."""
+        with self._condition:
+            self._limit = max(0.0, limit)
+            self._condition.notify_all()
+    
+    def set_weight(self, job_id: int, weight: float):
+        """Change the share of a job relative to the other active jobs."""
+        with self._condition:
+            if job_id in self._weights:
+                self._weights[job_id] = max(0.01, weight)
+                self._condition.notify_all()
+    
+    def register_job(self, job_id: int, weight: float = 1.0):
+        """Start governing a job's downloads."""
+        with self._condition:
+            self._weights[job_id] = max(0.01, weight)
+            self._granted.setdefault(job_id, 0)
+    
+    def unregister_job(self, job_id: int):
+        """Stop governing a job, its share goes back to the other jobs."""
+        with self._condition:
+            self._weights.pop(job_id, None)
+            self._last_active.pop(job_id, None)
+            self._buckets.pop(job_id, None)
+            for key in [key for key in self._positions if key[0] == job_id]:
+                del self._positions[key]
+            self._condition.notify_all()
+    
+    def current_limit(self, now: Optional[datetime.datetime] = None) -> float:
+        """Global limit in effect (bytes/s, 0 for unlimited): the matching schedule window, else the limit."""
+        moment = (now or datetime.datetime.now()).time()
+        with self._condition:
+            for window in self._schedule:
+                if window.contains(moment):
+                    return window.limit
+            return self._limit
+    
+    def progress_hook(self, job_id: int, d: Dict):
+        """yt-dlp progress hook charging the bytes received since the last call of the same file."""
+        key = (job_id, d.get('tmpfilename') or d.get('filename') or '')
+        if d.get('status') != 'downloading':
+            with self._condition:
+                self._positions.pop(key, None)
+            return
+        
+        downloaded = d.get('downloaded_bytes') or 0
+        with self._condition:
+            # The first block of a file only sets the baseline, so resumed bytes are not charged
+            previous = self._positions.get(key, downloaded)
+            self._positions[key] = downloaded
+        if downloaded > previous:
+            self.acquire(job_id, downloaded - previous)
+    
+    def acquire(self, job_id: int, byte_count: int):
+        """Block until a job may have received byte_count more bytes."""
+        with self._condition:
+            self._granted[job_id] = self._granted.get(job_id, 0) + byte_count
+            bucket = self._buckets.setdefault(job_id, [0.0, time.monotonic()])
+            charged = False
+            while True:
+                now = time.monotonic()
+                self._last_active[job_id] = now
+                rate = self._job_rate(job_id, now)
+                if rate <= 0:
+                    # Unlimited, forget any debt so a new limit starts fresh
+                    bucket[0], bucket[1] = 0.0, now
+                    return
+                
+                bucket[0] = min(rate * self.burst_seconds, bucket[0] + (now - bucket[1]) * rate)
+                bucket[1] = now
+                if not charged:
+                    bucket[0] -= byte_count
+                    charged = True
+                if bucket[0] >= 0:
+                    return
+                # Wake up regularly so new limits, schedules and shares are picked up
+                self._condition.wait(min(-bucket[0] / rate, BANDWIDTH_SETTINGS['wait_slice']))
+    
+    def _job_rate(self, job_id: int, now: float) -> float:
+        """Share of the global limit for a job, by weight among the recently active jobs (lock must be held)."""
+        limit = self.current_limit()
+        if limit <= 0:
+            return 0.0
+        weight = self._weights.get(job_id, 1.0)
+        active_weight = weight + sum(
+            self._weights.get(other, 1.0) for other, last_active in self._last_active.items()
+            if other != job_id and now - last_active <= self.active_window
+        )
+        return limit * weight / active_weight
+    
+    def stats(self) -> Dict:
+        """Current limit and the bytes granted to each job so far."""
+        with self._condition:
+            granted = dict(self._granted)
+        return {'limit': self.current_limit(), 'granted_bytes': granted}
+
+
+# Global bandwidth governor instance
+bandwidth_governor = BandwidthGovernor()
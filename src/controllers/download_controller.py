@@ -4,79 +4,92 @@ Download controller handling yt-dlp operations and metadata processing.
 import os
 import re
 import io
+import functools
 import threading
+import time
 import warnings
 from typing import Optional, Dict, Any, Callable
 import yt_dlp
 from config import (ICON_PATH)
 
-# Suppress plyer dbus warnings
-warnings.filterwarnings("ignore", message="The Python dbus package is not installed")
+from models import DownloadConfig, DownloadJob, VideoInfo, PlaylistInfo, DownloadProgress
+from utils import (
+    crop_album_cover, thumbnail_cache, find_written_thumbnail, TrackTags, write_tags,
+    DownloadArchive, get_download_archive, archive_id_from_info, ResumeJournal, metadata_cache,
+    stage_metrics, extractor_of
+)
+from config import (
+    get_ffmpeg_path, FILE_FORMATS, MAX_CONCURRENT_DOWNLOADS, PIPELINE_SETTINGS, FORMAT_SELECTION_SETTINGS
+)
+from controllers.retry import RetryPolicy, RetryBudget
+from controllers.pipeline import Pipeline, PipelineStage
+from controllers.audio_formats import AudioFormatSelector
+from controllers.video_formats import VideoFormatSelector
+from controllers.transcoding import plan_transcoding, plan_postprocessing, PostprocessPlan, PostprocessLog
+from controllers.bandwidth import bandwidth_governor
+from controllers.fragments import FragmentTuner
+from controllers.playlist_resolver import LazyPlaylistResolver, get_playlist_fields, is_flat_entry
 
-try:
-    from plyer import notification
-    NOTIFICATIONS_AVAILABLE = True
-except ImportError:
-    NOTIFICATIONS_AVAILABLE = False
-    
-from mutagen.id3 import ID3, APIC
-from mutagen.mp3 import MP3
-from mutagen.easyid3 import EasyID3
 
-from models import DownloadConfig, VideoInfo, PlaylistInfo, DownloadProgress
-from utils import crop_album_cover
-from config import get_ffmpeg_path, FILE_FORMATS
+def load_notification_facade():
+    """Import plyer's notification facade on first use, or return None if it is not installed."""
+    # Suppress plyer dbus warnings
+    warnings.filterwarnings("ignore", message="The Python dbus package is not installed")
+    
+    try:
+        from plyer import notification
+        return notification
+    except ImportError:
+        return None
 
 
 class CustomPostProcessor(yt_dlp.postprocessor.PostProcessor):
     """Custom post-processor for handling metadata and file organization."""
     
-    def __init__(self, download_config: DownloadConfig):
+    def __init__(self, download_config: DownloadConfig, job_id: Optional[int] = None):
         super().__init__()
         self.config = download_config
+        self.job_id = job_id
     
     def run(self, video_infos):
-        """Process downloaded file: add metadata, rename, and set album cover."""
-        file_format = self.config.file_format
-        file_path = f"{self.config.output_directory}/{video_infos['title']}.{file_format}"
-
+        """Process downloaded file: add metadata and album cover in one write, then rename."""
+        file_path = video_infos.get('filepath') or f"{self.config.output_directory}/{video_infos['title']}.{self.config.file_format}"
+        # Passthrough audio keeps the container it was downloaded in (m4a or opus)
+        file_format = os.path.splitext(file_path)[1][1:].lower() or self.config.file_format
+        
         # Check if the file actually exists
         if not os.path.exists(file_path):
             print(f"Warning: File {file_path} not found. Conversion may have failed.")
             return [], video_infos
-
+        
         # Add metadata to the file
         try:
             artist_name = video_infos.get('artists', [video_infos.get('uploader', '').replace(" - Topic", "")])[0]
         except (KeyError, IndexError):
             artist_name = video_infos.get('uploader', '').replace(" - Topic", "")
         
-        if file_format == "mp3":
-            self._add_mp3_metadata(file_path, video_infos, artist_name)
+        extractor = extractor_of(video_infos)
+        with stage_metrics.measure('cover', self.job_id, extractor):
+            cover = self._get_cover_data(video_infos, square=self.config.file_format == "mp3")
+        
+        # Build every tag in memory and write the file once
+        tags = TrackTags(
+            artist=artist_name,
+            album=video_infos.get('album') or '',
+            title=video_infos.get('title', ''),
+            cover=cover,
+            archive_id=archive_id_from_info(video_infos) or ''
+        )
+        with stage_metrics.measure('tagging', self.job_id, extractor):
+            write_tags(file_path, file_format, tags)
         
         # Rename and sanitize the file name
-        new_file_path = self._sanitize_and_rename_file(file_path, video_infos, artist_name, file_format)
+        with stage_metrics.measure('rename', self.job_id, extractor):
+            new_file_path = self._sanitize_and_rename_file(file_path, video_infos, artist_name, file_format)
+        video_infos['filepath'] = new_file_path
         
-        # Add album cover for MP3 files
-        if file_format == "mp3" and os.path.exists(new_file_path):
-            self._add_album_cover(new_file_path, video_infos)
-
         return [], video_infos
     
-    def _add_mp3_metadata(self, file_path: str, video_infos: Dict, artist_name: str):
-        """Add metadata to MP3 file."""
-        try:
-            metadatas = MP3(file_path, ID3=EasyID3)
-            metadatas['artist'] = artist_name
-            
-            album_name = video_infos.get('album')
-            if album_name:
-                metadatas['album'] = album_name
-            
-            metadatas.save()
-        except Exception as e:
-            print(f"Warning: Could not add metadata to MP3 file: {e}")
-    
     def _sanitize_and_rename_file(self, file_path: str, video_infos: Dict, artist_name: str, file_format: str) -> str:
         """Sanitize filename and rename the file."""
         title = video_infos.get('title', '')
@@ -92,26 +105,45 @@ class CustomPostProcessor(yt_dlp.postprocessor.PostProcessor):
             print(f"Warning: Could not rename file: {e}")
             return file_path
     
-    def _add_album_cover(self, file_path: str, video_infos: Dict):
-        """Add album cover to MP3 file."""
+    def _get_cover_data(self, video_infos: Dict, square: bool = True) -> Optional[bytes]:
+        """Get the cover image as JPEG bytes (square album cover for audio)."""
         thumbnail_url = video_infos.get('thumbnail', '')
-        if not thumbnail_url:
-            return
+        local_path = find_written_thumbnail(video_infos)
+        if not thumbnail_url and not local_path:
+            return None
         
-        try:
-            album_cover_data = crop_album_cover(thumbnail_url)
-            if album_cover_data:
-                audio = ID3(file_path)
-                audio['APIC'] = APIC(
-                    encoding=0,
-                    mime='image/jpeg',
-                    type=3,
-                    desc=u'Cover',
-                    data=album_cover_data
-                )
-                audio.save()
-        except Exception as e:
-            print(f"Warning: Could not add album cover to MP3: {e}")
+        return crop_album_cover(thumbnail_url, local_path, square=square)
+
+
+class StageHandoffPostProcessor(yt_dlp.postprocessor.PostProcessor):
+    """Captures the info of a downloaded file so it can be post-processed in the next pipeline stage."""
+    
+    def __init__(self):
+        super().__init__()
+        self.downloaded: Optional[Dict] = None
+    
+    def run(self, video_infos):
+        """Keep a copy of the info, the file itself is left untouched."""
+        downloaded = dict(video_infos)
+        # Format fixups already ran during the download
+        downloaded.pop('__postprocessors', None)
+        self.downloaded = downloaded
+        return [], video_infos
+
+
+class ExpectedFilesPostProcessor(yt_dlp.postprocessor.PostProcessor):
+    """Tells the progress how many files an item downloads, run once its formats are chosen."""
+    
+    def __init__(self, progress: DownloadProgress):
+        super().__init__()
+        self.progress = progress
+    
+    def run(self, video_infos):
+        """Merged video+audio formats are downloaded as one file each."""
+        self.progress.expect_files(
+            video_infos.get('playlist_autonumber', 1) - 1, len(video_infos.get('requested_formats') or ()) or 1
+        )
+        return [], video_infos
 
 
 class DownloadController:
@@ -123,7 +155,14 @@ class DownloadController:
         self.progress_callback: Optional[Callable] = None
         self.completion_callback: Optional[Callable] = None
         self.video_infos: Optional[Dict] = None
-        
+        self.extraction_time: Optional[float] = None
+        self.fetch_seconds: Optional[float] = None
+        self.info_from_cache = False  # video_infos came from the metadata cache, its stream URLs may have expired
+        self.retry_policy = RetryPolicy()
+        self.fragment_tuner = FragmentTuner()
+        self.pipeline: Optional[Pipeline] = None
+        self.notifications_enabled = True
+    
     def set_progress_callback(self, callback: Callable):
         """Set the callback function for progress updates."""
         self.progress_callback = callback
@@ -133,7 +172,48 @@ class DownloadController:
         self.completion_callback = callback
     
     def fetch_video_info(self, config: DownloadConfig) -> tuple[Optional[Dict], Optional[str]]:
-        """Fetch video information without downloading. Returns (info, error_message)."""
+        """Fetch video information without downloading. Returns (info, error_message).
+        
+        Results are served from the metadata cache when possible, and refreshed
+        in the background once they get old.
+        """
+        start_time = time.perf_counter()
+        cache_key = metadata_cache.make_key(
+            config.url, config.is_playlist, config.playlist_start, config.playlist_end,
+            flat=self._is_flat_listing(config)
+        )
+        cached = metadata_cache.get(cache_key)
+        if cached is not None:
+            video_infos, extraction_time, needs_refresh = cached
+            video_infos['original_url'] = config.url
+            print(f"Using cached information for {config.url} (saved ~{extraction_time:.2f}s of extraction)")
+            if needs_refresh:
+                refresh_thread = threading.Thread(target=self._refresh_video_info, args=(config, cache_key))
+                refresh_thread.daemon = True
+                refresh_thread.start()
+            self.video_infos = video_infos
+            self.info_from_cache = True
+            self.extraction_time = extraction_time
+            self.fetch_seconds = time.perf_counter() - start_time
+            return video_infos, None
+        
+        video_infos, error_message, extraction_time = self._extract_video_info(config)
+        self.video_infos = video_infos
+        self.info_from_cache = False
+        self.extraction_time = extraction_time
+        self.fetch_seconds = time.perf_counter() - start_time
+        if video_infos:
+            metadata_cache.put(cache_key, yt_dlp.YoutubeDL.sanitize_info(video_infos), extraction_time)
+        return video_infos, error_message
+    
+    def _refresh_video_info(self, config: DownloadConfig, cache_key: str):
+        """Refresh a cache entry in the background."""
+        video_infos, _, extraction_time = self._extract_video_info(config)
+        if video_infos:
+            metadata_cache.put(cache_key, yt_dlp.YoutubeDL.sanitize_info(video_infos), extraction_time)
+    
+    def _extract_video_info(self, config: DownloadConfig) -> tuple[Optional[Dict], Optional[str], Optional[float]]:
+        """Run a full extraction. Returns (info, error_message, extraction_time)."""
         ydl_opts = {
             'verbose': config.verbose,
             'quiet': True,
@@ -146,102 +226,411 @@ class DownloadController:
             'playliststart': config.playlist_start,
             'playlistend': config.playlist_end
         }
+        if self._is_flat_listing(config):
+            # Only list the entries, they are resolved while the playlist downloads
+            ydl_opts['extract_flat'] = 'in_playlist'
         
         try:
-            self.video_infos = yt_dlp.YoutubeDL(ydl_opts).extract_info(config.url, download=False)
+            start_time = time.perf_counter()
+            video_infos = yt_dlp.YoutubeDL(ydl_opts).extract_info(config.url, download=False)
+            extraction_time = time.perf_counter() - start_time
+            if video_infos and self._is_flat_listing(config):
+                self._number_flat_entries(video_infos, config)
             
             # Check if video_infos is None or empty (which happens with ignoreerrors=True for DRM sites)
-            if not self.video_infos:
+            if not video_infos:
                 # Check if this is a known DRM-protected site
                 if ("spotify.com" in config.url.lower() or 
                     "netflix.com" in config.url.lower() or
                     "disney" in config.url.lower() or
                     "hulu.com" in config.url.lower() or
                     "amazon" in config.url.lower()):
-                    return None, "This content is protected by DRM and cannot be downloaded.\n\nDRM (Digital Rights Management) prevents downloading from services like Spotify, Netflix, etc."
+                    return None, "This content is protected by DRM and cannot be downloaded.\n\nDRM (Digital Rights Management) prevents downloading from services like Spotify, Netflix, etc.", None
                 else:
-                    return None, "Could not retrieve video information. Please check the URL."
+                    return None, "Could not retrieve video information. Please check the URL.", None
             
-            return self.video_infos, None
+            return video_infos, None, extraction_time
         except yt_dlp.utils.ExtractorError as error:
             error_message = str(error)
             
             # Handle ExtractorError specifically (includes DRM errors)
             if ("DRM protection" in error_message or "DRM protected" in error_message or 
                 "use DRM protection" in error_message or "known to use DRM" in error_message):
-                return None, "This content is protected by DRM and cannot be downloaded.\n\nDRM (Digital Rights Management) prevents downloading from services like Spotify, Netflix, etc."
+                return None, "This content is protected by DRM and cannot be downloaded.\n\nDRM (Digital Rights Management) prevents downloading from services like Spotify, Netflix, etc.", None
             else:
                 clean_error = error_message.replace("ERROR: ", "").strip()
-                return None, f"Download failed: {clean_error}"
+                return None, f"Download failed: {clean_error}", None
         except yt_dlp.utils.DownloadError as error:
             error_message = str(error)
             
             # Try to extract meaningful error messages
             if ("DRM protection" in error_message or "DRM protected" in error_message or 
                 "use DRM protection" in error_message or "known to use DRM" in error_message):
-                return None, "This content is protected by DRM and cannot be downloaded.\n\nDRM (Digital Rights Management) prevents downloading from services like Spotify, Netflix, etc."
+                return None, "This content is protected by DRM and cannot be downloaded.\n\nDRM (Digital Rights Management) prevents downloading from services like Spotify, Netflix, etc.", None
             elif "Video unavailable" in error_message:
-                return None, "This video is unavailable or has been removed."
+                return None, "This video is unavailable or has been removed.", None
             elif "Private video" in error_message:
-                return None, "This video is private and cannot be downloaded."
+                return None, "This video is private and cannot be downloaded.", None
             elif "This video is only available for Music Premium members" in error_message:
-                return None, "This video requires YouTube Music Premium."
+                return None, "This video requires YouTube Music Premium.", None
             elif "Video not found" in error_message or "does not exist" in error_message:
-                return None, "Video not found. Please check the URL."
+                return None, "Video not found. Please check the URL.", None
             elif "Unsupported URL" in error_message:
-                return None, "Unsupported URL format. Please check the URL."
+                return None, "Unsupported URL format. Please check the URL.", None
             elif "Sign in to confirm your age" in error_message:
-                return None, "This video requires age verification and cannot be downloaded."
+                return None, "This video requires age verification and cannot be downloaded.", None
             elif "This video is not available" in error_message:
-                return None, "This video is not available in your region or has been removed."
+                return None, "This video is not available in your region or has been removed.", None
             else:
                 # For other errors, show the actual yt-dlp error message
                 clean_error = error_message.replace("ERROR: ", "").strip()
-                return None, f"Download failed: {clean_error}"
+                return None, f"Download failed: {clean_error}", None
         except Exception as e:
-            return None, f"Unexpected error: {str(e)}"
+            return None, f"Unexpected error: {str(e)}", None
+    
+    @staticmethod
+    def _is_flat_listing(config: DownloadConfig) -> bool:
+        """Whether the playlist is listed flat and resolved incrementally."""
+        return config.is_playlist and config.incremental_playlist
     
-    def start_download(self, config: DownloadConfig):
-        """Start the download process in a separate thread."""
-        thread = threading.Thread(target=self._download_process, args=(config,))
+    @staticmethod
+    def _number_flat_entries(video_infos: Dict, config: DownloadConfig):
+        """Give flat entries the playlist fields yt-dlp only sets on resolved entries."""
+        entries = video_infos.get('entries') or []
+        for autonumber, entry in enumerate(entries, start=1):
+            if not entry:
+                continue
+            entry.setdefault('playlist_autonumber', autonumber)
+            entry.setdefault('playlist_index', config.playlist_start + autonumber - 1)
+            entry.setdefault('playlist', video_infos.get('title'))
+            entry.setdefault('playlist_title', video_infos.get('title'))
+            entry.setdefault('playlist_id', video_infos.get('id'))
+            entry.setdefault('n_entries', len(entries))
+    
+    def start_download(self, job: DownloadJob):
+        """Start the download process for a job in a separate thread."""
+        thread = threading.Thread(target=self._download_process, args=(job,))
         thread.daemon = True
         thread.start()
     
-    def _download_process(self, config: DownloadConfig):
+    def download(self, job: DownloadJob):
+        """Run the download process for a job on the calling thread."""
+        self._download_process(job)
+    
+    def _download_process(self, job: DownloadJob):
         """Main download process."""
+        config = job.config
+        budget = RetryBudget(self.retry_policy)
+        # An interrupted run of the same job leaves a journal, its finished items are skipped
+        journal = ResumeJournal.open(config) if config.resumable else None
+        bandwidth_governor.register_job(job.job_id, config.bandwidth_weight)
+        if self.video_infos and self.video_infos.get('original_url') == config.url and self.fetch_seconds is not None:
+            # Time actually spent fetching the info of this job (cache hits included)
+            stage_metrics.record('extraction', job.job_id, extractor_of(self.video_infos), self.fetch_seconds)
         try:
-            ydl_opts = self._build_ydl_options(config)
+            ydl_opts = self._build_ydl_options(job)
+            archive = ydl_opts.get('download_archive')
             
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                ydl.add_post_processor(CustomPostProcessor(config), when='post_process')
-                ydl.download([config.url])
+            items = self._get_download_items(config, archive, journal)
+            if items is None:
+                # Nothing resolved for this URL, let yt-dlp extract it
+                self.progress.set_total_items(1)
+                self._download_url(config.url, ydl_opts, job)
+            elif items:
+                self.progress.set_total_items(len(items))
+                self._download_items(items, ydl_opts, job, budget, journal)
             
-            self._send_completion_notification(config)
-            
-            # Call completion callback to reset UI
-            if self.completion_callback:
-                self.completion_callback()
+            # Failed items keep the journal so the job can be resumed later
+            if journal and not self.progress.failed_items:
+                journal.discard()
             
+            self._send_completion_notification(config)
+            print(f"Thumbnail cache: {thumbnail_cache.format_stats()}")
+        
         except yt_dlp.utils.DownloadError as error:
             print(f"Download error: {error}")
-            self._retry_download(config)
+            self._retry_download(job, budget, str(error))
+        finally:
+            bandwidth_governor.unregister_job(job.job_id)
+            print(f"Stage timings: {stage_metrics.format_job(job.job_id)}")
+            stage_metrics.export()
+            # Call completion callback to reset UI, whatever happened
+            if self.completion_callback:
+                self.completion_callback()
+    
+    def _get_download_items(self, config: DownloadConfig, archive: Optional[DownloadArchive] = None,
+                            journal: Optional[ResumeJournal] = None) -> Optional[list]:
+        """Return the resolved items still to download (not in the archive or done by an earlier run).
+        
+        Returns the playlist entries, or the video itself for single downloads,
+        or None if no resolved info is available for this URL.
+        """
+        if not self.video_infos or self.video_infos.get('original_url') != config.url:
+            return None
+        if config.is_playlist and 'entries' in self.video_infos:
+            items = [entry for entry in self.video_infos.get('entries') or [] if entry]
+        else:
+            items = [self.video_infos]
+        pending = [
+            item for item in items
+            if not (archive is not None and archive.contains_info(item))
+            and not (journal is not None and journal.is_done(archive_id_from_info(item)))
+        ]
+        if len(pending) < len(items):
+            print(f"Skipping {len(items) - len(pending)} items already downloaded")
+        return pending
+    
+    def _get_worker_count(self, config: DownloadConfig, entry_count: int) -> int:
+        """Number of playlist workers, bounded by the item count and the hard cap."""
+        return max(1, min(config.concurrent_downloads, MAX_CONCURRENT_DOWNLOADS, entry_count))
+    
+    def _download_items(self, items: list, ydl_opts: Dict[str, Any], job: DownloadJob, budget: RetryBudget,
+                        journal: Optional[ResumeJournal] = None):
+        """Download resolved items through the download, transcode and tag pipeline."""
+        worker_count = self._get_worker_count(job.config, len(items))
+        if len(items) > 1:
+            print(f"Downloading {len(items)} playlist items with {worker_count} workers")
+        
+        # Flat entries are resolved just ahead of the workers instead of all upfront
+        resolver = None
+        if any(is_flat_entry(item) for item in items):
+            resolver = LazyPlaylistResolver(ydl_opts, items, functools.partial(self._on_entry_resolved, job))
+        
+        # Downloads only fetch the files, FFmpeg and tagging run in their own stages
+        # Items are archived by the tag stage, once every stage succeeded, not by yt-dlp after the download
+        archive = ydl_opts.get('download_archive')
+        download_opts = dict(ydl_opts, postprocessors=[], download_archive=None)
+        plan = plan_transcoding(job.config.file_format, job.config.max_transcode_workers)
+        transcode_opts = dict(
+            ydl_opts, ignoreerrors=False, progress_hooks=[], postprocessor_args=plan.postprocessor_args,
+            download_archive=None
+        )
+        if ydl_opts.get('postprocessors'):
+            print(f"Transcoding with {plan.workers} FFmpeg workers, {plan.ffmpeg_threads} threads each")
+        # MP4 files are only re-encoded when their streams cannot be copied
+        postprocess_log = PostprocessLog() if job.config.file_format == "mp4" and ydl_opts.get('postprocessors') else None
+        self.pipeline = Pipeline([
+            PipelineStage(
+                "download",
+                functools.partial(self._download_entry, ydl_opts=download_opts, job=job, budget=budget, resolver=resolver),
+                workers=worker_count, on_error=functools.partial(self._on_stage_error, "download", archive)
+            ),
+            PipelineStage(
+                "transcode", functools.partial(self._transcode_item, job, transcode_opts, archive, postprocess_log),
+                workers=plan.workers, capacity=max(plan.workers, PIPELINE_SETTINGS['queue_size']),
+                on_error=functools.partial(self._on_stage_error, "transcode", archive)
+            ),
+            PipelineStage(
+                "tag", functools.partial(self._tag_item, job, journal, archive),
+                workers=PIPELINE_SETTINGS['tag_workers'], capacity=PIPELINE_SETTINGS['queue_size'],
+                on_error=functools.partial(self._on_stage_error, "tag", archive)
+            )
+        ])
+        
+        start_time = time.perf_counter()
+        try:
+            self.pipeline.run(items)
+        finally:
+            if resolver:
+                resolver.shutdown()
+        print(f"Pipeline: {self.pipeline.format_stats()}")
+        if postprocess_log:
+            print(f"Post-processing: {postprocess_log.format_stats()}")
+        if isinstance(ydl_opts.get('format'), AudioFormatSelector):
+            print(f"Audio formats: {ydl_opts['format'].format_stats()}")
+        
+        # The resolved info was reused, no second extraction pass was needed
+        if self.extraction_time is not None and resolver is None:
+            elapsed = time.perf_counter() - start_time
+            print(f"Single-pass extraction: download took {elapsed:.2f}s, skipped a second extraction pass "
+                  f"(the measured extraction took {self.extraction_time:.2f}s)")
+        
+        failed = self.progress.failed_items
+        if failed:
+            print(f"{len(failed)} items failed after retries: " +
+                  "; ".join(f"#{index + 1}: {reason}" for index, reason in sorted(failed.items())))
+    
+    def get_pipeline_stats(self) -> list:
+        """Queue depth and utilisation of each stage of the current (or last) pipeline."""
+        return self.pipeline.stats() if self.pipeline else []
+    
+    def _on_entry_resolved(self, job: DownloadJob, resolved: Dict):
+        """Replace a flat playlist entry by its resolved info and let the display fill it in."""
+        entries = (self.video_infos or {}).get('entries')
+        position = resolved.get('playlist_autonumber', 0) - 1
+        if entries and 0 <= position < len(entries):
+            entries[position] = resolved
+        self._progress_hook(job, {'status': 'resolved', 'info_dict': resolved})
+    
+    def _download_entry(self, entry: Dict, ydl_opts: Dict[str, Any], job: DownloadJob, budget: RetryBudget,
+                        resolver: Optional[LazyPlaylistResolver] = None) -> Optional[Dict]:
+        """Download a single item, retrying only this item on failure (download stage).
+        
+        Returns the info of the downloaded file, or None if the item failed or was skipped.
+        """
+        item_index = entry.get('playlist_autonumber', 1) - 1
+        # Cached stream URLs may have expired, such an item is resolved again once before retries are counted
+        cached = self.info_from_cache and not is_flat_entry(entry)
+        if resolver:
+            # Flat entries are resolved here at the latest, usually ahead of time
+            with stage_metrics.measure('resolve', job.job_id, extractor_of(entry)):
+                entry = resolver.get(entry)
+        # DASH/HLS fragments are fetched in parallel, as many as paid off for this extractor so far
+        extractor = extractor_of(entry)
+        concurrency = self.fragment_tuner.concurrency(extractor)
+        # Errors are raised so this item can be retried on its own
+        item_opts = dict(
+            ydl_opts, ignoreerrors=False, concurrent_fragment_downloads=concurrency,
+            progress_hooks=ydl_opts['progress_hooks'] + [
+                functools.partial(self.fragment_tuner.progress_hook, extractor, concurrency)
+            ]
+        )
+        attempt = 0
+        resolve = False
+        
+        while True:
+            try:
+                handoff = StageHandoffPostProcessor()
+                # YoutubeDL instances are not thread-safe, each item gets its own
+                with stage_metrics.measure('network', job.job_id, extractor), yt_dlp.YoutubeDL(item_opts) as ydl:
+                    ydl.add_post_processor(ExpectedFilesPostProcessor(self.progress), when='before_dl')
+                    ydl.add_post_processor(handoff, when='after_move')
+                    if not resolve:
+                        ydl.process_ie_result(entry, download=True, extra_info=get_playlist_fields(entry))
+                    else:
+                        # Stream URLs may have expired, resolve the item again
+                        ydl.extract_info(
+                            entry.get('webpage_url') or entry.get('url'), download=True,
+                            extra_info=get_playlist_fields(entry)
+                        )
+                if handoff.downloaded and isinstance(item_opts.get('format'), AudioFormatSelector):
+                    item_opts['format'].record(handoff.downloaded)
+                return handoff.downloaded
+            except (yt_dlp.utils.DownloadError, yt_dlp.utils.ExtractorError, yt_dlp.utils.ReExtractInfo) as error:
+                reason = str(error).replace("ERROR: ", "").strip()
+                resolve = True
+                if cached:
+                    cached = False
+                    print(f"Resolving \"{entry.get('title', 'Unknown')}\" again, "
+                          f"its cached information may be out of date: {reason}")
+                    continue
+                attempt += 1
+                if not self.retry_policy.is_retryable(reason) or not budget.try_acquire(attempt):
+                    self.progress.fail_item(item_index, reason)
+                    print(f"Giving up on \"{entry.get('title', 'Unknown')}\": {reason}")
+                    return None
+                
+                delay = self.retry_policy.backoff_delay(attempt)
+                self.progress.record_retry(item_index, reason)
+                print(f"Retrying \"{entry.get('title', 'Unknown')}\" in {delay:.1f}s "
+                      f"(attempt {attempt} of {self.retry_policy.max_item_retries}): {reason}")
+                self._progress_hook(job, {
+                    'status': 'retrying',
+                    'info_dict': entry,
+                    'attempt': attempt,
+                    'max_attempts': self.retry_policy.max_item_retries,
+                    'reason': reason
+                })
+                time.sleep(delay)
     
-    def _build_ydl_options(self, config: DownloadConfig) -> Dict[str, Any]:
-        """Build yt-dlp options based on configuration."""
+    def _transcode_item(self, job: DownloadJob, ydl_opts: Dict[str, Any], archive: Optional[DownloadArchive],
+                        postprocess_log: Optional[PostprocessLog], video_infos: Dict) -> Optional[Dict]:
+        """Run the FFmpeg post-processors on a downloaded file (transcode stage)."""
+        plan = None
+        if postprocess_log is not None:
+            # Remux-first: the streams are copied whenever MP4 can hold them
+            plan = plan_postprocessing(video_infos)
+            ydl_opts = dict(ydl_opts, postprocessors=plan.postprocessors)
+        try:
+            start_time = time.perf_counter()
+            try:
+                video_infos = self._post_process(job, ydl_opts, video_infos)
+            except yt_dlp.utils.PostProcessingError as error:
+                if plan is None or plan.action != 'remux':
+                    raise
+                print(f"Warning: Remuxing failed, transcoding instead: {str(error).replace('ERROR: ', '').strip()}")
+                plan = PostprocessPlan('transcode', "remux failed")
+                video_infos = self._post_process(job, dict(ydl_opts, postprocessors=plan.postprocessors), video_infos)
+            if plan is not None:
+                seconds = time.perf_counter() - start_time
+                saved = postprocess_log.record(plan, video_infos.get('duration'), seconds)
+                action = {'keep': "Kept", 'remux': "Remuxed", 'transcode': "Transcoded"}[plan.action]
+                message = f"{action} \"{video_infos.get('title', 'Unknown')}\" ({plan.reason}) in {seconds:.2f}s"
+                if plan.action == 'remux':
+                    message += f", ~{saved:.0f}s saved by not re-encoding"
+                print(message)
+            return video_infos
+        except (yt_dlp.utils.PostProcessingError, yt_dlp.utils.DownloadError) as error:
+            reason = f"Postprocessing: {str(error).replace('ERROR: ', '').strip()}"
+            self.progress.fail_item(video_infos.get('playlist_autonumber', 1) - 1, reason)
+            print(f"Giving up on \"{video_infos.get('title', 'Unknown')}\": {reason}")
+            # Never archived by an earlier run either, so it is downloaded again
+            if archive is not None:
+                archive.discard(archive_id_from_info(video_infos))
+            return None
+    
+    def _post_process(self, job: DownloadJob, ydl_opts: Dict[str, Any], video_infos: Dict) -> Dict:
+        """Run the postprocessors of the options on a downloaded file."""
+        with stage_metrics.measure('ffmpeg', job.job_id, extractor_of(video_infos)), yt_dlp.YoutubeDL(ydl_opts) as ydl:
+            return ydl.post_process(video_infos['filepath'], video_infos)
+    
+    def _tag_item(self, job: DownloadJob, journal: Optional[ResumeJournal], archive: Optional[DownloadArchive],
+                  video_infos: Dict) -> Dict:
+        """Tag and rename a converted file, then record the item as done (tag stage)."""
+        _, video_infos = CustomPostProcessor(job.config, job.job_id).run(video_infos)
+        archive_id = archive_id_from_info(video_infos)
+        if archive is not None and archive_id:
+            archive.add(archive_id)
+        if journal:
+            journal.mark_item_done(archive_id)
+        return video_infos
+    
+    def _on_stage_error(self, stage: str, archive: Optional[DownloadArchive], video_infos: Dict, error: Exception):
+        """Fail an item whose stage raised, so it is neither archived nor journaled as done."""
+        reason = f"{stage.capitalize()} failed: {error}"
+        self.progress.fail_item(video_infos.get('playlist_autonumber', 1) - 1, reason)
+        print(f"Giving up on \"{video_infos.get('title', 'Unknown')}\": {reason}")
+        if archive is not None:
+            archive.discard(archive_id_from_info(video_infos))
+    
+    def _download_url(self, url: str, ydl_opts: Dict[str, Any], job: DownloadJob):
+        """Download a URL with a full yt-dlp extraction."""
+        # yt-dlp extracts, downloads and converts in one call here, all of it counts as network time
+        with stage_metrics.measure('network', job.job_id, 'unknown'), yt_dlp.YoutubeDL(ydl_opts) as ydl:
+            ydl.add_post_processor(ExpectedFilesPostProcessor(self.progress), when='before_dl')
+            ydl.add_post_processor(CustomPostProcessor(job.config, job.job_id), when='post_process')
+            ydl.download([url])
+    
+    def _build_ydl_options(self, job: DownloadJob) -> Dict[str, Any]:
+        """Build yt-dlp options based on the job configuration."""
+        config = job.config
         base_opts = {
             'verbose': config.verbose,
-            'no-part': True,
+            # Partial files are kept (and resumed) unless resumable downloads are disabled
+            'nopart': not config.resumable,
+            'continuedl': config.resumable,
             'ignoreerrors': True,
             'quiet': True,
             'extractor_args': {'youtubetab': {'skip': ['authcheck']}},
             'external_downloader_args': ['-loglevel', 'panic'],
             'outtmpl': config.output_template,
+            'concurrent_fragment_downloads': self.fragment_tuner.concurrency('unknown'),
             'noplaylist': not config.is_playlist,
-            'progress_hooks': [self._progress_hook],
+            # The bandwidth governor blocks the downloading thread until the received bytes fit the limit
+            'progress_hooks': [
+                functools.partial(self._progress_hook, job),
+                functools.partial(bandwidth_governor.progress_hook, job.job_id)
+            ],
             'playliststart': config.playlist_start,
             'playlistend': config.playlist_end
         }
         
+        # Items recorded in the archive are skipped before download and post-processing
+        # (yt-dlp itself only records them for whole-URL downloads, after its post-processing)
+        archive = get_download_archive(config.output_directory, config.archive_scope)
+        if archive is not None:
+            base_opts['download_archive'] = archive
+        
         if config.file_format == "mp3":
             return self._add_mp3_options(base_opts, config)
         elif config.file_format == "mp4":
@@ -250,29 +639,34 @@ class DownloadController:
         return base_opts
     
     def _add_mp3_options(self, opts: Dict, config: DownloadConfig) -> Dict:
-        """Add MP3-specific options."""
-        opts['format'] = 'bestaudio/best'
+        """Add MP3-specific options (or passthrough audio options)."""
+        # The smallest audio stream meeting the bitrate, the rest would be thrown away by the encoder
+        opts['format'] = AudioFormatSelector(config.bitrate, config.audio_passthrough)
         
         if self.ffmpeg_path is not None:
             opts['ffmpeg_location'] = self.ffmpeg_path
             opts['postprocessors'] = [
                 {
                     'key': 'FFmpegExtractAudio',
-                    'preferredcodec': 'mp3',
-                    'preferredquality': config.bitrate
+                    # Passthrough copies the stream out of its container (m4a is kept, webm becomes opus)
+                    'preferredcodec': 'best' if config.audio_passthrough else 'mp3',
+                    'preferredquality': None if config.audio_passthrough else config.bitrate
                 },
                 {'key': 'FFmpegMetadata', 'add_metadata': True}
             ]
-        else:
+        elif not config.audio_passthrough:
             print("Warning: MP3 conversion disabled - ffmpeg not found")
-            opts['format'] = 'bestaudio'
         
         return opts
     
     def _add_mp4_options(self, opts: Dict, config: DownloadConfig) -> Dict:
         """Add MP4-specific options."""
-        format_string = f'bestvideo[height<={config.quality}][vbr<=12000][ext=mp4]+bestaudio[ext=m4a]/best[vbr<=12000][ext=mp4]/best'
-        opts['format'] = format_string
+        # Formats are scored on size, codec, FFmpeg work and fps instead of requiring an MP4 container
+        opts['format'] = VideoFormatSelector(
+            config.quality, config.video_format_policy,
+            bandwidth=bandwidth_governor.current_limit() or FORMAT_SELECTION_SETTINGS['bandwidth'],
+            can_merge=self.ffmpeg_path is not None
+        )
         
         if self.ffmpeg_path is not None:
             opts['ffmpeg_location'] = self.ffmpeg_path
@@ -282,16 +676,44 @@ class DownloadController:
         
         return opts
     
-    def _progress_hook(self, d: Dict):
+    def _progress_hook(self, job: DownloadJob, d: Dict):
         """Handle progress updates from yt-dlp."""
+        if d.get('status') == 'downloading':
+            # Measured here rather than in the callback, whose updates may be coalesced and applied later
+            info_dict = d.get('info_dict') or {}
+            self.progress.update_item_bytes(
+                info_dict.get('playlist_autonumber', 1) - 1, d.get('downloaded_bytes'),
+                d.get('total_bytes') or d.get('total_bytes_estimate')
+            )
+        elif d.get('status') == 'finished':
+            # Merged formats finish one file at a time, the item only with its last one
+            info_dict = d.get('info_dict') or {}
+            self.progress.finish_file(info_dict.get('playlist_autonumber', 1) - 1, d.get('filename'))
         if self.progress_callback:
-            self.progress_callback(d, self.video_infos, self.progress)
+            self.progress_callback(job, d, self.video_infos, self.progress)
     
-    def _retry_download(self, config: DownloadConfig):
-        """Retry download on error."""
-        print("There was a problem during the download, automatically restarting!")
-        # Implementation for retry logic
-        pass
+    def _retry_download(self, job: DownloadJob, budget: RetryBudget, reason: str):
+        """Retry a whole-URL download with exponential backoff after a job-level error."""
+        config = job.config
+        ydl_opts = self._build_ydl_options(job)
+        attempt = 1
+        while self.retry_policy.is_retryable(reason) and budget.try_acquire(attempt):
+            delay = self.retry_policy.backoff_delay(attempt)
+            self.progress.record_retry(0, reason)
+            print(f"There was a problem during the download, automatically restarting in {delay:.1f}s "
+                  f"(attempt {attempt} of {self.retry_policy.max_item_retries})")
+            time.sleep(delay)
+            try:
+                self._download_url(config.url, ydl_opts, job)
+                self._send_completion_notification(config)
+                return
+            except yt_dlp.utils.DownloadError as error:
+                reason = str(error).replace("ERROR: ", "").strip()
+                print(f"Download error: {reason}")
+                attempt += 1
+        
+        self.progress.fail_item(0, reason)
+        print(f"Download failed after {attempt - 1} retries: {reason}")
     
     def _send_completion_notification(self, config: DownloadConfig):
         """Send completion notification."""
@@ -299,12 +721,15 @@ class DownloadController:
             if config.is_playlist:
                 title = self.video_infos.get('title', 'Unknown Playlist')
                 message = f"Playlist \"{title}\" has been downloaded."
+                if self.progress.failed_items:
+                    message += f" {len(self.progress.failed_items)} items failed."
             else:
                 title = self.video_infos.get('title', 'Unknown')
                 message = f"Video \"{title}\" has been downloaded."
             
             # Try to send desktop notification
-            if NOTIFICATIONS_AVAILABLE:
+            notification = load_notification_facade() if self.notifications_enabled else None
+            if notification is not None:
                 try:
                     notification.notify(
                         title='Download Complete!',
@@ -316,5 +741,5 @@ class DownloadController:
                     # Fallback to console if notification fails
                     print(f"Download Complete! {message}")
             else:
-                # No notification library available
+                # Notifications disabled or no notification library available
                 print(f"Download Complete! {message}")
@@ -0,0 +1,108 @@
+"""
+Auto-tuned fragment concurrency for DASH and HLS downloads.
+"""
+import threading
+from collections import deque
+from typing import Dict
+
+from config import FRAGMENT_SETTINGS
+
+
+class FragmentTuner:
+    """Chooses yt-dlp's concurrent_fragment_downloads from the downloads already made.
+    
+    Every fragmented download reports its fragments, bytes and duration through a
+    progress hook. From those the tuner keeps, per extractor, a smoothed throughput
+    for each concurrency level it tried, and climbs (doubling) while more parallel
+    fragments keep paying off: latency-bound streams end up with many connections,
+    bandwidth-bound ones settle low. yt-dlp reassembles the fragments in order, so
+    the concurrency is also capped to keep the fragments in flight within the
+    reassembly buffer budget.
+    """
+    
+    def __init__(self, initial: int = FRAGMENT_SETTINGS['initial'], minimum: int = FRAGMENT_SETTINGS['min'],
+                 maximum: int = FRAGMENT_SETTINGS['max'], buffer_bytes: int = FRAGMENT_SETTINGS['buffer_bytes']):
+        self.initial = max(minimum, min(initial, maximum))
+        self.minimum = minimum
+        self.maximum = maximum
+        self.buffer_bytes = buffer_bytes
+        self._lock = threading.Lock()
+        self._levels: Dict[str, int] = {}
+        self._throughputs: Dict[str, Dict[int, float]] = {}
+        self._fragment_sizes: Dict[str, float] = {}
+        self._downloads: Dict[str, Dict] = {}
+        self.history: "deque[Dict]" = deque(maxlen=FRAGMENT_SETTINGS['history'])
+    
+    def concurrency(self, extractor: str) -> int:
+        """Fragments to download in parallel for the next download of an extractor."""
+        with self._lock:
+            level = self._levels.get(extractor, self.initial)
+            fragment_size = self._fragment_sizes.get(extractor)
+            if fragment_size:
+                level = min(level, max(1, int(self.buffer_bytes // fragment_size)))
+            return max(self.minimum, min(level, self.maximum))
+    
+    def progress_hook(self, extractor: str, concurrency: int, d: Dict):
+        """yt-dlp progress hook following fragmented downloads (other downloads are ignored)."""
+        key = d.get('filename') or ''
+        if d.get('status') == 'downloading':
+            if d.get('fragment_count') is not None or d.get('fragment_index') is not None:
+                with self._lock:
+                    self._downloads[key] = {
+                        'fragments': d.get('fragment_index') or 0,
+                        'fragment_count': d.get('fragment_count')
+                    }
+            return
+        
+        with self._lock:
+            download = self._downloads.pop(key, None)
+        if d.get('status') == 'finished' and download:
+            fragments = download['fragment_count'] or download['fragments']
+            self.observe(extractor, concurrency, fragments, d.get('downloaded_bytes') or 0, d.get('elapsed') or 0.0)
+    
+    def observe(self, extractor: str, concurrency: int, fragments: int, byte_count: int, seconds: float):
+        """Record a finished fragmented download and choose the next concurrency level."""
+        if fragments < FRAGMENT_SETTINGS['min_fragments'] or seconds <= 0 or byte_count <= 0:
+            return
+        
+        throughput = byte_count / seconds
+        smoothing = FRAGMENT_SETTINGS['smoothing']
+        with self._lock:
+            throughputs = self._throughputs.setdefault(extractor, {})
+            previous = throughputs.get(concurrency)
+            throughputs[concurrency] = throughput if previous is None else (
+                smoothing * throughput + (1 - smoothing) * previous
+            )
+            size = byte_count / fragments
+            self._fragment_sizes[extractor] = size if extractor not in self._fragment_sizes else (
+                smoothing * size + (1 - smoothing) * self._fragment_sizes[extractor]
+            )
+            self._levels[extractor] = self._next_level(throughputs, concurrency)
+            self.history.append({
+                'extractor': extractor,
+                'concurrency': concurrency,
+                'fragments': fragments,
+                'throughput': throughput,
+                # Average time a fragment spent in flight (Little's law)
+                'fragment_latency': concurrency * seconds / fragments,
+                'next_concurrency': self._levels[extractor]
+            })
+    
+    def _next_level(self, throughputs: Dict[int, float], current: int) -> int:
+        """Hill climbing over the measured levels (lock must be held)."""
+        gain = 1 + FRAGMENT_SETTINGS['min_gain']
+        lower = max((level for level in throughputs if level < current), default=None)
+        higher = min((level for level in throughputs if level > current), default=None)
+        
+        # More connections did not pay off, go back down
+        if lower is not None and throughputs[current] < throughputs[lower] * gain:
+            return lower
+        # Keep climbing while the next level is untried or better
+        if current < self.maximum and (higher is None or throughputs[higher] >= throughputs[current] * gain):
+            return min(self.maximum, current * 2)
+        return current
+    
+    def stats(self) -> Dict[str, int]:
+        """Concurrency level currently chosen for each extractor."""
+        with self._lock:
+            return dict(self._levels)
@@ -0,0 +1,160 @@
+"""
+Staged processing pipeline: download, FFmpeg post-processing and tagging run concurrently.
+"""
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+# Marks the end of a stage's input
+_END = object()
+
+
+class PipelineStage:
+    """A pool of workers consuming a bounded queue and feeding the next stage.
+    
+    A full queue blocks the producing stage, so a slow stage holds back the ones
+    before it instead of piling up work. Queue depth, busy time and time spent
+    blocked on the next stage are tracked to show where the bottleneck is. An
+    item whose handler raises is dropped and passed to on_error(item, error).
+    """
+    
+    def __init__(self, name: str, handler: Callable[[Any], Any], workers: int = 1, capacity: int = 0,
+                 on_error: Optional[Callable[[Any, Exception], None]] = None):
+        self.name = name
+        self.handler = handler
+        self.on_error = on_error
+        self.workers = max(1, workers)
+        self.capacity = capacity
+        self.next_stage: Optional["PipelineStage"] = None
+        self._queue: queue.Queue = queue.Queue(maxsize=capacity)
+        self._threads: List[threading.Thread] = []
+        self._lock = threading.Lock()
+        self.processed = 0
+        self.dropped = 0  # items that produced no result (failed or skipped)
+        self.max_depth = 0
+        self.busy_seconds = 0.0
+        self.blocked_seconds = 0.0
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+    
+    @property
+    def depth(self) -> int:
+        """Items waiting in the stage's queue."""
+        return self._queue.qsize()
+    
+    def start(self):
+        """Start the stage's workers."""
+        self.started_at = time.perf_counter()
+        for number in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"pipeline-{self.name}-{number + 1}")
+            thread.daemon = True
+            thread.start()
+            self._threads.append(thread)
+    
+    def put(self, item: Any):
+        """Queue an item, blocking while the stage is full."""
+        self._queue.put(item)
+        depth = self._queue.qsize()
+        with self._lock:
+            self.max_depth = max(self.max_depth, depth)
+    
+    def close(self):
+        """Signal the end of the input, once the workers are done with what is queued."""
+        for _ in self._threads:
+            self._queue.put(_END)
+    
+    def join(self):
+        """Wait for the workers to finish."""
+        for thread in self._threads:
+            thread.join()
+        self.finished_at = time.perf_counter()
+    
+    def _work(self):
+        """Worker loop: process items and hand the results to the next stage."""
+        while True:
+            item = self._queue.get()
+            if item is _END:
+                return
+            
+            start_time = time.perf_counter()
+            try:
+                result = self.handler(item)
+            except Exception as e:
+                print(f"Warning: Pipeline stage {self.name} failed: {e}")
+                result = None
+                if self.on_error is not None:
+                    try:
+                        self.on_error(item, e)
+                    except Exception as handler_error:
+                        print(f"Warning: Pipeline stage {self.name} error handler failed: {handler_error}")
+            elapsed = time.perf_counter() - start_time
+            
+            with self._lock:
+                self.busy_seconds += elapsed
+                if result is None:
+                    self.dropped += 1
+                else:
+                    self.processed += 1
+            
+            if result is not None and self.next_stage is not None:
+                start_time = time.perf_counter()
+                self.next_stage.put(result)
+                with self._lock:
+                    self.blocked_seconds += time.perf_counter() - start_time
+    
+    def stats(self) -> Dict[str, Any]:
+        """Counters of the stage, with utilisation as the share of worker time spent busy."""
+        end = self.finished_at or time.perf_counter()
+        elapsed = end - self.started_at if self.started_at else 0.0
+        with self._lock:
+            return {
+                'name': self.name,
+                'workers': self.workers,
+                'capacity': self.capacity,
+                'depth': self.depth,
+                'max_depth': self.max_depth,
+                'processed': self.processed,
+                'dropped': self.dropped,
+                'busy_seconds': self.busy_seconds,
+                'blocked_seconds': self.blocked_seconds,
+                'utilisation': self.busy_seconds / (self.workers * elapsed) if elapsed > 0 else 0.0
+            }
+
+
+class Pipeline:
+    """Chain of stages, each item flowing through them in order."""
+    
+    def __init__(self, stages: List[PipelineStage]):
+        self.stages = stages
+        for stage, next_stage in zip(stages, stages[1:]):
+            stage.next_stage = next_stage
+    
+    def run(self, items: Iterable[Any]):
+        """Push items through every stage and wait until all of them are done."""
+        for stage in self.stages:
+            stage.start()
+        for item in items:
+            self.stages[0].put(item)
+        
+        # Stages drain in order, so each one only ends once its producer has
+        for stage in self.stages:
+            stage.close()
+            stage.join()
+    
+    def stats(self) -> List[Dict[str, Any]]:
+        """Counters of every stage (safe to call while the pipeline runs)."""
+        return [stage.stats() for stage in self.stages]
+    
+    def format_stats(self) -> str:
+        """One-line summary of the stages and the busiest one."""
+        stats = self.stats()
+        parts = [
+            f"{stage['name']}: {stage['processed']} done, {stage['dropped']} dropped, "
+            f"{stage['utilisation']:.0%} busy, max queue {stage['max_depth']}"
+            f"{'/' + str(stage['capacity']) if stage['capacity'] else ''}, "
+            f"blocked {stage['blocked_seconds']:.1f}s"
+            for stage in stats
+        ]
+        bottleneck = max(stats, key=lambda stage: stage['utilisation'])
+        return "; ".join(parts) + f" (bottleneck: {bottleneck['name']})"
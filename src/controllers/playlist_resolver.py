@@ -0,0 +1,86 @@
+"""
+Lazy resolution of flat playlist entries just ahead of the download cursor.
+"""
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional
+
+import yt_dlp
+
+from config import PLAYLIST_RESOLVER_LOOKAHEAD, PLAYLIST_RESOLVER_WORKERS
+
+# Playlist fields kept when an item is resolved on its own
+PLAYLIST_FIELDS = (
+    'playlist', 'playlist_id', 'playlist_title', 'playlist_index', 'playlist_autonumber',
+    'playlist_count', 'n_entries'
+)
+
+
+def get_playlist_fields(entry: Dict) -> Dict:
+    """Playlist fields of an entry, passed as extra info when the entry is resolved."""
+    return {key: entry[key] for key in PLAYLIST_FIELDS if entry.get(key) is not None}
+
+
+def is_flat_entry(entry: Dict) -> bool:
+    """Whether a playlist entry is an unresolved reference from a flat listing."""
+    return entry.get('_type') in ('url', 'url_transparent')
+
+
+class LazyPlaylistResolver:
+    """Resolves flat playlist entries on a small pool, a few items ahead of the downloads.
+    
+    When a worker asks for an entry, the next entries are queued for resolution so
+    their metadata is ready (and shown) before their download starts. Each entry is
+    extracted at most once; a failed resolution hands back the flat entry and the
+    download resolves it itself.
+    """
+    
+    def __init__(self, ydl_opts: Dict[str, Any], entries: List[Dict],
+                 on_resolved: Optional[Callable[[Dict], None]] = None,
+                 lookahead: int = PLAYLIST_RESOLVER_LOOKAHEAD):
+        # Resolution only extracts metadata, downloads and hooks belong to the workers
+        self.ydl_opts = dict(ydl_opts, quiet=True, progress_hooks=[], postprocessors=[])
+        self.entries = entries
+        self.on_resolved = on_resolved
+        self.lookahead = lookahead
+        self._positions = {id(entry): position for position, entry in enumerate(entries)}
+        self._futures: Dict[int, Future] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=PLAYLIST_RESOLVER_WORKERS, thread_name_prefix="playlist-resolver")
+    
+    def get(self, entry: Dict) -> Dict:
+        """Return the resolved version of an entry, resolving it now if needed."""
+        position = self._positions.get(id(entry))
+        if position is None or not is_flat_entry(entry):
+            return entry
+        
+        future = self._schedule(position)
+        for ahead in range(position + 1, min(position + 1 + self.lookahead, len(self.entries))):
+            self._schedule(ahead)
+        return future.result() or entry
+    
+    def shutdown(self):
+        """Stop resolving entries ahead."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+    
+    def _schedule(self, position: int) -> Future:
+        """Queue the resolution of an entry once."""
+        with self._lock:
+            future = self._futures.get(position)
+            if future is None:
+                future = self._executor.submit(self._resolve, self.entries[position])
+                self._futures[position] = future
+            return future
+    
+    def _resolve(self, entry: Dict) -> Optional[Dict]:
+        """Extract the full metadata of a flat entry (runs in a resolver thread)."""
+        try:
+            with yt_dlp.YoutubeDL(self.ydl_opts) as ydl:
+                resolved = ydl.process_ie_result(dict(entry), download=False, extra_info=get_playlist_fields(entry))
+        except Exception as e:
+            print(f"Warning: Could not resolve playlist entry {entry.get('url')}: {e}")
+            return None
+        
+        if resolved and self.on_resolved:
+            self.on_resolved(resolved)
+        return resolved
@@ -0,0 +1,57 @@
+"""
+Thread-safe event bus carrying progress updates from download threads to the Tk main loop.
+"""
+import threading
+from typing import Any, Callable, Dict, Hashable, List, Tuple
+
+
+class ProgressEventBus:
+    """Coalescing queue between yt-dlp hooks and the Tk main loop.
+    
+    Download threads publish events, the Tk main loop drains them on a fixed-rate
+    timer. Coalescable events (progress ticks) replace any pending event with the
+    same key, so only the latest state per key is applied. Non-coalescable events
+    (state transitions such as a finished item) are always delivered, in order.
+    """
+    
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._events: List[Tuple[Callable, Tuple]] = []
+        self._latest: Dict[Hashable, int] = {}
+        self.published_events = 0
+        self.dropped_events = 0
+    
+    def publish(self, key: Hashable, handler: Callable, *args: Any, coalesce: bool = True):
+        """Queue handler(*args) to run on the main loop (safe to call from any thread)."""
+        with self._lock:
+            self.published_events += 1
+            index = self._latest.get(key)
+            if coalesce and index is not None:
+                # Drop the intermediate tick, keep the queue position of the first one
+                self._events[index] = (handler, args)
+                self.dropped_events += 1
+                return
+            
+            self._events.append((handler, args))
+            if coalesce:
+                self._latest[key] = len(self._events) - 1
+            else:
+                # Later ticks for this key must be applied after this transition
+                self._latest.pop(key, None)
+    
+    def drain(self) -> List[Tuple[Callable, Tuple]]:
+        """Take all pending events in publication order."""
+        with self._lock:
+            events, self._events = self._events, []
+            self._latest.clear()
+        return events
+    
+    def dispatch(self) -> int:
+        """Run all pending events on the calling thread. Returns the number applied."""
+        events = self.drain()
+        for handler, args in events:
+            try:
+                handler(*args)
+            except Exception as e:
+                print(f"Warning: Progress update failed: {e}")
+        return len(events)
@@ -0,0 +1,57 @@
+"""
+Retry policy with exponential backoff and per-job retry budgets.
+"""
+import random
+import threading
+from dataclasses import dataclass
+
+from config import RETRY_SETTINGS
+
+# Errors that will not go away by trying again
+PERMANENT_ERROR_MARKERS = (
+    "DRM protection", "DRM protected", "known to use DRM",
+    "Video unavailable", "Private video", "Music Premium members",
+    "Video not found", "does not exist", "Unsupported URL",
+    "Sign in to confirm your age", "This video is not available",
+    "Postprocessing", "ffmpeg not found",
+    "HTTP Error 404", "HTTP Error 410"
+)
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """Retry limits and backoff timing."""
+    max_item_retries: int = RETRY_SETTINGS['max_item_retries']  # retries per playlist item
+    max_job_retries: int = RETRY_SETTINGS['max_job_retries']  # retries shared by the whole job
+    base_delay: float = RETRY_SETTINGS['base_delay']  # seconds before the first retry
+    max_delay: float = RETRY_SETTINGS['max_delay']  # upper bound for a single wait
+    
+    def backoff_delay(self, attempt: int) -> float:
+        """Exponential backoff with jitter for a retry attempt (1 for the first retry)."""
+        delay = min(self.max_delay, self.base_delay * (2 ** (attempt - 1)))
+        # Jitter spreads retries of concurrent workers hitting the same server
+        return random.uniform(delay / 2, delay)
+    
+    @staticmethod
+    def is_retryable(error_message: str) -> bool:
+        """Whether an error may succeed on a later attempt."""
+        return not any(marker in error_message for marker in PERMANENT_ERROR_MARKERS)
+
+
+class RetryBudget:
+    """Thread-safe retry counter shared by all items of a job."""
+    
+    def __init__(self, policy: RetryPolicy):
+        self.policy = policy
+        self._lock = threading.Lock()
+        self.used = 0
+    
+    def try_acquire(self, item_attempt: int) -> bool:
+        """Reserve a retry for an item that already failed item_attempt times."""
+        if item_attempt > self.policy.max_item_retries:
+            return False
+        with self._lock:
+            if self.used >= self.policy.max_job_retries:
+                return False
+            self.used += 1
+            return True
@@ -0,0 +1,130 @@
+"""
+Sizing of the FFmpeg transcoding pool from the available CPU cores, and the
+choice between remuxing and re-encoding of each downloaded file.
+"""
+import os
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+from config import VIDEO_TRANSCODE_THREADS, MP4_VIDEO_CODECS, MP4_AUDIO_CODECS, POSTPROCESS_SETTINGS
+
+
+@dataclass(frozen=True)
+class TranscodePlan:
+    """How many FFmpeg processes run at once and how many threads each may use."""
+    workers: int
+    ffmpeg_threads: int
+    
+    @property
+    def postprocessor_args(self) -> Dict[str, Any]:
+        """yt-dlp postprocessor_args limiting the threads of every FFmpeg output."""
+        return {'default': ['-threads', str(self.ffmpeg_threads)]}
+
+
+def plan_transcoding(file_format: str, max_workers: int, cpu_count: Optional[int] = None) -> TranscodePlan:
+    """
+    Size the transcoding pool so the FFmpeg processes together use the CPU without oversubscribing it.
+    
+    Args:
+        file_format: Output format of the job (mp3 encodes audio, mp4 converts video)
+        max_workers: Configured cap on parallel conversions
+        cpu_count: Number of cores, os.cpu_count() by default
+    
+    Returns:
+        The number of workers and FFmpeg threads per conversion
+    """
+    cores = cpu_count or os.cpu_count() or 1
+    cap = max(1, max_workers)
+    
+    if file_format == "mp3":
+        # LAME encodes on a single thread, one conversion per core
+        return TranscodePlan(workers=min(cap, cores), ffmpeg_threads=1)
+    
+    workers = min(cap, max(1, cores // VIDEO_TRANSCODE_THREADS))
+    return TranscodePlan(workers=workers, ffmpeg_threads=max(1, cores // workers))
+
+
+@dataclass(frozen=True)
+class PostprocessPlan:
+    """How a downloaded file becomes an MP4: kept as is, remuxed (streams copied) or transcoded."""
+    action: str  # 'keep', 'remux' or 'transcode'
+    reason: str
+    
+    @property
+    def postprocessors(self) -> List[Dict[str, Any]]:
+        """yt-dlp postprocessors carrying out the plan."""
+        if self.action == 'remux':
+            return [{'key': 'FFmpegVideoRemuxer', 'preferedformat': 'mp4'}]
+        if self.action == 'transcode':
+            return [{'key': 'FFmpegVideoConvertor', 'preferedformat': 'mp4'}]
+        return []
+
+
+def _codec_fits(codec: Optional[str], supported: tuple) -> bool:
+    """Whether a yt-dlp codec string ('avc1.640028', 'opus', 'none'...) can be stored in MP4."""
+    codec = (codec or '').lower()
+    return codec == 'none' or codec.split('.')[0] in supported
+
+
+def plan_postprocessing(video_infos: Dict) -> PostprocessPlan:
+    """
+    Choose the cheapest way to turn a downloaded file into an MP4.
+    
+    Args:
+        video_infos: Info of the downloaded file (merged formats carry the codecs of both streams)
+    
+    Returns:
+        Keep MP4 files, remux files whose codecs MP4 supports, transcode the rest
+    """
+    ext = (video_infos.get('ext') or '').lower()
+    if ext == 'mp4':
+        return PostprocessPlan('keep', "already MP4")
+    
+    vcodec, acodec = video_infos.get('vcodec'), video_infos.get('acodec')
+    codecs = f"{vcodec or '?'}+{acodec or '?'}"
+    if not vcodec or not acodec:
+        # Unknown streams might not fit, re-encoding always works
+        return PostprocessPlan('transcode', f"{ext} with unknown codecs {codecs}")
+    if _codec_fits(vcodec, MP4_VIDEO_CODECS) and _codec_fits(acodec, MP4_AUDIO_CODECS):
+        return PostprocessPlan('remux', f"{ext} with MP4-compatible codecs {codecs}")
+    return PostprocessPlan('transcode', f"{ext} with codecs {codecs} MP4 cannot hold")
+
+
+class PostprocessLog:
+    """Counts the post-processing paths taken in a job and the encoding time they avoided.
+    
+    The time a remux saves is the estimated re-encode time of the media minus the
+    remux time. The re-encode speed (media seconds per second) starts from the
+    configured guess and follows the transcodes measured in the job.
+    """
+    
+    def __init__(self, transcode_speed: float = POSTPROCESS_SETTINGS['transcode_speed']):
+        self.transcode_speed = transcode_speed
+        self._lock = threading.Lock()
+        self._counts = {'keep': 0, 'remux': 0, 'transcode': 0}
+        self._saved_seconds = 0.0
+    
+    def record(self, plan: PostprocessPlan, duration: Optional[float], seconds: float) -> float:
+        """Count a post-processed file and return the seconds saved by not re-encoding it."""
+        with self._lock:
+            self._counts[plan.action] = self._counts.get(plan.action, 0) + 1
+            if not duration:
+                return 0.0
+            if plan.action == 'transcode':
+                if seconds > 0:
+                    smoothing = POSTPROCESS_SETTINGS['smoothing']
+                    self.transcode_speed = smoothing * duration / seconds + (1 - smoothing) * self.transcode_speed
+                return 0.0
+            if plan.action != 'remux':
+                # MP4 files were never re-encoded, keeping them saves nothing
+                return 0.0
+            saved = max(0.0, duration / self.transcode_speed - seconds)
+            self._saved_seconds += saved
+            return saved
+    
+    def format_stats(self) -> str:
+        """One-line summary of the paths taken and the time saved."""
+        with self._lock:
+            return (f"{self._counts['keep']} kept, {self._counts['remux']} remuxed, "
+                    f"{self._counts['transcode']} transcoded, ~{self._saved_seconds:.0f}s of re-encoding saved")
@@ -0,0 +1,178 @@
+"""
+Scoring-based selection of the video formats to download for a target height.
+"""
+from typing import Dict, Iterator, List, Optional
+
+from yt_dlp.utils import determine_protocol, get_compatible_ext
+
+from config import (
+    DEFAULT_VIDEO_FORMAT_POLICY, VIDEO_FORMAT_POLICIES, VIDEO_CODEC_EFFICIENCY, FORMAT_SELECTION_SETTINGS,
+    POSTPROCESS_SETTINGS
+)
+from controllers.audio_formats import AudioFormatSelector, is_audio_only, format_size
+from controllers.transcoding import plan_postprocessing
+
+
+def has_video(fmt: Dict) -> bool:
+    """Whether a format carries a video stream."""
+    return fmt.get('vcodec') not in (None, 'none') or bool(fmt.get('height'))
+
+
+def codec_efficiency(vcodec: Optional[str]) -> float:
+    """Quality per bit of a video codec relative to H.264 (1.0 when unknown)."""
+    return VIDEO_CODEC_EFFICIENCY.get((vcodec or '').lower().split('.')[0], 1.0)
+
+
+def merge_formats(video: Dict, audio: Dict) -> Dict:
+    """The format yt-dlp builds for 'video+audio', downloaded separately and merged by FFmpeg."""
+    output_ext = get_compatible_ext(
+        vcodecs=[video.get('vcodec')], acodecs=[audio.get('acodec')], vexts=[video['ext']], aexts=[audio['ext']]
+    )
+    return {
+        'requested_formats': [video, audio],
+        'format': f"{video.get('format') or video.get('format_id')}+{audio.get('format') or audio.get('format_id')}",
+        'format_id': f"{video.get('format_id')}+{audio.get('format_id')}",
+        'ext': output_ext,
+        'protocol': f"{determine_protocol(video)}+{determine_protocol(audio)}",
+        'filesize_approx': ((format_size(video) or 0) + (format_size(audio) or 0)) or None,
+        'tbr': (video.get('tbr') or video.get('vbr') or 0) + (audio.get('tbr') or audio.get('abr') or 0),
+        'width': video.get('width'),
+        'height': video.get('height'),
+        'resolution': video.get('resolution'),
+        'fps': video.get('fps'),
+        'dynamic_range': video.get('dynamic_range'),
+        'vcodec': video.get('vcodec'),
+        'vbr': video.get('vbr'),
+        'aspect_ratio': video.get('aspect_ratio'),
+        'acodec': audio.get('acodec'),
+        'abr': audio.get('abr'),
+        'asr': audio.get('asr'),
+        'audio_channels': audio.get('audio_channels')
+    }
+
+
+class VideoFormatSelector:
+    """yt-dlp format selector choosing an MP4 download by score rather than by container.
+    
+    Passed as the 'format' option, it considers every format with video at the
+    highest height up to the target: the formats with their own audio, and the
+    video-only ones paired with an audio stream. Each candidate gets its size,
+    the FFmpeg work it needs (merge, remux or re-encode, see plan_postprocessing),
+    the download and FFmpeg time at the expected bandwidth, a quality (bitrate
+    weighted by codec efficiency) and its frame rate. The candidate with the
+    lowest score wins, the score being the sum of these values relative to the
+    best candidate, weighted by the policy: "smallest", "fastest" or "best".
+    """
+    
+    def __init__(self, height: str, policy: str = DEFAULT_VIDEO_FORMAT_POLICY,
+                 bandwidth: float = FORMAT_SELECTION_SETTINGS['bandwidth'], can_merge: bool = True):
+        try:
+            self.height = int(height)
+        except (TypeError, ValueError):
+            self.height = None
+        if policy not in VIDEO_FORMAT_POLICIES:
+            print(f"Warning: Unknown video format policy \"{policy}\", using \"{DEFAULT_VIDEO_FORMAT_POLICY}\"")
+            policy = DEFAULT_VIDEO_FORMAT_POLICY
+        self.policy = policy
+        self.bandwidth = bandwidth
+        self.can_merge = can_merge
+        # The best quality policy takes the best audio stream, the others one that is good enough
+        self.audio_selector = None if policy == 'best' else AudioFormatSelector(FORMAT_SELECTION_SETTINGS['audio_kbps'])
+    
+    def __call__(self, ctx: Dict) -> Iterator[Dict]:
+        """Format selection function called by yt-dlp with the formats sorted worst to best."""
+        selected = self.select(ctx['formats'])
+        if selected is not None:
+            yield selected
+    
+    def select(self, formats: List[Dict]) -> Optional[Dict]:
+        """Choose the format (or merged video+audio formats) to download."""
+        ranking = self.rank(formats)
+        if ranking:
+            return ranking[0]['format']
+        # Nothing with video, like the '/best' fallback
+        return formats[-1] if formats else None
+    
+    def rank(self, formats: List[Dict]) -> List[Dict]:
+        """Score the candidates of a format list, best first.
+        
+        Returns:
+            Candidates with the 'format' to download, their 'score' and the values it is made of
+        """
+        candidates = self._candidates(formats)
+        if not candidates:
+            return []
+        
+        size_known = [candidate['size'] for candidate in candidates if candidate['size']]
+        for candidate in candidates:
+            # Unknown sizes count as the largest known one
+            candidate['size'] = candidate['size'] or max(size_known, default=1)
+            candidate['ffmpeg_seconds'] = self._ffmpeg_seconds(candidate)
+            candidate['seconds'] = candidate['size'] / self.bandwidth + candidate['ffmpeg_seconds']
+        
+        lowest = {key: min(candidate[key] for candidate in candidates) for key in ('size', 'seconds', 'ffmpeg_seconds')}
+        highest = {key: max(candidate[key] for candidate in candidates) for key in ('quality', 'fps')}
+        weights = VIDEO_FORMAT_POLICIES[self.policy]
+        for candidate in candidates:
+            ratios = {
+                'size': candidate['size'] / lowest['size'],
+                'time': candidate['seconds'] / lowest['seconds'] if lowest['seconds'] else 1.0,
+                'ffmpeg': (candidate['ffmpeg_seconds'] + 1) / (lowest['ffmpeg_seconds'] + 1),
+                'quality': highest['quality'] / candidate['quality'],
+                'fps': highest['fps'] / candidate['fps']
+            }
+            candidate['score'] = sum(weight * ratios[key] for key, weight in weights.items())
+        # Ties go to the candidate yt-dlp ranks best
+        return sorted(candidates, key=lambda candidate: (candidate['score'], -candidate['rank']))
+    
+    def _candidates(self, formats: List[Dict]) -> List[Dict]:
+        """Formats with video at the chosen height, video-only ones paired with the audio stream."""
+        videos = [(rank, fmt) for rank, fmt in enumerate(formats) if has_video(fmt)]
+        if not self.can_merge:
+            videos = [(rank, fmt) for rank, fmt in videos if fmt.get('acodec') not in (None, 'none')] or videos
+        heights = [fmt['height'] for _, fmt in videos if fmt.get('height')]
+        if heights:
+            fitting = [height for height in heights if self.height is None or height <= self.height]
+            # The highest height up to the target, else the lowest there is
+            chosen = max(fitting) if fitting else min(heights)
+            videos = [(rank, fmt) for rank, fmt in videos if fmt.get('height') == chosen]
+        
+        audio = None
+        if self.can_merge:
+            audio_formats = [fmt for fmt in formats if is_audio_only(fmt)]
+            if audio_formats:
+                audio = self.audio_selector.select(audio_formats) if self.audio_selector else audio_formats[-1]
+        
+        candidates = []
+        for rank, video in videos:
+            if video.get('acodec') not in (None, 'none'):
+                selected, merged = video, False
+            elif audio is not None:
+                selected, merged = merge_formats(video, audio), True
+            else:
+                selected, merged = video, False
+            bitrate = video.get('vbr') or video.get('tbr') or 1000
+            candidates.append({
+                'format': selected,
+                'rank': rank,
+                'merged': merged,
+                'plan': plan_postprocessing(selected).action,
+                'size': format_size(selected),
+                'bitrate': selected.get('tbr') or bitrate,
+                'quality': bitrate * codec_efficiency(video.get('vcodec')),
+                'fps': video.get('fps') or 30
+            })
+        return candidates
+    
+    def _ffmpeg_seconds(self, candidate: Dict) -> float:
+        """Estimated FFmpeg time of a candidate: stream copies to merge and remux, or a re-encode."""
+        copy_seconds = candidate['size'] / FORMAT_SELECTION_SETTINGS['copy_speed']
+        seconds = copy_seconds if candidate['merged'] else 0.0
+        if candidate['plan'] == 'remux':
+            seconds += copy_seconds
+        elif candidate['plan'] == 'transcode':
+            # The media length follows from the size and the bitrate
+            media_seconds = (candidate['size'] * 8 / (candidate['bitrate'] * 1000) if candidate['bitrate']
+                             else FORMAT_SELECTION_SETTINGS['media_seconds'])
+            seconds += media_seconds / POSTPROCESS_SETTINGS['transcode_speed']
+        return seconds
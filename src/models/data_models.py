@@ -1,9 +1,19 @@
 """
 Data models for the yt-dlp GUI application.
 """
-from dataclasses import dataclass
-from typing import Optional, List, Dict, Any
+from dataclasses import dataclass, field
+from typing import Optional, List, Dict, Any, Tuple
 import datetime
+import itertools
+import math
+import threading
+import time
+
+from config import (
+    DEFAULT_CONCURRENT_DOWNLOADS, DEFAULT_DOWNLOAD_ARCHIVE_SCOPE, DEFAULT_RESUMABLE_DOWNLOADS,
+    DEFAULT_INCREMENTAL_PLAYLISTS, DEFAULT_MAX_TRANSCODE_WORKERS, DEFAULT_AUDIO_PASSTHROUGH,
+    DEFAULT_VIDEO_FORMAT_POLICY, PROGRESS_SPEED_SETTINGS
+)
 
 @dataclass
 class VideoInfo:
@@ -43,17 +53,25 @@ class PlaylistInfo:
         """Return the number of videos in the playlist."""
         return len(self.entries)
 
-@dataclass
+@dataclass(frozen=True)
 class DownloadConfig:
-    """Configuration for download operations."""
+    """Configuration for download operations (frozen, change it with dataclasses.replace)."""
     url: str = ""
     output_directory: str = ""
     file_format: str = "mp3"  # mp3 or mp4
     bitrate: str = "192"  # for mp3
+    audio_passthrough: bool = DEFAULT_AUDIO_PASSTHROUGH  # keep AAC/Opus audio as downloaded instead of encoding MP3
     quality: str = "720"  # for mp4
+    video_format_policy: str = DEFAULT_VIDEO_FORMAT_POLICY  # smallest, fastest or best, see VideoFormatSelector
     is_playlist: bool = False
     playlist_start: int = 1
     playlist_end: int = 1
+    concurrent_downloads: int = DEFAULT_CONCURRENT_DOWNLOADS  # playlist items downloaded in parallel
+    archive_scope: str = DEFAULT_DOWNLOAD_ARCHIVE_SCOPE  # directory, global or off
+    resumable: bool = DEFAULT_RESUMABLE_DOWNLOADS  # keep partial files and resume interrupted jobs
+    incremental_playlist: bool = DEFAULT_INCREMENTAL_PLAYLISTS  # list playlists flat, resolve items while downloading
+    max_transcode_workers: int = DEFAULT_MAX_TRANSCODE_WORKERS  # cap on parallel FFmpeg conversions
+    bandwidth_weight: float = 1.0  # share of the bandwidth limit relative to the other active jobs
     verbose: bool = True
     
     @property
@@ -61,25 +79,207 @@ class DownloadConfig:
         """Generate the output template for yt-dlp."""
         return f"{self.output_directory}/%(title)s.%(ext)s"
 
+@dataclass(frozen=True)
+class DownloadJob:
+    """Immutable snapshot of one download request.
+    
+    Created once when a conversion starts and carried through the controllers and
+    progress hooks, so progress handling never re-reads the UI or the settings file.
+    """
+    job_id: int
+    config: DownloadConfig
+    created_at: float = field(default_factory=time.time)
+    
+    _ids = itertools.count(1)
+    
+    @classmethod
+    def create(cls, config: DownloadConfig) -> "DownloadJob":
+        """Create a job from a configuration, which is frozen and cannot change under it."""
+        return cls(job_id=next(cls._ids), config=config)
+    
+    @property
+    def is_playlist(self) -> bool:
+        """Whether the job downloads a playlist."""
+        return self.config.is_playlist
+
 class DownloadProgress:
-    """Manages download progress state."""
+    """Manages download progress state.
+    
+    Playlist items may download concurrently, so progress is tracked per item
+    index and the total percentage is derived from every item's state. The
+    displayed item is the one whose progress is shown in the video progress bar.
+    """
     
     def __init__(self):
-        self.current_song = 0
-        self.previous_song = -1
-        self.current_percentage = 0.0
-        self.total_percentage = 0.0
-        self.status = "idle"  # idle, downloading, processing, finished, error
+        self._lock = threading.Lock()
+        self.reset()
         
     def update_current_song(self, song_index: int):
         """Update the current song index."""
         self.previous_song = self.current_song
         self.current_song = song_index
+    
+    def set_total_items(self, total_items: int):
+        """Set the number of items expected for the current job."""
+        with self._lock:
+            self.total_items = total_items
+            self._update_total_percentage()
+    
+    def update_item_bytes(self, item_index: int, downloaded_bytes: Optional[int], total_bytes: Optional[int],
+                          now: Optional[float] = None):
+        """Record the bytes downloaded of an item, from which its percentage, speed and ETA follow.
+        
+        The speed is a moving average of the byte rate measured over at least
+        'sample_seconds', each rate weighted by the time it covers, so bursts of
+        small updates and short stalls do not make it jump. The percentage and ETA
+        are left as they were while the size of the item is unknown.
+        """
+        if downloaded_bytes is None:
+            return
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            if item_index in self.finished_items:
+                return
+            mark = self._byte_marks.get(item_index)
+            if mark is None or downloaded_bytes < mark[0]:
+                # First update, or the next file of the item (merged formats, restart): the speed carries over
+                self._byte_marks[item_index] = (downloaded_bytes, now)
+            elif now - mark[1] >= PROGRESS_SPEED_SETTINGS['sample_seconds']:
+                elapsed = now - mark[1]
+                rate = (downloaded_bytes - mark[0]) / elapsed
+                speed = self.item_speeds.get(item_index)
+                if speed is None:
+                    self.item_speeds[item_index] = rate
+                else:
+                    weight = 1 - math.exp(-elapsed / PROGRESS_SPEED_SETTINGS['smoothing_seconds'])
+                    self.item_speeds[item_index] = speed + weight * (rate - speed)
+                self._byte_marks[item_index] = (downloaded_bytes, now)
+            
+            if total_bytes:
+                # Each file of the item (merged video+audio formats) counts as an equal share
+                files_done = len(self._finished_files.get(item_index, ()))
+                fraction = min(downloaded_bytes / total_bytes, 1.0)
+                self.item_percentages[item_index] = (files_done + fraction) / self._expected_files(item_index) * 100
+                speed = self.item_speeds.get(item_index)
+                if speed:
+                    self.item_etas[item_index] = max(total_bytes - downloaded_bytes, 0) / speed
+                self._update_total_percentage()
+    
+    def item_transfer(self, item_index: int) -> Tuple[Optional[float], Optional[float], Optional[float]]:
+        """Percentage, smoothed speed (bytes/s) and ETA (seconds) of an item, None where not known yet."""
+        with self._lock:
+            return (self.item_percentages.get(item_index), self.item_speeds.get(item_index),
+                    self.item_etas.get(item_index))
+    
+    def total_speed(self) -> float:
+        """Smoothed speed (bytes/s) of all items downloading."""
+        with self._lock:
+            return sum(self.item_speeds.values())
+    
+    def expect_files(self, item_index: int, file_count: int):
+        """Set the number of files downloaded for an item (2 for merged video+audio formats)."""
+        with self._lock:
+            self.item_files[item_index] = max(file_count, 1)
+            self._finished_files.pop(item_index, None)
+    
+    def finish_file(self, item_index: int, filename: Optional[str]) -> bool:
+        """Record a downloaded file of an item, the item is finished with its last file.
+        
+        Returns True if the item is fully downloaded.
+        """
+        with self._lock:
+            if item_index in self.finished_items:
+                return True
+            files = self._finished_files.setdefault(item_index, set())
+            files.add(filename)
+            if len(files) < self._expected_files(item_index):
+                self.item_percentages[item_index] = len(files) / self._expected_files(item_index) * 100
+                self._update_total_percentage()
+                return False
+        self.finish_item(item_index)
+        return True
+    
+    def finish_item(self, item_index: int):
+        """Mark an item as fully downloaded."""
+        with self._lock:
+            self.finished_items.add(item_index)
+            self.item_percentages.pop(item_index, None)
+            self._finished_files.pop(item_index, None)
+            self._forget_transfer(item_index)
+            self._update_total_percentage()
+    
+    def record_retry(self, item_index: int, reason: str):
+        """Record a retry of an item and why it was needed."""
+        with self._lock:
+            self.retry_counts[item_index] = self.retry_counts.get(item_index, 0) + 1
+            self.retry_reasons[item_index] = reason
+            self.job_retries += 1
+            # The item starts over
+            self.item_percentages.pop(item_index, None)
+            self._finished_files.pop(item_index, None)
+            self._forget_transfer(item_index)
+            self.finished_items.discard(item_index)
+            self._update_total_percentage()
+    
+    def fail_item(self, item_index: int, reason: str):
+        """Mark an item as failed for good (it counts as done for the total progress)."""
+        with self._lock:
+            self.failed_items[item_index] = reason
+            self.finished_items.add(item_index)
+            self.item_percentages.pop(item_index, None)
+            self._finished_files.pop(item_index, None)
+            self._forget_transfer(item_index)
+            self._update_total_percentage()
+    
+    def claim_display(self, item_index: int) -> bool:
+        """Make the item the displayed one if no unfinished item is displayed.
+        
+        Returns True if the displayed item changed to item_index.
+        """
+        with self._lock:
+            if self.displayed_item is not None and self.displayed_item not in self.finished_items:
+                return False
+            if item_index in self.finished_items or item_index == self.displayed_item:
+                return False
+            self.displayed_item = item_index
+            return True
+    
+    def _forget_transfer(self, item_index: int):
+        """Drop the speed and ETA of an item that stopped downloading (lock must be held)."""
+        self._byte_marks.pop(item_index, None)
+        self.item_speeds.pop(item_index, None)
+        self.item_etas.pop(item_index, None)
+    
+    def _expected_files(self, item_index: int) -> int:
+        """Number of files downloaded for an item, 1 unless told otherwise (lock must be held)."""
+        return self.item_files.get(item_index, 1)
+    
+    def _update_total_percentage(self):
+        """Recompute the total percentage (lock must be held)."""
+        if self.total_items <= 0:
+            self.total_percentage = 0.0
+            return
+        done = len(self.finished_items) + sum(self.item_percentages.values()) / 100
+        self.total_percentage = min(done / self.total_items * 100, 100.0)
         
     def reset(self):
         """Reset progress to initial state."""
-        self.current_song = 0
-        self.previous_song = -1
-        self.current_percentage = 0.0
-        self.total_percentage = 0.0
-        self.status = "idle"
+        with self._lock:
+            self.current_song = 0
+            self.previous_song = -1
+            self.current_percentage = 0.0
+            self.total_percentage = 0.0
+            self.status = "idle"
+            self.total_items = 0
+            self.item_percentages: Dict[int, float] = {}
+            self.item_speeds: Dict[int, float] = {}
+            self.item_etas: Dict[int, float] = {}
+            self._byte_marks: Dict[int, Tuple[int, float]] = {}
+            self.item_files: Dict[int, int] = {}
+            self._finished_files: Dict[int, set] = {}
+            self.finished_items = set()
+            self.displayed_item: Optional[int] = None
+            self.retry_counts: Dict[int, int] = {}
+            self.retry_reasons: Dict[int, str] = {}
+            self.failed_items: Dict[int, str] = {}
+            self.job_retries = 0
@@ -7,6 +7,12 @@ This package contains helper functions and utility modules.
 from .ui_utils import get_platform_fonts, calculate_window_size
 from .image_utils import load_thumbnail, load_icon, crop_album_cover
 from .settings import settings_manager
+from .thumbnail_cache import thumbnail_cache, find_written_thumbnail
+from .tagging import TrackTags, write_tags
+from .download_archive import DownloadArchive, get_download_archive, archive_id_from_info
+from .resume_journal import ResumeJournal, find_unfinished_jobs, get_partial_bytes
+from .metadata_cache import metadata_cache
+from .stage_metrics import stage_metrics, extractor_of
 
 __all__ = [
     'get_platform_fonts', 
@@ -14,5 +20,18 @@ __all__ = [
     'load_thumbnail', 
     'load_icon', 
     'crop_album_cover',
-    'settings_manager'
+    'settings_manager',
+    'thumbnail_cache',
+    'find_written_thumbnail',
+    'TrackTags',
+    'write_tags',
+    'DownloadArchive',
+    'get_download_archive',
+    'archive_id_from_info',
+    'ResumeJournal',
+    'find_unfinished_jobs',
+    'get_partial_bytes',
+    'metadata_cache',
+    'stage_metrics',
+    'extractor_of'
 ]
@@ -0,0 +1,167 @@
+"""
+Persistent archive of downloaded items, used to skip work that was already done.
+"""
+import os
+import threading
+from typing import Dict, Iterator, Optional, Set
+
+from config import DOWNLOAD_ARCHIVE_FILENAME, GLOBAL_DOWNLOAD_ARCHIVE_PATH, MEDIA_EXTENSIONS
+
+from .tagging import read_archive_id
+
+
+def make_archive_id(extractor: str, video_id: str) -> str:
+    """Build an archive key, in the same format as yt-dlp's download archive."""
+    return f"{extractor.lower()} {video_id}"
+
+
+def archive_id_from_info(video_infos: Dict) -> Optional[str]:
+    """Return the archive key of a resolved video, or None if it cannot be identified."""
+    video_id = video_infos.get('id')
+    extractor = video_infos.get('extractor_key') or video_infos.get('ie_key')
+    if not video_id or not extractor:
+        return None
+    return make_archive_id(extractor, str(video_id))
+
+
+class DownloadArchive:
+    """Set of downloaded items keyed by extractor and video ID, persisted to a text file.
+    
+    The file uses yt-dlp's download archive format (one "<extractor> <id>" per
+    line), and an instance can be passed as yt-dlp's ``download_archive`` option:
+    lookups are O(1) set operations and every added key is appended to the file.
+    """
+    
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._ids: Optional[Set[str]] = None
+    
+    def _load(self) -> Set[str]:
+        """Load the archive file on first use (lock must be held)."""
+        if self._ids is None:
+            self._ids = set()
+            try:
+                with open(self.path, 'r', encoding='utf-8') as f:
+                    self._ids.update(line.strip() for line in f if line.strip())
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                print(f"Warning: Could not read download archive {self.path}: {e}")
+        return self._ids
+    
+    def __contains__(self, archive_id: object) -> bool:
+        with self._lock:
+            return archive_id in self._load()
+    
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._load())
+    
+    def __iter__(self) -> Iterator[str]:
+        with self._lock:
+            return iter(list(self._load()))
+    
+    def add(self, archive_id: str):
+        """Record a downloaded item."""
+        with self._lock:
+            ids = self._load()
+            if archive_id in ids:
+                return
+            ids.add(archive_id)
+            try:
+                os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+                with open(self.path, 'a', encoding='utf-8') as f:
+                    f.write(archive_id + '\n')
+            except OSError as e:
+                print(f"Warning: Could not write download archive {self.path}: {e}")
+    
+    def discard(self, archive_id: Optional[str]):
+        """Forget an item, so it is downloaded again."""
+        if not archive_id:
+            return
+        with self._lock:
+            ids = self._load()
+            if archive_id not in ids:
+                return
+            ids.discard(archive_id)
+            self._write_all(ids)
+    
+    def contains_info(self, video_infos: Dict) -> bool:
+        """Check whether a resolved video was already downloaded."""
+        archive_id = archive_id_from_info(video_infos)
+        return archive_id is not None and archive_id in self
+    
+    def rebuild(self, directory: str) -> int:
+        """
+        Rebuild the archive from the tagged media files in a directory.
+        
+        Args:
+            directory: Folder to scan for files tagged with their archive key
+        
+        Returns:
+            Number of items found
+        """
+        found = set()
+        try:
+            with os.scandir(directory) as it:
+                for entry in it:
+                    if entry.is_file() and entry.name.lower().endswith(MEDIA_EXTENSIONS):
+                        archive_id = read_archive_id(entry.path)
+                        if archive_id:
+                            found.add(archive_id)
+        except OSError as e:
+            print(f"Warning: Could not scan {directory} for the download archive: {e}")
+            return 0
+        
+        with self._lock:
+            ids = self._load()
+            ids.update(found)
+            self._write_all(ids)
+        return len(found)
+    
+    def _write_all(self, ids: Set[str]):
+        """Rewrite the whole archive file (lock must be held)."""
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            with open(self.path, 'w', encoding='utf-8') as f:
+                f.writelines(archive_id + '\n' for archive_id in sorted(ids))
+        except OSError as e:
+            print(f"Warning: Could not write download archive {self.path}: {e}")
+
+
+_archives: Dict[str, DownloadArchive] = {}
+_archives_lock = threading.Lock()
+
+
+def get_download_archive(output_directory: str, scope: str) -> Optional[DownloadArchive]:
+    """
+    Return the shared archive for a download.
+    
+    Args:
+        output_directory: Folder the files are downloaded to
+        scope: "directory" for one archive per output folder, "global" for a
+            single archive, anything else disables the archive
+    
+    Returns:
+        The archive, or None if disabled
+    """
+    if scope == "directory":
+        path = os.path.join(output_directory, DOWNLOAD_ARCHIVE_FILENAME)
+    elif scope == "global":
+        path = GLOBAL_DOWNLOAD_ARCHIVE_PATH
+    else:
+        return None
+    
+    path = os.path.abspath(path)
+    with _archives_lock:
+        archive = _archives.get(path)
+        if archive is None:
+            archive = DownloadArchive(path)
+            # First use of a per-folder archive: pick up what is already there
+            if scope == "directory" and not os.path.exists(path) and os.path.isdir(output_directory):
+                found = archive.rebuild(output_directory)
+                if found:
+                    print(f"Download archive rebuilt from {found} existing files in {output_directory}")
+            _archives[path] = archive
+    return archive
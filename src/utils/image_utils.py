@@ -1,12 +1,16 @@
 """
 Image processing utilities for thumbnails and icons.
 """
-import urllib.request
 from io import BytesIO
-from PIL import Image, ImageTk
-from typing import Optional, Tuple
+from typing import TYPE_CHECKING, Optional, Tuple
 
-def load_thumbnail(thumbnail_url: str, size: Tuple[int, int] = (100, 60), is_music: bool = False) -> Optional[Image.Image]:
+from .thumbnail_cache import thumbnail_cache
+
+# PIL is imported on first use, it is not needed to show the window
+if TYPE_CHECKING:
+    from PIL import Image
+
+def load_thumbnail(thumbnail_url: str, size: Tuple[int, int] = (100, 60), is_music: bool = False) -> Optional["Image.Image"]:
     """
     Load and process a thumbnail image from a URL.
     
@@ -21,10 +25,11 @@ def load_thumbnail(thumbnail_url: str, size: Tuple[int, int] = (100, 60), is_mus
     if not thumbnail_url:
         return create_default_thumbnail(size)
     
+    from PIL import Image
     try:
-        u = urllib.request.urlopen(thumbnail_url)
-        raw_data = u.read()
-        u.close()
+        raw_data = thumbnail_cache.get(thumbnail_url)
+        if raw_data is None:
+            return create_default_thumbnail(size)
         im = Image.open(BytesIO(raw_data))
         
         if is_music:
@@ -45,8 +50,9 @@ def load_thumbnail(thumbnail_url: str, size: Tuple[int, int] = (100, 60), is_mus
         print(f"Could not load thumbnail: {e}")
         return create_default_thumbnail(size)
 
-def create_default_thumbnail(size: Tuple[int, int] = (100, 60)) -> Image.Image:
+def create_default_thumbnail(size: Tuple[int, int] = (100, 60)) -> "Image.Image":
     """Create a default gray thumbnail image."""
+    from PIL import Image
     return Image.new('RGB', size, color='gray')
 
 def load_icon(icon_path: str, root_window) -> bool:
@@ -66,6 +72,8 @@ def load_icon(icon_path: str, root_window) -> bool:
     except Exception:
         # If .ico doesn't work, try to use it as a PhotoImage instead
         try:
+            # ImageTk needs tkinter, only the GUI loads it
+            from PIL import Image, ImageTk
             icon_image = Image.open(icon_path)
             icon_photo = ImageTk.PhotoImage(icon_image)
             root_window.iconphoto(False, icon_photo)
@@ -74,29 +82,36 @@ def load_icon(icon_path: str, root_window) -> bool:
             # If all else fails, just continue without an icon
             return False
 
-def crop_album_cover(thumbnail_url: str) -> Optional[bytes]:
+def crop_album_cover(thumbnail_url: str, local_path: Optional[str] = None, square: bool = True) -> Optional[bytes]:
     """
     Download and crop thumbnail for use as album cover.
     
     Args:
         thumbnail_url: URL of the thumbnail
+        local_path: Thumbnail file already written by yt-dlp, if any
+        square: Whether to crop to square (False keeps the video aspect ratio)
     
     Returns:
         JPEG image data as bytes, or None if processing fails
     """
+    from PIL import Image
     try:
-        u = urllib.request.urlopen(thumbnail_url)
-        raw_data = u.read()
-        u.close()
+        raw_data = thumbnail_cache.get(thumbnail_url, local_path)
+        if raw_data is None:
+            return None
         im = Image.open(BytesIO(raw_data))
 
-        # Crop to square
-        width, height = im.size
-        left = int((width - height) / 2)
-        top = 0
-        right = width - int((width - height) / 2)
-        bottom = height
-        album_im = im.crop((left, top, right, bottom))
+        album_im = im
+        if square:
+            # Crop to square
+            width, height = im.size
+            left = int((width - height) / 2)
+            top = 0
+            right = width - int((width - height) / 2)
+            bottom = height
+            album_im = im.crop((left, top, right, bottom))
+        if album_im.mode not in ('RGB', 'L'):
+            album_im = album_im.convert('RGB')
         
         # Convert to JPEG bytes
         with BytesIO() as output:
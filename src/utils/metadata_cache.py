@@ -0,0 +1,153 @@
+"""
+Persistent SQLite cache for resolved video and playlist metadata.
+"""
+import json
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from config import (
+    METADATA_CACHE_PATH, METADATA_CACHE_MAX_BYTES, METADATA_CACHE_TTLS, METADATA_CACHE_STRIPPED_FIELDS
+)
+
+# Query parameters that do not change what a URL points to
+TRACKING_PARAMS = {'si', 'feature', 'pp', 'fbclid', 'gclid'}
+
+
+def canonicalize_url(url: str) -> str:
+    """Normalize a URL so equivalent links share a cache entry."""
+    parts = urlsplit(url.strip())
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if key not in TRACKING_PARAMS and not key.startswith('utm_')
+    )
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path.rstrip('/'), urlencode(query), ''))
+
+
+def strip_bulky_fields(info: Any) -> Any:
+    """Drop fields that are large and unused by the application (subtitles, comments...)."""
+    if isinstance(info, dict):
+        return {key: strip_bulky_fields(value) for key, value in info.items()
+                if key not in METADATA_CACHE_STRIPPED_FIELDS}
+    if isinstance(info, list):
+        return [strip_bulky_fields(value) for value in info]
+    return info
+
+
+class MetadataCache:
+    """On-disk cache of extract_info results.
+    
+    Entries are keyed by canonical URL plus playlist range, expire after a
+    per-extractor TTL and are stored compressed. The least recently used
+    entries are evicted once the cache grows beyond its size cap.
+    """
+    
+    def __init__(self, path: str, max_bytes: int):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._connection: Optional[sqlite3.Connection] = None
+    
+    @staticmethod
+    def make_key(url: str, is_playlist: bool, playlist_start: int, playlist_end: int, flat: bool = False) -> str:
+        """Cache key for a URL and the requested playlist range (flat listings are kept apart)."""
+        if not is_playlist:
+            return f"{canonicalize_url(url)}|single"
+        mode = "flat" if flat else "playlist"
+        return f"{canonicalize_url(url)}|{mode}|{playlist_start}-{playlist_end}"
+    
+    @staticmethod
+    def get_ttl(extractor_key: Optional[str]) -> float:
+        """Time-to-live in seconds for metadata from an extractor."""
+        return METADATA_CACHE_TTLS.get(extractor_key or '', METADATA_CACHE_TTLS['default'])
+    
+    def _connect(self) -> sqlite3.Connection:
+        """Open the database on first use (lock must be held)."""
+        if self._connection is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            self._connection = sqlite3.connect(self.path, check_same_thread=False)
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS metadata ("
+                " key TEXT PRIMARY KEY,"
+                " extractor TEXT,"
+                " fetched_at REAL NOT NULL,"
+                " accessed_at REAL NOT NULL,"
+                " extraction_time REAL,"
+                " size INTEGER NOT NULL,"
+                " data BLOB NOT NULL)"
+            )
+        return self._connection
+    
+    def get(self, key: str) -> Optional[Tuple[Dict, float, bool]]:
+        """
+        Look up cached metadata.
+        
+        Args:
+            key: Key built by make_key
+        
+        Returns:
+            (info, extraction_time, needs_refresh) or None on a miss or an expired entry.
+            needs_refresh is True once the entry is past half of its TTL.
+        """
+        try:
+            with self._lock:
+                connection = self._connect()
+                row = connection.execute(
+                    "SELECT extractor, fetched_at, extraction_time, data FROM metadata WHERE key = ?", (key,)
+                ).fetchone()
+                if row is None:
+                    return None
+                
+                extractor, fetched_at, extraction_time, data = row
+                age = time.time() - fetched_at
+                ttl = self.get_ttl(extractor)
+                if age > ttl:
+                    connection.execute("DELETE FROM metadata WHERE key = ?", (key,))
+                    connection.commit()
+                    return None
+                
+                connection.execute("UPDATE metadata SET accessed_at = ? WHERE key = ?", (time.time(), key))
+                connection.commit()
+            
+            info = json.loads(zlib.decompress(data).decode('utf-8'))
+            return info, extraction_time or 0.0, age > ttl / 2
+        except (sqlite3.Error, zlib.error, ValueError) as e:
+            print(f"Warning: Could not read metadata cache: {e}")
+            return None
+    
+    def put(self, key: str, info: Dict, extraction_time: Optional[float] = None):
+        """Store JSON-serializable metadata, stripped of bulky fields."""
+        try:
+            data = zlib.compress(json.dumps(strip_bulky_fields(info), default=repr).encode('utf-8'))
+            now = time.time()
+            with self._lock:
+                connection = self._connect()
+                connection.execute(
+                    "INSERT OR REPLACE INTO metadata VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (key, info.get('extractor_key'), now, now, extraction_time, len(data), data)
+                )
+                self._evict(connection)
+                connection.commit()
+        except (sqlite3.Error, TypeError, ValueError) as e:
+            print(f"Warning: Could not write metadata cache: {e}")
+    
+    def _evict(self, connection: sqlite3.Connection):
+        """Delete the least recently used entries beyond the size cap (lock must be held)."""
+        total = connection.execute("SELECT COALESCE(SUM(size), 0) FROM metadata").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        
+        rows = connection.execute("SELECT key, size FROM metadata ORDER BY accessed_at").fetchall()
+        for key, size in rows:
+            if total <= self.max_bytes:
+                break
+            connection.execute("DELETE FROM metadata WHERE key = ?", (key,))
+            total -= size
+
+
+# Global metadata cache instance
+metadata_cache = MetadataCache(METADATA_CACHE_PATH, METADATA_CACHE_MAX_BYTES)
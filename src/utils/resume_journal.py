@@ -0,0 +1,132 @@
+"""
+Sidecar journal recording unfinished download jobs so they can be resumed.
+"""
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from dataclasses import asdict, fields
+from typing import List, Optional, Set
+
+from config import RESUME_JOURNAL_PREFIX
+
+from models import DownloadConfig
+
+
+class ResumeJournal:
+    """Small JSON file kept next to the downloads while a job is unfinished.
+    
+    It stores the job configuration and the items already completed. yt-dlp keeps
+    its .part files, so when an interrupted job is started again, finished items
+    are skipped and partial files continue from their last byte.
+    """
+    
+    def __init__(self, path: str, config: DownloadConfig, completed_items: Optional[Set[str]] = None,
+                 created_at: Optional[float] = None):
+        self.path = path
+        self.config = config
+        self.completed_items = completed_items or set()
+        self.created_at = created_at or time.time()
+        self._lock = threading.Lock()
+    
+    @staticmethod
+    def job_key(config: DownloadConfig) -> str:
+        """Identify a job by what it downloads, so a restarted job finds its journal."""
+        parts = [config.url, config.file_format, config.bitrate, config.quality,
+                 str(config.is_playlist), str(config.playlist_start), str(config.playlist_end)]
+        if config.audio_passthrough:
+            # Only added when set, so the journals of earlier runs keep their key
+            parts.append('passthrough')
+        return hashlib.sha1('|'.join(parts).encode('utf-8')).hexdigest()[:16]
+    
+    @classmethod
+    def open(cls, config: DownloadConfig) -> "ResumeJournal":
+        """Open the journal of a job, picking up the progress of an earlier interrupted run."""
+        path = os.path.join(config.output_directory, f"{RESUME_JOURNAL_PREFIX}{cls.job_key(config)}.json")
+        journal = cls.load(path) or cls(path, config)
+        journal.config = config
+        journal._write()
+        return journal
+    
+    @classmethod
+    def load(cls, path: str) -> Optional["ResumeJournal"]:
+        """Load a journal file, or return None if it is missing or unreadable."""
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+            known_fields = {field.name for field in fields(DownloadConfig)}
+            config = DownloadConfig(**{key: value for key, value in data['config'].items() if key in known_fields})
+            return cls(path, config, set(data.get('completed_items', [])), data.get('created_at'))
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"Warning: Could not read download journal {path}: {e}")
+            return None
+    
+    def is_done(self, archive_id: Optional[str]) -> bool:
+        """Whether an item was completed by an earlier run of this job."""
+        with self._lock:
+            return archive_id is not None and archive_id in self.completed_items
+    
+    def mark_item_done(self, archive_id: Optional[str]):
+        """Record a completed item."""
+        if not archive_id:
+            return
+        with self._lock:
+            self.completed_items.add(archive_id)
+            self._write()
+    
+    def discard(self):
+        """Delete the journal once the job has completed."""
+        with self._lock:
+            try:
+                os.remove(self.path)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                print(f"Warning: Could not remove download journal {self.path}: {e}")
+    
+    def _write(self):
+        """Write the journal atomically."""
+        data = {
+            'config': asdict(self.config),
+            'completed_items': sorted(self.completed_items),
+            'created_at': self.created_at
+        }
+        try:
+            fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(self.path) or '.', suffix='.tmp')
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                json.dump(data, f, indent=2, ensure_ascii=False)
+            os.replace(temp_path, self.path)
+        except OSError as e:
+            print(f"Warning: Could not write download journal {self.path}: {e}")
+
+
+def find_unfinished_jobs(directory: str) -> List[ResumeJournal]:
+    """Return the journals of interrupted jobs in an output directory, oldest first."""
+    journals = []
+    try:
+        with os.scandir(directory) as it:
+            for entry in it:
+                if entry.name.startswith(RESUME_JOURNAL_PREFIX) and entry.name.endswith('.json'):
+                    journal = ResumeJournal.load(entry.path)
+                    if journal:
+                        journals.append(journal)
+    except OSError:
+        return []
+    return sorted(journals, key=lambda journal: journal.created_at)
+
+
+def get_partial_bytes(directory: str) -> int:
+    """Total size of the partial (.part) files waiting to be resumed in a directory."""
+    total = 0
+    try:
+        with os.scandir(directory) as it:
+            for entry in it:
+                if entry.is_file() and entry.name.endswith('.part'):
+                    total += entry.stat().st_size
+    except OSError:
+        pass
+    return total
@@ -1,14 +1,28 @@
 """
 Settings manager for persistent application configuration.
 """
+import atexit
 import json
 import os
+import tempfile
+import threading
 from pathlib import Path
 from typing import Dict, Any, Optional
 
+from config import (
+    DEFAULT_CONCURRENT_DOWNLOADS, DEFAULT_DOWNLOAD_ARCHIVE_SCOPE, DEFAULT_RESUMABLE_DOWNLOADS,
+    DEFAULT_INCREMENTAL_PLAYLISTS, DEFAULT_MAX_TRANSCODE_WORKERS, DEFAULT_BANDWIDTH_LIMIT_KBPS,
+    DEFAULT_AUDIO_PASSTHROUGH, DEFAULT_VIDEO_FORMAT_POLICY, SETTINGS_FLUSH_DELAY
+)
+
 
 class SettingsManager:
-    """Manages persistent application settings."""
+    """Manages persistent application settings.
+    
+    Settings are read from disk once and kept in memory. Changes mark the cache
+    dirty and are written back by a debounced background timer, using a temporary
+    file and an atomic rename, with a final flush when the application exits.
+    """
     
     def __init__(self):
         """Initialize settings manager with appropriate config directory."""
@@ -22,8 +36,22 @@ class SettingsManager:
             "last_bitrate": "192Kbps",
             "last_quality": "720p",
             "last_playlist_mode": False,  # True for playlist, False for single video
-            "last_format_var": 1  # 1 for MP3, 2 for MP4
+            "last_format_var": 1,  # 1 for MP3, 2 for MP4
+            "concurrent_downloads": DEFAULT_CONCURRENT_DOWNLOADS,  # playlist items downloaded in parallel
+            "download_archive_scope": DEFAULT_DOWNLOAD_ARCHIVE_SCOPE,  # "directory", "global" or "off"
+            "resumable_downloads": DEFAULT_RESUMABLE_DOWNLOADS,
+            "incremental_playlists": DEFAULT_INCREMENTAL_PLAYLISTS,  # start downloading before the whole playlist is resolved
+            "max_transcode_workers": DEFAULT_MAX_TRANSCODE_WORKERS,  # parallel FFmpeg conversions, also bounded by the CPU count
+            "audio_passthrough": DEFAULT_AUDIO_PASSTHROUGH,  # keep M4A/Opus audio instead of encoding MP3
+            "video_format_policy": DEFAULT_VIDEO_FORMAT_POLICY,  # "smallest", "fastest" or "best" MP4 formats
+            "bandwidth_limit_kbps": DEFAULT_BANDWIDTH_LIMIT_KBPS,  # total download rate of all jobs, 0 for unlimited
+            "bandwidth_schedule": []  # [{"start": "09:00", "end": "18:00", "limit_kbps": 500}], overrides the limit
         }
+        self._lock = threading.RLock()
+        self._settings: Optional[Dict[str, Any]] = None
+        self._dirty = False
+        self._flush_timer: Optional[threading.Timer] = None
+        atexit.register(self.flush)
         
     def _get_config_directory(self) -> Path:
         """Get the project directory for configuration storage."""
@@ -41,8 +69,8 @@ class SettingsManager:
         except Exception as e:
             print(f"Warning: Could not verify config directory {self.config_dir}: {e}")
     
-    def load_settings(self) -> Dict[str, Any]:
-        """Load settings from config file."""
+    def _read_settings_file(self) -> Dict[str, Any]:
+        """Read settings from the config file, merged with defaults."""
         try:
             if self.config_file.exists():
                 with open(self.config_file, 'r', encoding='utf-8') as f:
@@ -57,18 +85,71 @@ class SettingsManager:
             print(f"Warning: Could not load settings from {self.config_file}: {e}")
             return self._default_settings.copy()
     
+    def _get_cached_settings(self) -> Dict[str, Any]:
+        """Return the in-memory settings, loading them on first use (lock must be held)."""
+        if self._settings is None:
+            self._settings = self._read_settings_file()
+        return self._settings
+    
+    def load_settings(self) -> Dict[str, Any]:
+        """Load settings (a copy of the in-memory cache)."""
+        with self._lock:
+            return self._get_cached_settings().copy()
+    
     def save_settings(self, settings: Dict[str, Any]):
-        """Save settings to config file."""
-        try:
-            with open(self.config_file, 'w', encoding='utf-8') as f:
-                json.dump(settings, f, indent=2, ensure_ascii=False)
-        except Exception as e:
-            print(f"Warning: Could not save settings to {self.config_file}: {e}")
+        """Replace the settings and schedule a write to the config file."""
+        with self._lock:
+            self._settings = dict(settings)
+            self._mark_dirty()
+    
+    def _update_settings(self, values: Dict[str, Any]):
+        """Update some settings and schedule a write if anything changed."""
+        with self._lock:
+            settings = self._get_cached_settings()
+            if all(key in settings and settings[key] == value for key, value in values.items()):
+                return
+            settings.update(values)
+            self._mark_dirty()
+    
+    def _mark_dirty(self):
+        """Mark the cache dirty and (re)start the debounced flush timer (lock must be held)."""
+        self._dirty = True
+        if self._flush_timer is not None:
+            self._flush_timer.cancel()
+        self._flush_timer = threading.Timer(SETTINGS_FLUSH_DELAY, self.flush)
+        self._flush_timer.daemon = True
+        self._flush_timer.start()
+    
+    def flush(self):
+        """Write pending changes to the config file atomically."""
+        with self._lock:
+            if self._flush_timer is not None:
+                self._flush_timer.cancel()
+                self._flush_timer = None
+            if not self._dirty or self._settings is None:
+                return
+            settings = self._settings.copy()
+            
+            try:
+                fd, temp_path = tempfile.mkstemp(
+                    dir=self.config_file.parent, prefix=f".{self.config_file.name}.", suffix=".tmp"
+                )
+                try:
+                    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                        json.dump(settings, f, indent=2, ensure_ascii=False)
+                    os.replace(temp_path, self.config_file)
+                except Exception:
+                    os.unlink(temp_path)
+                    raise
+            except Exception as e:
+                # Still dirty: the next change or the exit flush tries again
+                print(f"Warning: Could not save settings to {self.config_file}: {e}")
+                return
+            self._dirty = False
     
     def get_last_download_directory(self) -> str:
         """Get the last used download directory."""
-        settings = self.load_settings()
-        last_dir = settings.get("last_download_directory", "")
+        last_dir = self.get_setting("last_download_directory", "")
         
         # Verify the directory still exists if it was previously set
         if last_dir and os.path.exists(last_dir) and os.path.isdir(last_dir):
@@ -82,39 +163,59 @@ class SettingsManager:
         if not directory or not os.path.exists(directory):
             return
         
-        settings = self.load_settings()
-        settings["last_download_directory"] = directory
-        self.save_settings(settings)
+        self._update_settings({"last_download_directory": directory})
     
     def get_setting(self, key: str, default: Any = None) -> Any:
         """Get a specific setting value."""
-        settings = self.load_settings()
-        return settings.get(key, default)
+        with self._lock:
+            return self._get_cached_settings().get(key, default)
     
     def set_setting(self, key: str, value: Any):
         """Set a specific setting value."""
-        settings = self.load_settings()
-        settings[key] = value
-        self.save_settings(settings)
+        self._update_settings({key: value})
+    
+    def get_download_options(self) -> Dict[str, Any]:
+        """Get the download tuning settings, keyed by DownloadConfig field name."""
+        with self._lock:
+            settings = self._get_cached_settings()
+            return {
+                "concurrent_downloads": settings.get("concurrent_downloads", DEFAULT_CONCURRENT_DOWNLOADS),
+                "archive_scope": settings.get("download_archive_scope", DEFAULT_DOWNLOAD_ARCHIVE_SCOPE),
+                "resumable": settings.get("resumable_downloads", DEFAULT_RESUMABLE_DOWNLOADS),
+                "incremental_playlist": settings.get("incremental_playlists", DEFAULT_INCREMENTAL_PLAYLISTS),
+                "max_transcode_workers": settings.get("max_transcode_workers", DEFAULT_MAX_TRANSCODE_WORKERS),
+                "audio_passthrough": settings.get("audio_passthrough", DEFAULT_AUDIO_PASSTHROUGH),
+                "video_format_policy": settings.get("video_format_policy", DEFAULT_VIDEO_FORMAT_POLICY)
+            }
+    
+    def get_bandwidth_settings(self) -> Dict[str, Any]:
+        """Get the global download rate limit (KB/s) and its time-of-day schedule."""
+        with self._lock:
+            settings = self._get_cached_settings()
+            return {
+                "limit_kbps": settings.get("bandwidth_limit_kbps", DEFAULT_BANDWIDTH_LIMIT_KBPS),
+                "schedule": list(settings.get("bandwidth_schedule") or [])
+            }
     
     def get_last_format_preferences(self) -> Dict[str, Any]:
         """Get the last used format preferences."""
-        settings = self.load_settings()
-        return {
-            "format_var": settings.get("last_format_var", 1),
-            "bitrate": settings.get("last_bitrate", "192Kbps"),
-            "quality": settings.get("last_quality", "720p"),
-            "playlist_mode": settings.get("last_playlist_mode", False)
-        }
+        with self._lock:
+            settings = self._get_cached_settings()
+            return {
+                "format_var": settings.get("last_format_var", 1),
+                "bitrate": settings.get("last_bitrate", "192Kbps"),
+                "quality": settings.get("last_quality", "720p"),
+                "playlist_mode": settings.get("last_playlist_mode", False)
+            }
     
     def save_format_preferences(self, format_var: int, bitrate: str, quality: str, playlist_mode: bool):
         """Save format preferences."""
-        settings = self.load_settings()
-        settings["last_format_var"] = format_var
-        settings["last_bitrate"] = bitrate
-        settings["last_quality"] = quality
-        settings["last_playlist_mode"] = playlist_mode
-        self.save_settings(settings)
+        self._update_settings({
+            "last_format_var": format_var,
+            "last_bitrate": bitrate,
+            "last_quality": quality,
+            "last_playlist_mode": playlist_mode
+        })
 
 
 # Global settings manager instance
@@ -0,0 +1,167 @@
+"""
+Per-stage timings of the downloads, aggregated per job and per extractor.
+"""
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from config import METRICS_JSON_PATH, METRICS_PROMETHEUS_PATH, METRICS_MAX_JOBS
+
+# Stages in the order an item goes through them
+STAGES = ('extraction', 'resolve', 'network', 'ffmpeg', 'cover', 'tagging', 'rename')
+
+
+def extractor_of(info: Optional[Dict]) -> str:
+    """Extractor name of an info dict (flat playlist entries only carry ie_key)."""
+    info = info or {}
+    return info.get('extractor_key') or info.get('ie_key') or 'unknown'
+
+
+class StageMetrics:
+    """Thread-safe timers for the stages of every download.
+    
+    Each measurement adds to a (count, total, max) aggregate, kept per job (the
+    most recent jobs only) and per extractor over the whole session. Both views
+    are exported as JSON and in the Prometheus text format.
+    """
+    
+    def __init__(self, json_path: str, prometheus_path: str, max_jobs: int):
+        self.json_path = json_path
+        self.prometheus_path = prometheus_path
+        self.max_jobs = max_jobs
+        self._lock = threading.Lock()
+        self._jobs: "OrderedDict[int, Dict[Tuple[str, str], List[float]]]" = OrderedDict()
+        self._extractors: Dict[Tuple[str, str], List[float]] = {}
+    
+    @contextmanager
+    def measure(self, stage: str, job_id: Optional[int], extractor: str) -> Iterator[None]:
+        """Time the enclosed block as one run of a stage."""
+        start_time = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage, job_id, extractor, time.perf_counter() - start_time)
+    
+    def record(self, stage: str, job_id: Optional[int], extractor: str, seconds: float):
+        """Add one run of a stage to the job and extractor aggregates."""
+        with self._lock:
+            if job_id is not None:
+                if job_id not in self._jobs:
+                    self._jobs[job_id] = {}
+                    while len(self._jobs) > self.max_jobs:
+                        self._jobs.popitem(last=False)
+                self._add(self._jobs[job_id], (extractor, stage), seconds)
+            self._add(self._extractors, (extractor, stage), seconds)
+    
+    @staticmethod
+    def _add(aggregates: Dict[Tuple[str, str], List[float]], key: Tuple[str, str], seconds: float):
+        """Update a [count, total, max] aggregate (lock must be held)."""
+        aggregate = aggregates.setdefault(key, [0, 0.0, 0.0])
+        aggregate[0] += 1
+        aggregate[1] += seconds
+        aggregate[2] = max(aggregate[2], seconds)
+    
+    def rows(self) -> List[Tuple[str, str, str, int, float, float]]:
+        """(job, extractor, stage, count, total, max) rows, newest job first, then the per-extractor totals."""
+        order = {stage: position for position, stage in enumerate(STAGES)}
+        
+        def sort_key(item):
+            (extractor, stage), _ = item
+            return extractor, order.get(stage, len(order))
+        
+        with self._lock:
+            rows = [
+                (str(job_id), extractor, stage, int(count), total, maximum)
+                for job_id, aggregates in reversed(self._jobs.items())
+                for (extractor, stage), (count, total, maximum) in sorted(aggregates.items(), key=sort_key)
+            ]
+            rows += [
+                ('all', extractor, stage, int(count), total, maximum)
+                for (extractor, stage), (count, total, maximum) in sorted(self._extractors.items(), key=sort_key)
+            ]
+        return rows
+    
+    def snapshot(self) -> Dict:
+        """All aggregates as nested dictionaries: jobs -> extractor -> stage, and extractors -> stage."""
+        snapshot = {'time': time.time(), 'jobs': {}, 'extractors': {}}
+        for job, extractor, stage, count, total, maximum in self.rows():
+            values = {'count': count, 'total_seconds': round(total, 6), 'max_seconds': round(maximum, 6)}
+            if job == 'all':
+                snapshot['extractors'].setdefault(extractor, {})[stage] = values
+            else:
+                snapshot['jobs'].setdefault(job, {}).setdefault(extractor, {})[stage] = values
+        return snapshot
+    
+    def format_job(self, job_id: int) -> str:
+        """One-line summary of a job's stages (total time and runs)."""
+        totals: Dict[str, List[float]] = {}
+        for job, _, stage, count, total, _ in self.rows():
+            if job == str(job_id):
+                stage_totals = totals.setdefault(stage, [0, 0.0])
+                stage_totals[0] += count
+                stage_totals[1] += total
+        if not totals:
+            return "no timings"
+        return ", ".join(
+            f"{stage} {totals[stage][1]:.2f}s/{int(totals[stage][0])}"
+            for stage in sorted(totals, key=lambda stage: STAGES.index(stage) if stage in STAGES else len(STAGES))
+        )
+    
+    def to_prometheus(self) -> str:
+        """Aggregates in the Prometheus text exposition format."""
+        metrics = (
+            ('stage_seconds_total', 'counter', "Time spent in each download stage", 4),
+            ('stage_runs_total', 'counter', "Number of runs of each download stage", 3),
+            ('stage_max_seconds', 'gauge', "Longest single run of each download stage", 5)
+        )
+        rows = self.rows()
+        lines = []
+        # Session totals per extractor, and the same metrics for each recent job
+        for prefix, scope in (('ytdlp_gui_', "per extractor."), ('ytdlp_gui_job_', "per job and extractor.")):
+            for name, metric_type, description, column in metrics:
+                lines.append(f"# HELP {prefix}{name} {description}, {scope}")
+                lines.append(f"# TYPE {prefix}{name} {metric_type}")
+                for row in rows:
+                    job, extractor, stage = row[:3]
+                    if (job == 'all') != (prefix == 'ytdlp_gui_'):
+                        continue
+                    labels = f'extractor="{self._escape(extractor)}",stage="{stage}"'
+                    if job != 'all':
+                        labels = f'job="{job}",{labels}'
+                    lines.append(f"{prefix}{name}{{{labels}}} {row[column]:.6g}")
+        return "\n".join(lines) + "\n"
+    
+    @staticmethod
+    def _escape(value: str) -> str:
+        """Escape a Prometheus label value."""
+        return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    
+    def export(self):
+        """Write the metrics file in JSON and in the Prometheus text format."""
+        try:
+            self._write_file(self.json_path, json.dumps(self.snapshot(), indent=2))
+            self._write_file(self.prometheus_path, self.to_prometheus())
+        except OSError as e:
+            print(f"Warning: Could not write the metrics files: {e}")
+    
+    @staticmethod
+    def _write_file(path: str, text: str):
+        """Write a file atomically."""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'w', encoding='utf-8') as f:
+                f.write(text)
+            os.replace(temp_path, path)
+        except Exception:
+            os.unlink(temp_path)
+            raise
+
+
+# Global stage metrics instance
+stage_metrics = StageMetrics(METRICS_JSON_PATH, METRICS_PROMETHEUS_PATH, METRICS_MAX_JOBS)
@@ -0,0 +1,148 @@
+"""
+Single-write metadata tagging for downloaded audio and video files.
+
+mutagen is imported on first use, it is not needed to start the application.
+"""
+import base64
+from dataclasses import dataclass
+from typing import Optional
+
+# Containers tagged with MP4 atoms
+MP4_FORMATS = ("mp4", "m4a")
+
+# Custom tag holding the download archive key ("<extractor> <video id>")
+ARCHIVE_ID_TAG = "YTDLP_ARCHIVE_ID"
+MP4_ARCHIVE_ID_ATOM = f"----:com.apple.iTunes:{ARCHIVE_ID_TAG}"
+
+
+@dataclass
+class TrackTags:
+    """Metadata written to a file in a single pass."""
+    artist: str = ""
+    album: str = ""
+    title: str = ""
+    cover: Optional[bytes] = None  # JPEG image data
+    archive_id: str = ""  # download archive key, used to rebuild the archive from files
+
+
+def write_tags(file_path: str, file_format: str, tags: TrackTags) -> bool:
+    """
+    Build every tag in memory and write the file once.
+    
+    Args:
+        file_path: Path of the file to tag
+        file_format: Container of the file (mp3, mp4, m4a or opus)
+        tags: Metadata to write
+    
+    Returns:
+        True if the tags were written, False otherwise
+    """
+    try:
+        if file_format == "mp3":
+            _write_id3_tags(file_path, tags)
+        elif file_format in MP4_FORMATS:
+            _write_mp4_tags(file_path, tags)
+        elif file_format == "opus":
+            _write_opus_tags(file_path, tags)
+        else:
+            return False
+        return True
+    except Exception as e:
+        print(f"Warning: Could not add metadata to {file_format.upper()} file: {e}")
+        return False
+
+
+def _write_id3_tags(file_path: str, tags: TrackTags):
+    """Write artist, album, title and cover frames to an MP3 file."""
+    from mutagen.id3 import ID3, ID3NoHeaderError, APIC, TALB, TIT2, TPE1, TXXX
+    
+    try:
+        audio = ID3(file_path)
+    except ID3NoHeaderError:
+        audio = ID3()
+    
+    if tags.artist:
+        audio.setall('TPE1', [TPE1(encoding=3, text=tags.artist)])
+    if tags.album:
+        audio.setall('TALB', [TALB(encoding=3, text=tags.album)])
+    if tags.title:
+        audio.setall('TIT2', [TIT2(encoding=3, text=tags.title)])
+    if tags.cover:
+        audio.setall('APIC', [APIC(
+            encoding=0,
+            mime='image/jpeg',
+            type=3,
+            desc=u'Cover',
+            data=tags.cover
+        )])
+    if tags.archive_id:
+        audio.setall(f'TXXX:{ARCHIVE_ID_TAG}', [TXXX(encoding=3, desc=ARCHIVE_ID_TAG, text=tags.archive_id)])
+    
+    audio.save(file_path)
+
+
+def _write_mp4_tags(file_path: str, tags: TrackTags):
+    """Write artist, album, title and cover atoms to an MP4/M4A file."""
+    from mutagen.mp4 import MP4, MP4Cover, MP4FreeForm
+    
+    video = MP4(file_path)
+    if video.tags is None:
+        video.add_tags()
+    
+    if tags.artist:
+        video.tags['\xa9ART'] = [tags.artist]
+    if tags.album:
+        video.tags['\xa9alb'] = [tags.album]
+    if tags.title:
+        video.tags['\xa9nam'] = [tags.title]
+    if tags.cover:
+        video.tags['covr'] = [MP4Cover(tags.cover, imageformat=MP4Cover.FORMAT_JPEG)]
+    if tags.archive_id:
+        video.tags[MP4_ARCHIVE_ID_ATOM] = [MP4FreeForm(tags.archive_id.encode('utf-8'))]
+    
+    video.save()
+
+
+def _write_opus_tags(file_path: str, tags: TrackTags):
+    """Write artist, album, title and cover comments to an Ogg Opus file."""
+    from mutagen.flac import Picture
+    from mutagen.oggopus import OggOpus
+    
+    audio = OggOpus(file_path)
+    if tags.artist:
+        audio['artist'] = [tags.artist]
+    if tags.album:
+        audio['album'] = [tags.album]
+    if tags.title:
+        audio['title'] = [tags.title]
+    if tags.cover:
+        picture = Picture()
+        picture.type = 3
+        picture.mime = 'image/jpeg'
+        picture.desc = 'Cover'
+        picture.data = tags.cover
+        audio['metadata_block_picture'] = [base64.b64encode(picture.write()).decode('ascii')]
+    if tags.archive_id:
+        audio[ARCHIVE_ID_TAG] = [tags.archive_id]
+    
+    audio.save()
+
+
+def read_archive_id(file_path: str) -> Optional[str]:
+    """Read the download archive key written by write_tags, if any."""
+    try:
+        if file_path.lower().endswith(".mp3"):
+            from mutagen.id3 import ID3
+            frames = ID3(file_path).getall(f'TXXX:{ARCHIVE_ID_TAG}')
+            return str(frames[0].text[0]) if frames else None
+        if file_path.lower().endswith(tuple(f".{ext}" for ext in MP4_FORMATS)):
+            from mutagen.mp4 import MP4
+            values = (MP4(file_path).tags or {}).get(MP4_ARCHIVE_ID_ATOM)
+            return bytes(values[0]).decode('utf-8') if values else None
+        if file_path.lower().endswith(".opus"):
+            from mutagen.oggopus import OggOpus
+            values = OggOpus(file_path).get(ARCHIVE_ID_TAG)
+            return values[0] if values else None
+    except Exception:
+        pass
+    return None
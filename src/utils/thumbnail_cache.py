@@ -0,0 +1,271 @@
+"""
+Two-tier (memory + disk) cache for thumbnail images.
+"""
+import hashlib
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+
+from config import (
+    THUMBNAIL_CACHE_DIR, THUMBNAIL_MEMORY_CACHE_ENTRIES, THUMBNAIL_DISK_CACHE_BYTES, THUMBNAIL_FETCH_TIMEOUT
+)
+
+
+class ThumbnailCache:
+    """Content-addressed thumbnail cache shared by the preview and the album-cover embedder.
+    
+    Image bytes are stored once per content hash, in a bounded in-memory LRU and in
+    an on-disk store evicted by total size (least recently used first). URLs map to
+    content hashes through small reference files, so identical images served from
+    different URLs are only stored once. Concurrent misses on a URL share one fetch.
+    """
+    
+    def __init__(self, cache_dir: str, memory_entries: int, disk_bytes: int):
+        self.cache_dir = cache_dir
+        self.objects_dir = os.path.join(cache_dir, 'objects')
+        self.refs_dir = os.path.join(cache_dir, 'refs')
+        self.memory_entries = memory_entries
+        self.disk_bytes = disk_bytes
+        self._memory: "OrderedDict[str, bytes]" = OrderedDict()
+        self._url_index: Dict[str, str] = {}
+        self._lock = threading.RLock()
+        self._disk_ready = False
+        self._disk_usage = 0  # bytes of the disk store, scanned once then kept up to date
+        self._in_flight: Dict[str, threading.Event] = {}
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.local_hits = 0
+        self.misses = 0
+    
+    def get(self, url: str, local_path: Optional[str] = None) -> Optional[bytes]:
+        """
+        Return the image bytes for a thumbnail URL.
+        
+        Args:
+            url: URL of the thumbnail image
+            local_path: Thumbnail file already written by yt-dlp, used instead of fetching
+        
+        Returns:
+            Image bytes, or None if the thumbnail could not be obtained
+        """
+        if not url and not local_path:
+            return None
+        
+        waited = False
+        while True:
+            with self._lock:
+                data = self._lookup(url)
+                if data is not None or waited:
+                    # After waiting, a miss means the other fetch failed
+                    return data
+                pending = self._in_flight.get(url) if url else None
+                if pending is None:
+                    if url:
+                        self._in_flight[url] = threading.Event()
+                    break
+            # Another thread is fetching this URL, its result lands in memory
+            pending.wait()
+            waited = True
+        
+        try:
+            data = self._read_local_file(local_path)
+            if data is not None:
+                with self._lock:
+                    self.local_hits += 1
+            else:
+                data = self._fetch(url)
+                with self._lock:
+                    self.misses += 1
+                if data is None:
+                    return None
+            
+            self.put(url, data)
+            return data
+        finally:
+            if url:
+                with self._lock:
+                    self._in_flight.pop(url).set()
+    
+    def put(self, url: str, data: bytes) -> str:
+        """Store image bytes for a URL in both tiers. Returns the content hash."""
+        content_hash = hashlib.sha256(data).hexdigest()
+        with self._lock:
+            self._remember(url, content_hash, data)
+            try:
+                self._write_object(content_hash, data)
+                if url:
+                    self._write_file(self._ref_path(url), content_hash.encode('ascii'))
+                self._evict_disk()
+            except OSError as e:
+                print(f"Warning: Could not write thumbnail cache: {e}")
+        return content_hash
+    
+    def stats(self) -> Dict[str, int]:
+        """Return hit and miss counters."""
+        with self._lock:
+            return {
+                'memory_hits': self.memory_hits,
+                'disk_hits': self.disk_hits,
+                'local_hits': self.local_hits,
+                'misses': self.misses
+            }
+    
+    def format_stats(self) -> str:
+        """Return the hit and miss counters as a readable string."""
+        stats = self.stats()
+        return (f"{stats['memory_hits']} memory hits, {stats['disk_hits']} disk hits, "
+                f"{stats['local_hits']} local file hits, {stats['misses']} misses")
+    
+    def _lookup(self, url: str) -> Optional[bytes]:
+        """Image bytes of a URL from memory or disk, counting the hit (lock must be held)."""
+        content_hash = self._url_index.get(url) or self._read_ref(url)
+        if not content_hash:
+            return None
+        data = self._memory.get(content_hash)
+        if data is not None:
+            self._memory.move_to_end(content_hash)
+            self.memory_hits += 1
+            return data
+        
+        data = self._read_object(content_hash)
+        if data is not None:
+            self._remember(url, content_hash, data)
+            self.disk_hits += 1
+        return data
+    
+    def _remember(self, url: str, content_hash: str, data: bytes):
+        """Add an entry to the memory LRU (lock must be held)."""
+        if url:
+            self._url_index[url] = content_hash
+        self._memory[content_hash] = data
+        self._memory.move_to_end(content_hash)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+    
+    def _fetch(self, url: str) -> Optional[bytes]:
+        """Download a thumbnail."""
+        if not url:
+            return None
+        # urllib.request pulls in http.client and ssl, only load it when a thumbnail is fetched
+        import urllib.request
+        try:
+            with urllib.request.urlopen(url, timeout=THUMBNAIL_FETCH_TIMEOUT) as response:
+                return response.read()
+        except Exception as e:
+            print(f"Could not fetch thumbnail: {e}")
+            return None
+    
+    def _read_local_file(self, path: Optional[str]) -> Optional[bytes]:
+        """Read a thumbnail file written by yt-dlp, if any."""
+        if not path or not os.path.isfile(path):
+            return None
+        try:
+            with open(path, 'rb') as f:
+                return f.read()
+        except OSError:
+            return None
+    
+    def _ensure_disk(self):
+        """Create the cache directories and measure the disk store on first use (lock must be held)."""
+        if not self._disk_ready:
+            os.makedirs(self.objects_dir, exist_ok=True)
+            os.makedirs(self.refs_dir, exist_ok=True)
+            self._disk_usage = sum(size for _, size, _ in self._scan_objects())
+            self._disk_ready = True
+    
+    def _ref_path(self, url: str) -> str:
+        """Path of the reference file mapping a URL to its content hash."""
+        return os.path.join(self.refs_dir, hashlib.sha256(url.encode('utf-8')).hexdigest())
+    
+    def _object_path(self, content_hash: str) -> str:
+        """Path of the stored image for a content hash."""
+        return os.path.join(self.objects_dir, content_hash)
+    
+    def _read_ref(self, url: str) -> Optional[str]:
+        """Look up the content hash of a URL on disk (lock must be held)."""
+        if not url:
+            return None
+        try:
+            with open(self._ref_path(url), 'r', encoding='ascii') as f:
+                return f.read().strip() or None
+        except OSError:
+            return None
+    
+    def _read_object(self, content_hash: str) -> Optional[bytes]:
+        """Read an image from the disk store and refresh its LRU timestamp (lock must be held)."""
+        path = self._object_path(content_hash)
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            os.utime(path)
+            return data
+        except OSError:
+            return None
+    
+    def _write_object(self, content_hash: str, data: bytes):
+        """Write an image to the disk store unless it is already there (lock must be held)."""
+        self._ensure_disk()
+        path = self._object_path(content_hash)
+        if os.path.exists(path):
+            os.utime(path)
+        else:
+            self._write_file(path, data)
+            self._disk_usage += len(data)
+    
+    def _write_file(self, path: str, data: bytes):
+        """Write a file atomically (lock must be held)."""
+        self._ensure_disk()
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(temp_path, path)
+        except Exception:
+            os.unlink(temp_path)
+            raise
+    
+    def _scan_objects(self) -> list:
+        """(mtime, size, path) of every stored image (lock must be held)."""
+        entries = []
+        with os.scandir(self.objects_dir) as it:
+            for entry in it:
+                if entry.is_file() and not entry.name.endswith('.tmp'):
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+    
+    def _evict_disk(self):
+        """Delete the least recently used images until the store fits its size budget (lock must be held)."""
+        if self._disk_usage <= self.disk_bytes:
+            return
+        
+        # Only a full store is scanned, for the LRU order and the sizes written by other processes
+        entries = self._scan_objects()
+        total_size = sum(size for _, size, _ in entries)
+        # References to evicted images are dropped lazily, as misses
+        for _, size, path in sorted(entries):
+            if total_size <= self.disk_bytes:
+                break
+            try:
+                os.remove(path)
+                total_size -= size
+            except OSError:
+                pass
+        self._disk_usage = total_size
+
+
+def find_written_thumbnail(video_infos: dict) -> Optional[str]:
+    """Return the path of a thumbnail yt-dlp already wrote for this video, if any."""
+    for thumbnail in reversed(video_infos.get('thumbnails') or []):
+        path = thumbnail.get('filepath')
+        if path and os.path.isfile(path):
+            return path
+    return None
+
+
+# Global thumbnail cache instance
+thumbnail_cache = ThumbnailCache(
+    THUMBNAIL_CACHE_DIR, THUMBNAIL_MEMORY_CACHE_ENTRIES, THUMBNAIL_DISK_CACHE_BYTES
+)
@@ -2,7 +2,6 @@
 Font and UI utilities for cross-platform compatibility.
 """
 import os
-import tkinter.font as tkFont
 from config import DEFAULT_FONT, TITLE_FONT, PLATFORM_SCALE
 
 def get_platform_fonts():
@@ -25,7 +24,8 @@ def calculate_window_size(base_width=None, base_height=None, extra_height=0):
         # Get platform fonts
         fonts = get_platform_fonts()
         
-        # Try advanced font-based scaling
+        # Try advanced font-based scaling (tkinter is only loaded by the GUI)
+        import tkinter.font as tkFont
         test_font = tkFont.Font(family=fonts['default'][0], size=fonts['default'][1])
         char_width = test_font.measure('M')
         char_height = test_font.metrics('linespace')
@@ -5,19 +5,23 @@ import tkinter as tk
 from tkinter import filedialog, StringVar, IntVar
 import tkinter.ttk as ttk
 from ttkthemes import ThemedTk
-from PIL import ImageTk
 import datetime
 import subprocess
 import shutil
 import os
-from typing import Optional, Dict, Any
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Optional, List
 
 from config import (
     APP_TITLE, DEFAULT_WINDOW_SIZE, COLORS, DEFAULT_BITRATES, 
-    DEFAULT_QUALITIES, DEFAULT_BITRATE, DEFAULT_QUALITY, ICON_PATH
+    DEFAULT_QUALITIES, DEFAULT_BITRATE, DEFAULT_QUALITY, ICON_PATH,
+    THUMBNAIL_WORKERS, THUMBNAIL_POLL_INTERVAL_MS, METRICS_PANEL_REFRESH_MS
 )
-from utils import get_platform_fonts, calculate_window_size, load_thumbnail, load_icon, settings_manager
-from models import DownloadConfig, VideoInfo, PlaylistInfo
+from utils import (
+    get_platform_fonts, calculate_window_size, load_thumbnail, load_icon, settings_manager,
+    thumbnail_cache
+)
+from models import DownloadConfig, VideoInfo
 
 
 class MainApplicationView:
@@ -31,11 +35,22 @@ class MainApplicationView:
         self.setup_widgets()
         self.progress_widgets = {}
         
+        # Thumbnails are fetched and decoded off the Tk main thread
+        self.thumbnail_executor = ThreadPoolExecutor(max_workers=THUMBNAIL_WORKERS, thread_name_prefix="thumbnail")
+        self._thumbnail_request = 0
+        self._prefetched_thumbnails = set()
+        
         # Callbacks (set by controller)
         self.on_browse_callback = None
         self.on_convert_callback = None
         self.on_format_change_callback = None
         self.on_playlist_change_callback = None
+        
+        # Optional stage timings panel, toggled with F12 (rows are provided by the controller)
+        self.stats_provider = None
+        self.stats_window = None
+        self._stats_refresh_job = None
+        self.root.bind('<F12>', lambda event: self.toggle_stats_panel())
     
     def setup_window(self):
         """Initialize the main window."""
@@ -352,6 +367,8 @@ class MainApplicationView:
     def show_progress_widgets(self, is_playlist: bool = False):
         """Show download progress widgets."""
         self.convert_button.destroy()
+        # Prefetches are remembered for the current download only
+        self._prefetched_thumbnails.clear()
         
         # Create progress frame
         self.progress_frame = tk.LabelFrame(self.root, bg=COLORS['background'], border=0)
@@ -414,12 +431,17 @@ class MainApplicationView:
                 justify="left"
             )
             self.total_progress_percent.grid(sticky=tk.W, row=3, column=0, pady=10, padx=424)
-            
+        
+        # Speed and time left of the displayed video
+        self.transfer_label = ttk.Label(self.progress_frame, text="", anchor="w", justify="left")
+        self.transfer_label.grid(sticky=tk.W, row=4, column=0, pady=(0, 5), padx=7)
+        
+        if is_playlist:
             # Adjust window size for playlist
-            self.adjust_window_size(extra_height=135)
+            self.adjust_window_size(extra_height=160)
         else:
             # Adjust window size for single video
-            self.adjust_window_size(extra_height=100)
+            self.adjust_window_size(extra_height=125)
     
     def hide_progress_widgets(self):
         """Hide progress widgets and restore convert button."""
@@ -449,18 +471,42 @@ class MainApplicationView:
         )
         self.info_label.configure(text=info_text)
         
-        # Update thumbnail
+        # Update thumbnail in the background, the newest request wins
+        self._thumbnail_request += 1
         if video_info.thumbnail:
             thumbnail_size = (60, 60) if video_info.is_music else (100, 60)
-            thumbnail = load_thumbnail(video_info.thumbnail, thumbnail_size, video_info.is_music)
-            if thumbnail:
-                photo = ImageTk.PhotoImage(thumbnail)
-                self.thumbnail_label.configure(image=photo)
-                self.thumbnail_label.image = photo  # Keep a reference
-                
-                # Adjust info label position based on thumbnail size
-                padx = 74 if video_info.is_music else 114
-                self.info_label.grid_configure(padx=padx)
+            future = self.thumbnail_executor.submit(
+                load_thumbnail, video_info.thumbnail, thumbnail_size, video_info.is_music
+            )
+            self._poll_thumbnail(future, self._thumbnail_request, video_info.is_music)
+    
+    def _poll_thumbnail(self, future: Future, request_id: int, is_music: bool):
+        """Swap in a background-loaded thumbnail once it is ready (runs on main thread)."""
+        if not future.done():
+            self.root.after(THUMBNAIL_POLL_INTERVAL_MS, lambda: self._poll_thumbnail(future, request_id, is_music))
+            return
+        
+        # Skip results for a video that is no longer displayed
+        if request_id != self._thumbnail_request or not hasattr(self, 'progress_frame'):
+            return
+        
+        thumbnail = future.result()
+        if thumbnail:
+            from PIL import ImageTk
+            photo = ImageTk.PhotoImage(thumbnail)
+            self.thumbnail_label.configure(image=photo)
+            self.thumbnail_label.image = photo  # Keep a reference
+            
+            # Adjust info label position based on thumbnail size
+            padx = 74 if is_music else 114
+            self.info_label.grid_configure(padx=padx)
+    
+    def prefetch_thumbnails(self, thumbnail_urls: List[str]):
+        """Warm the thumbnail cache for upcoming videos in the background."""
+        for url in thumbnail_urls:
+            if url and url not in self._prefetched_thumbnails:
+                self._prefetched_thumbnails.add(url)
+                self.thumbnail_executor.submit(thumbnail_cache.get, url)
     
     def update_video_progress(self, percentage: float, status: str = ""):
         """Update video download progress."""
@@ -477,6 +523,22 @@ class MainApplicationView:
                 self.video_progress['value'] = percentage
                 self.video_progress_percent.configure(text=f" {percentage:.1f}%")
     
+    def update_transfer_info(self, speed: Optional[float], eta: Optional[float], total_speed: Optional[float] = None):
+        """Update the speed (bytes/s) and time left (seconds) of the displayed video."""
+        if not hasattr(self, 'transfer_label'):
+            return
+        if speed is None:
+            self.transfer_label.configure(text="")
+            return
+        
+        text = f"Speed : {speed / 1048576:.1f} MiB/s"
+        if eta is not None:
+            text += f"    Time left : {datetime.timedelta(seconds=int(eta))}"
+        # Playlist items downloading at the same time
+        if total_speed is not None and total_speed > speed * 1.01:
+            text += f"    ({total_speed / 1048576:.1f} MiB/s in total)"
+        self.transfer_label.configure(text=text)
+    
     def update_total_progress(self, percentage: float):
         """Update total progress for playlists."""
         if hasattr(self, 'total_progress'):
@@ -504,37 +566,42 @@ class MainApplicationView:
             self._show_path_tooltip()
             return None
         
-        config = DownloadConfig()
-        config.url = self.url_var.get().strip()
-        config.output_directory = self.folder_path.get()
-        config.file_format = "mp3" if self.format_var.get() == 1 else "mp4"
-        config.is_playlist = self.playlist_var.get() == 0
+        url = self.url_var.get().strip()
+        output_directory = self.folder_path.get()
+        file_format = "mp3" if self.format_var.get() == 1 else "mp4"
+        is_playlist = self.playlist_var.get() == 0
         
         # Save the output directory as the last used directory
-        if config.output_directory and config.output_directory != 'Choose a path for your file':
-            settings_manager.set_last_download_directory(config.output_directory)
+        if output_directory and output_directory != 'Choose a path for your file':
+            settings_manager.set_last_download_directory(output_directory)
         
         # Save all format preferences
         settings_manager.save_format_preferences(
             format_var=self.format_var.get(),
             bitrate=self.bitrate_var.get(),
             quality=self.quality_var.get(),
-            playlist_mode=config.is_playlist
+            playlist_mode=is_playlist
         )
         
-        if config.file_format == "mp3":
-            config.bitrate = self.bitrate_var.get().split("Kbps")[0]
+        # Tuning options come from the settings file, shared with the command line interface
+        options = settings_manager.get_download_options()
+        if file_format == "mp3":
+            options['bitrate'] = self.bitrate_var.get().split("Kbps")[0]
         else:
-            config.quality = self.quality_var.get().split("p")[0]
+            options['quality'] = self.quality_var.get().split("p")[0]
         
-        if config.is_playlist and hasattr(self, 'playlist_start_entry'):
+        if is_playlist and hasattr(self, 'playlist_start_entry'):
             try:
-                config.playlist_start = int(self.playlist_start_entry.get())
-                config.playlist_end = int(self.playlist_end_entry.get())
+                options['playlist_start'] = int(self.playlist_start_entry.get())
+                options['playlist_end'] = int(self.playlist_end_entry.get())
             except ValueError:
-                config.playlist_start = 1
-                config.playlist_end = 1
+                options['playlist_start'] = 1
+                options['playlist_end'] = 1
         
+        # The configuration is frozen, it is built in one go
+        config = DownloadConfig(
+            url=url, output_directory=output_directory, file_format=file_format, is_playlist=is_playlist, **options
+        )
         return config
     
     def set_convert_button_text(self, text: str):
@@ -722,6 +789,14 @@ class MainApplicationView:
         import tkinter.messagebox as messagebox
         messagebox.showwarning("Invalid URL", error_message)
     
+    def ask_resume_download(self, description: str) -> bool:
+        """Ask whether an interrupted download should be resumed."""
+        import tkinter.messagebox as messagebox
+        return messagebox.askyesno(
+            "Resume Download",
+            f"An unfinished download was found:\n\n{description}\n\nDo you want to resume it?"
+        )
+    
     def show_ytdlp_error(self, error_message: str):
         """Show yt-dlp error in a tooltip/messagebox."""
         import tkinter.messagebox as messagebox
@@ -729,6 +804,44 @@ class MainApplicationView:
         clean_message = error_message.replace("ERROR: ", "").strip()
         messagebox.showerror("Download Error", clean_message)
     
+    def toggle_stats_panel(self):
+        """Open or close the window showing the stage timings of the downloads."""
+        if self.stats_window is not None:
+            self.root.after_cancel(self._stats_refresh_job)
+            self.stats_window.destroy()
+            self.stats_window = None
+            return
+        
+        self.stats_window = tk.Toplevel(self.root)
+        self.stats_window.title("Download Stage Timings")
+        self.stats_window.protocol("WM_DELETE_WINDOW", self.toggle_stats_panel)
+        
+        columns = ("job", "extractor", "stage", "runs", "total", "average", "max")
+        headings = ("Job", "Extractor", "Stage", "Runs", "Total (s)", "Average (s)", "Max (s)")
+        self.stats_tree = ttk.Treeview(self.stats_window, columns=columns, show="headings", height=16)
+        for column, heading in zip(columns, headings):
+            self.stats_tree.heading(column, text=heading)
+            self.stats_tree.column(column, width=110 if column == "extractor" else 75, anchor=tk.E)
+        scrollbar = ttk.Scrollbar(self.stats_window, orient=tk.VERTICAL, command=self.stats_tree.yview)
+        self.stats_tree.configure(yscrollcommand=scrollbar.set)
+        self.stats_tree.grid(row=0, column=0, sticky="nsew")
+        scrollbar.grid(row=0, column=1, sticky="ns")
+        
+        self._refresh_stats_panel()
+    
+    def _refresh_stats_panel(self):
+        """Reload the stage timings while the panel is open."""
+        if self.stats_window is None:
+            return
+        
+        rows = self.stats_provider() if self.stats_provider else []
+        self.stats_tree.delete(*self.stats_tree.get_children())
+        for job, extractor, stage, count, total, maximum in rows:
+            self.stats_tree.insert("", tk.END, values=(
+                job, extractor, stage, count, f"{total:.2f}", f"{total / count:.3f}", f"{maximum:.3f}"
+            ))
+        self._stats_refresh_job = self.root.after(METRICS_PANEL_REFRESH_MS, self._refresh_stats_panel)
+    
     def _on_convert_click(self):
         if self.on_convert_callback:
             self.on_convert_callback()
@@ -803,4 +916,8 @@ class MainApplicationView:
     
     def run(self):
         """Start the main event loop."""
-        self.root.mainloop()
+        try:
+            self.root.mainloop()
+        finally:
+            # Queued thumbnail loads are dropped, a fetch in progress ends with its timeout
+            self.thumbnail_executor.shutdown(wait=False, cancel_futures=True)
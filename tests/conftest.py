@@ -0,0 +1,65 @@
+"""
+Test setup: the application modules are imported from src, the local fake site from benchmarks.
+"""
+import os
+import sys
+import threading
+
+import pytest
+
+ROOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+# The benchmarks directory also holds the stub extractors, loaded by yt-dlp as plugins
+sys.path.insert(0, os.path.join(ROOT_DIR, 'benchmarks'))
+sys.path.insert(0, os.path.join(ROOT_DIR, 'src'))
+
+
+@pytest.fixture
+def media_server(tmp_path):
+    """The fake site of the end-to-end benchmark, serving 256 KB of random media per video."""
+    from e2e_throughput import MediaServer, generate_thumbnail, isolate_caches
+    
+    isolate_caches(str(tmp_path / 'cache'))
+    server = MediaServer(os.urandom(256 * 1024), 'm4a', 30, generate_thumbnail())
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def job_config(tmp_path):
+    """Build the configuration of a download of the fake site to a temporary directory."""
+    from models import DownloadConfig
+    
+    def build(url: str, **options) -> DownloadConfig:
+        config = DownloadConfig(**{
+            'url': url, 'output_directory': str(tmp_path / 'downloads'), 'file_format': 'mp3', 'bitrate': '128',
+            'is_playlist': '/playlist/' in url, 'playlist_start': 1, 'playlist_end': 100,
+            'concurrent_downloads': 1, 'archive_scope': 'off', 'resumable': False, 'verbose': False, **options
+        })
+        os.makedirs(config.output_directory, exist_ok=True)
+        return config
+    
+    return build
+
+
+@pytest.fixture
+def run_job(job_config):
+    """Download a URL of the fake site, return the controller afterwards."""
+    from controllers.download_controller import DownloadController
+    from models import DownloadJob
+    
+    def run(url: str, retry_policy=None, **options):
+        config = job_config(url, **options)
+        controller = DownloadController()
+        controller.notifications_enabled = False
+        # The media is random bytes, nothing to convert
+        controller.ffmpeg_path = None
+        if retry_policy is not None:
+            controller.retry_policy = retry_policy
+        video_info, error_message = controller.fetch_video_info(config)
+        assert video_info, error_message
+        controller.download(DownloadJob.create(config))
+        return controller
+    
+    return run
@@ -0,0 +1,62 @@
+"""
+Bitrate-aware audio format selection on a YouTube-like format list.
+"""
+import pytest
+
+from controllers.audio_formats import AudioFormatSelector
+
+
+def audio(format_id, ext, acodec, abr):
+    return {'format_id': format_id, 'ext': ext, 'acodec': acodec, 'vcodec': 'none', 'abr': abr,
+            'filesize': abr * 125 * 600}
+
+
+# Sorted worst to best, as yt-dlp hands them to format selectors
+FORMATS = [
+    audio('249', 'webm', 'opus', 50),
+    audio('250', 'webm', 'opus', 70),
+    audio('140', 'm4a', 'mp4a.40.2', 129),
+    audio('251', 'webm', 'opus', 160),
+    {'format_id': '18', 'ext': 'mp4', 'acodec': 'mp4a.40.2', 'vcodec': 'avc1.42001E', 'height': 360, 'tbr': 550},
+]
+
+
+@pytest.mark.parametrize("bitrate, format_id", [
+    ("32", '249'),
+    ("64", '250'),  # 70 Kbps is the lowest stream meeting it
+    ("96", '140'),
+    ("128", '140'),
+    ("140", '140'),  # 129 Kbps is within the tolerance
+    ("150", '251'),
+    ("192", '251'),  # nothing meets it, the highest bitrate
+    ("320", '251'),
+    ("best", '249'),  # no usable bitrate, the smallest stream meets any
+])
+def test_smallest_stream_meeting_the_bitrate(bitrate, format_id):
+    assert AudioFormatSelector(bitrate).select(FORMATS)['format_id'] == format_id
+
+
+def test_selector_yields_the_format_to_yt_dlp():
+    assert [fmt['format_id'] for fmt in AudioFormatSelector("128")({'formats': FORMATS})] == ['140']
+
+
+def test_passthrough_prefers_streams_kept_without_encoding():
+    formats = [audio('171', 'webm', 'vorbis', 128), audio('139', 'm4a', 'mp4a.40.5', 48)]
+    assert AudioFormatSelector("128").select(formats)['format_id'] == '171'
+    assert AudioFormatSelector("128", passthrough=True).select(formats)['format_id'] == '139'
+
+
+def test_fallbacks_without_audio_streams_or_bitrates():
+    unrated = [dict(fmt, abr=None) for fmt in FORMATS[:4]]
+    assert AudioFormatSelector("128").select(unrated)['format_id'] == '251'
+    assert AudioFormatSelector("128").select(FORMATS[4:])['format_id'] == '18'
+    assert AudioFormatSelector("128").select([]) is None
+
+
+def test_bytes_saved_against_the_best_audio_stream():
+    selector = AudioFormatSelector("32")
+    selected = selector.select(FORMATS)
+    selector.record(dict(selected, formats=FORMATS))
+    assert selector.format_stats() == (
+        "1 items, 3.6 MiB instead of 11.4 MiB with the best audio stream (7.9 MiB, 69% saved)"
+    )
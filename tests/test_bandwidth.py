@@ -0,0 +1,95 @@
+"""
+Bandwidth governor: concurrent downloads from the local server hold the shared limit, live changes included.
+"""
+import datetime
+import threading
+import time
+
+import pytest
+
+from bandwidth_governor import rate_between, run_job, written_bytes
+from controllers.bandwidth import BandwidthGovernor, ScheduleWindow, bandwidth_governor, parse_schedule
+from models import DownloadJob
+
+KB = 1024
+
+
+@pytest.fixture
+def governor():
+    """The process-wide governor, left unlimited afterwards."""
+    yield bandwidth_governor
+    bandwidth_governor.configure(0)
+
+
+def test_concurrent_downloads_hold_the_limit_and_follow_live_changes(media_server, job_config, governor, tmp_path):
+    limit = 768 * KB
+    governor.configure(limit)
+    jobs = []
+    for count in (4, 5):
+        config = job_config(f"{media_server.base_url}/playlist/{count}",
+                            output_directory=str(tmp_path / f"job{count}"))
+        jobs.append(DownloadJob.create(config))
+    threads = [threading.Thread(target=run_job, args=(media_server, job), daemon=True) for job in jobs]
+    for thread in threads:
+        thread.start()
+    
+    # The bytes the downloads actually wrote, sampled over wall-clock time
+    samples = []
+    start = time.perf_counter()
+    all_started = change_time = all_running_until = None
+    while any(thread.is_alive() for thread in threads):
+        now = time.perf_counter() - start
+        received = [written_bytes(job.config.output_directory) for job in jobs]
+        samples.append({'time': now, 'received': received})
+        if all_started is None and all(received):
+            all_started = now
+        if change_time is None and all_started is not None and now >= all_started + 1.5:
+            governor.set_limit(limit / 3)
+            change_time = now
+        if all_running_until is None and not all(thread.is_alive() for thread in threads):
+            all_running_until = now
+        time.sleep(0.05)
+    for thread in threads:
+        thread.join()
+    
+    assert change_time is not None and all_running_until > change_time + 1.5, "finished too early to measure"
+    assert all(written_bytes(job.config.output_directory) == count * len(media_server.media)
+               for job, count in zip(jobs, (4, 5)))
+    
+    def total(sample):
+        return sum(sample['received'])
+    
+    before = rate_between(samples, all_started, change_time, total)
+    # Blocks already granted at the old rate are still arriving just after the change
+    after = rate_between(samples, change_time + 0.5, all_running_until, total)
+    # Unthrottled, the local server delivers many times the limit. The rate stays below it in the gaps
+    # between items, where the share of the idle job is kept for the active window
+    assert limit * 0.5 < before < limit * 1.2
+    assert limit / 3 * 0.5 < after < limit / 3 * 1.2
+
+
+def test_weights_split_the_limit_between_active_jobs():
+    governor = BandwidthGovernor(limit=1000.0)
+    governor.register_job(1, 1.0)
+    governor.register_job(2, 3.0)
+    now = time.monotonic()
+    assert governor._job_rate(1, now) == 1000.0
+    # Shares are split between the jobs that received data lately
+    governor._last_active.update({1: now, 2: now})
+    assert governor._job_rate(1, now) == 250.0
+    assert governor._job_rate(2, now) == 750.0
+    governor.unregister_job(2)
+    assert governor._job_rate(1, now) == 1000.0
+
+
+def test_schedule_windows_override_the_limit():
+    windows = parse_schedule([
+        {'start': "22:00", 'end': "06:00", 'limit_kbps': 0},
+        {'start': "09:00", 'end': "18:00", 'limit_kbps': 500},
+        {'start': "bad"},
+    ])
+    assert windows[1] == ScheduleWindow(datetime.time(9), datetime.time(18), 500 * KB)
+    governor = BandwidthGovernor(limit=100 * KB, schedule=windows)
+    assert governor.current_limit(datetime.datetime(2026, 1, 1, 12, 0)) == 500 * KB
+    assert governor.current_limit(datetime.datetime(2026, 1, 1, 23, 30)) == 0
+    assert governor.current_limit(datetime.datetime(2026, 1, 1, 19, 0)) == 100 * KB
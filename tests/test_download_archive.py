@@ -0,0 +1,102 @@
+"""
+Download archive: lookups, persistence, and rebuilds from tagged files.
+"""
+import json
+import os
+
+import pytest
+
+import cli
+from utils import settings_manager
+from utils.download_archive import DownloadArchive, archive_id_from_info, get_download_archive, make_archive_id
+from utils.tagging import TrackTags, read_archive_id, write_tags
+
+
+def tagged_file(directory, name, archive_id=""):
+    """A media file with random content, tagged with an archive key if given."""
+    path = os.path.join(directory, name)
+    with open(path, 'wb') as f:
+        f.write(os.urandom(4096))
+    if archive_id:
+        assert write_tags(path, 'mp3', TrackTags(title=name, archive_id=archive_id))
+    return path
+
+
+@pytest.fixture
+def library(tmp_path):
+    """A folder with two tagged files, an untagged one and a file that is not media."""
+    directory = tmp_path / 'library'
+    directory.mkdir()
+    tagged_file(str(directory), 'first.mp3', "youtube abc")
+    tagged_file(str(directory), 'second.mp3', "soundcloud 42")
+    tagged_file(str(directory), 'untagged.mp3')
+    (directory / 'notes.txt').write_text("youtube notes", encoding='utf-8')
+    return str(directory)
+
+
+def test_archive_ids_follow_yt_dlp():
+    assert make_archive_id('Youtube', 'abc') == "youtube abc"
+    assert archive_id_from_info({'id': 'abc', 'extractor_key': 'Youtube'}) == "youtube abc"
+    assert archive_id_from_info({'id': 42, 'ie_key': 'Soundcloud'}) == "soundcloud 42"
+    assert archive_id_from_info({'id': 'abc'}) is None
+
+
+def test_add_and_discard_are_persisted(tmp_path):
+    path = str(tmp_path / 'archive.txt')
+    archive = DownloadArchive(path)
+    archive.add("youtube abc")
+    archive.add("youtube abc")
+    archive.add("youtube def")
+    assert "youtube abc" in archive
+    assert archive.contains_info({'id': 'def', 'extractor_key': 'Youtube'})
+    with open(path, encoding='utf-8') as f:
+        assert f.read().splitlines() == ["youtube abc", "youtube def"]
+    
+    archive.discard("youtube abc")
+    archive.discard("youtube missing")
+    archive.discard(None)
+    reopened = DownloadArchive(path)
+    assert "youtube abc" not in reopened
+    assert list(reopened) == ["youtube def"]
+
+
+def test_tags_carry_the_archive_id(library):
+    assert read_archive_id(os.path.join(library, 'first.mp3')) == "youtube abc"
+    assert read_archive_id(os.path.join(library, 'untagged.mp3')) is None
+    assert read_archive_id(os.path.join(library, 'notes.txt')) is None
+
+
+def test_rebuild_adds_the_tagged_files(library, tmp_path):
+    archive = DownloadArchive(str(tmp_path / 'archive.txt'))
+    archive.add("youtube downloaded-before")
+    assert archive.rebuild(library) == 2
+    assert sorted(archive) == ["soundcloud 42", "youtube abc", "youtube downloaded-before"]
+    assert len(DownloadArchive(archive.path)) == 3
+    assert archive.rebuild(str(tmp_path / 'missing')) == 0
+
+
+def test_first_use_of_a_directory_rebuilds_its_archive(library):
+    archive = get_download_archive(library, "directory")
+    assert sorted(archive) == ["soundcloud 42", "youtube abc"]
+    assert os.path.exists(archive.path)
+    # The archive is shared, and rebuilt only the first time
+    tagged_file(library, 'third.mp3', "youtube later")
+    assert get_download_archive(library, "directory") is archive
+    assert "youtube later" not in archive
+    assert get_download_archive(library, "off") is None
+
+
+def test_command_line_rebuild(library, monkeypatch, capsys):
+    monkeypatch.setattr(settings_manager, 'get_download_options', lambda: {'archive_scope': "directory"})
+    archive = get_download_archive(library, "directory")
+    tagged_file(library, 'third.mp3', "youtube later")
+    capsys.readouterr()
+    
+    assert cli.main(['--rebuild-archive', '-o', library]) == 0
+    events = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert [event['event'] for event in events] == ['archive_rebuilt']
+    assert (events[0]['found'], events[0]['items']) == (3, 3)
+    assert "youtube later" in archive
+    
+    monkeypatch.setattr(settings_manager, 'get_download_options', lambda: {'archive_scope': "off"})
+    assert cli.main(['--rebuild-archive', '-o', library]) == 1
@@ -0,0 +1,114 @@
+"""
+Job snapshots: progress handling reads neither the UI nor the settings, and writes no settings.
+"""
+import dataclasses
+import os
+
+import pytest
+
+from controllers import app_controller as app_module
+from models import DownloadJob, DownloadProgress
+from utils import settings as settings_module
+from utils import settings_manager
+
+
+class Recorder:
+    """Accepts any call and records its name."""
+    
+    def __init__(self):
+        self.calls = []
+    
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        return lambda *args, **kwargs: self.calls.append(name)
+
+
+class StubView(Recorder):
+    """The main view without Tk, whose configuration must not be read once a job started."""
+    
+    def __init__(self):
+        super().__init__()
+        self.root = Recorder()
+        self.song_label = Recorder()
+    
+    def get_download_config(self):
+        # The progress bus reports handler errors without raising them, the call is recorded too
+        self.calls.append('get_download_config')
+        raise AssertionError("the UI was read during the download")
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    """An application controller with a stub view, counting the writes of the settings file."""
+    monkeypatch.setattr(app_module, 'MainApplicationView', StubView)
+    monkeypatch.setattr(settings_manager, 'config_file', tmp_path / "yt-dlp-gui-config.json")
+    app = app_module.ApplicationController()
+    
+    app.settings_writes = 0
+    replace = os.replace
+    
+    def counting_replace(source, destination):
+        if str(destination) == str(settings_manager.config_file):
+            app.settings_writes += 1
+        replace(source, destination)
+    
+    monkeypatch.setattr(settings_module.os, 'replace', counting_replace)
+    return app
+
+
+def test_config_snapshot_is_frozen(job_config):
+    job = DownloadJob.create(job_config("http://127.0.0.1/watch/a"))
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        job.config.output_directory = "/elsewhere"
+    with pytest.raises(dataclasses.FrozenInstanceError):
+        job.config = None
+
+
+def test_download_progress_writes_no_settings(app, media_server, job_config):
+    config = job_config(f"{media_server.base_url}/playlist/3", concurrent_downloads=2)
+    controller = app.download_controller
+    controller.notifications_enabled = False
+    controller.ffmpeg_path = None
+    # Applied at once rather than through the Tk main loop
+    controller.set_progress_callback(app.on_download_progress)
+    video_info, error_message = controller.fetch_video_info(config)
+    assert video_info, error_message
+    
+    controller.download(DownloadJob.create(config))
+    settings_manager.flush()
+    assert app.settings_writes == 0
+    assert 'get_download_config' not in app.view.calls
+    assert 'update_video_progress' in app.view.calls
+    assert 'update_total_progress' in app.view.calls
+    assert len(controller.progress.finished_items) == 3
+
+
+def test_status_handlers_write_no_settings(app, job_config):
+    job = DownloadJob.create(job_config("http://127.0.0.1/playlist/2"))
+    video_info = {'title': "Playlist", 'entries': [{'title': "First"}, {'title': "Second"}]}
+    progress = DownloadProgress()
+    progress.set_total_items(2)
+    events = [
+        {'status': 'resolved', 'info_dict': {'playlist_autonumber': 2, 'title': "Second"}},
+        {'status': 'downloading', 'downloaded_bytes': 10, 'total_bytes': 100, 'info_dict': {'playlist_autonumber': 1}},
+        {'status': 'retrying', 'attempt': 1, 'max_attempts': 3, 'reason': "HTTP Error 503",
+         'info_dict': {'playlist_autonumber': 1, 'title': "First"}},
+        {'status': 'downloading', 'downloaded_bytes': 100, 'total_bytes': 100, 'info_dict': {'playlist_autonumber': 1}},
+        {'status': 'finished', 'filename': "first.m4a", 'info_dict': {'playlist_autonumber': 1}},
+    ]
+    for event in events:
+        if event['status'] == 'downloading':
+            progress.update_item_bytes(0, event['downloaded_bytes'], event['total_bytes'])
+        elif event['status'] == 'finished':
+            progress.finish_file(0, event['filename'])
+        # Through the progress bus, as the download threads send them, applied by the next timer tick
+        app.queue_download_progress(job, event, video_info, progress)
+        app.progress_bus.dispatch()
+    
+    settings_manager.flush()
+    assert app.settings_writes == 0
+    assert 'get_download_config' not in app.view.calls
+    assert progress.total_percentage == 50.0
+    assert 'update_video_progress' in app.view.calls
+    assert 'configure' in app.view.song_label.calls
@@ -0,0 +1,51 @@
+"""
+Metadata cache: what is kept, and downloads of cached info whose stream URLs expired.
+"""
+from controllers.retry import RetryPolicy
+from utils.metadata_cache import MetadataCache
+
+
+def test_thumbnails_are_kept_and_bulky_fields_stripped(tmp_path):
+    cache = MetadataCache(str(tmp_path / 'metadata.sqlite3'), 1024 * 1024)
+    thumbnails = [{'url': 'https://i.ytimg.com/vi/abc/hqdefault.jpg', 'width': 480, 'height': 360}]
+    key = cache.make_key("https://www.youtube.com/playlist?list=PL1&si=x", True, 1, 5, flat=True)
+    cache.put(key, {
+        'extractor_key': 'YoutubeTab', 'title': "Playlist",
+        'entries': [{'_type': 'url', 'id': 'abc', 'thumbnails': thumbnails, 'subtitles': {'en': []}}]
+    })
+    
+    info, _, needs_refresh = cache.get(cache.make_key("https://www.youtube.com/playlist?list=PL1", True, 1, 5, flat=True))
+    assert not needs_refresh
+    assert info['entries'][0]['thumbnails'] == thumbnails
+    assert 'subtitles' not in info['entries'][0]
+
+
+def test_expired_cached_urls_are_resolved_again_without_using_retries(media_server, run_job):
+    url = f"{media_server.base_url}/playlist/12"
+    policy = RetryPolicy(max_job_retries=2, base_delay=0.001, max_delay=0.001)
+    first = run_job(url, policy, incremental_playlist=False)
+    assert not first.info_from_cache and first.progress.failed_items == {}
+    
+    # The cached stream URLs of every item fail once, as expired URLs do
+    for number in range(12):
+        media_server.inject_failures(f'p12-{number}', 403, count=1)
+    second = run_job(url, policy, incremental_playlist=False)
+    
+    assert second.info_from_cache
+    assert second.progress.failed_items == {}
+    assert second.progress.job_retries == 0
+    assert all(len(media_server.media_requests[f'p12-{number}']) == 3 for number in range(12))
+
+
+def test_failure_after_resolving_again_uses_the_retry_budget(media_server, run_job):
+    url = f"{media_server.base_url}/watch/single-0"
+    policy = RetryPolicy(max_item_retries=1, base_delay=0.001, max_delay=0.001)
+    run_job(url, policy)
+    
+    media_server.inject_failures('single-0', 503)
+    controller = run_job(url, policy)
+    
+    assert controller.progress.retry_counts == {0: 1}
+    assert list(controller.progress.failed_items) == [0]
+    # The first run, the cached URL, the resolved one and the retry
+    assert len(media_server.media_requests['single-0']) == 4
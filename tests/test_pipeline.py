@@ -0,0 +1,81 @@
+"""
+Download, transcode and tag pipeline: failed stages, the download archive and the resume journal.
+"""
+import glob
+import os
+
+from config import DOWNLOAD_ARCHIVE_FILENAME, RESUME_JOURNAL_PREFIX
+from controllers import download_controller
+from controllers.pipeline import Pipeline, PipelineStage
+
+
+def read_archive(directory: str) -> set:
+    """Archive keys recorded in a download folder."""
+    path = os.path.join(directory, DOWNLOAD_ARCHIVE_FILENAME)
+    if not os.path.exists(path):
+        return set()
+    with open(path, 'r', encoding='utf-8') as f:
+        return {line.strip() for line in f if line.strip()}
+
+
+def test_failed_stage_drops_the_item_and_reports_it():
+    failures = []
+    results = []
+    
+    def transcode(item):
+        if item == 2:
+            raise ValueError("broken file")
+        return item
+    
+    Pipeline([
+        PipelineStage("download", lambda item: item, workers=2),
+        PipelineStage("transcode", transcode, on_error=lambda item, error: failures.append((item, str(error)))),
+        PipelineStage("tag", lambda item: results.append(item) or item)
+    ]).run(range(4))
+    
+    assert sorted(results) == [0, 1, 3]
+    assert failures == [(2, "broken file")]
+
+
+def test_items_are_archived_only_once_tagged(media_server, run_job, job_config, monkeypatch):
+    run = download_controller.CustomPostProcessor.run
+    
+    def failing_run(self, video_infos):
+        if video_infos['id'] == 'p3-1':
+            raise OSError("disk full")
+        return run(self, video_infos)
+    
+    url = f"{media_server.base_url}/playlist/3"
+    directory = job_config(url).output_directory
+    with monkeypatch.context() as patch:
+        patch.setattr(download_controller.CustomPostProcessor, 'run', failing_run)
+        controller = run_job(url, archive_scope='directory', resumable=True)
+    
+    assert list(controller.progress.failed_items) == [1]
+    assert "disk full" in controller.progress.failed_items[1]
+    assert read_archive(directory) == {'benchmarkvideo p3-0', 'benchmarkvideo p3-2'}
+    # The failed item keeps the job resumable
+    assert glob.glob(os.path.join(directory, f"{RESUME_JOURNAL_PREFIX}*.json"))
+    
+    controller = run_job(url, archive_scope='directory', resumable=True)
+    
+    assert controller.progress.failed_items == {}
+    # Only the failed item is processed again (its downloaded file is reused), then tagged and renamed
+    assert len(media_server.media_requests['p3-0']) == len(media_server.media_requests['p3-2']) == 1
+    assert sorted(name for name in os.listdir(directory) if name.endswith('.m4a')) == [
+        f"Benchmark - Benchmark track p3-{number}.m4a" for number in range(3)
+    ]
+    assert read_archive(directory) == {'benchmarkvideo p3-0', 'benchmarkvideo p3-1', 'benchmarkvideo p3-2'}
+    assert not glob.glob(os.path.join(directory, f"{RESUME_JOURNAL_PREFIX}*.json"))
+
+
+def test_failed_transcode_is_not_archived(media_server, run_job, job_config, monkeypatch):
+    def failing_post_process(self, job, ydl_opts, video_infos):
+        raise RuntimeError("ffmpeg crashed")
+    
+    monkeypatch.setattr(download_controller.DownloadController, '_post_process', failing_post_process)
+    url = f"{media_server.base_url}/watch/single-0"
+    controller = run_job(url, archive_scope='directory')
+    
+    assert "ffmpeg crashed" in controller.progress.failed_items[0]
+    assert read_archive(job_config(url).output_directory) == set()
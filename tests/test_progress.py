@@ -0,0 +1,99 @@
+"""
+Progress from yt-dlp hook events: percentage from the bytes, smoothed speed and ETA, merged formats.
+"""
+import pytest
+
+from controllers.download_controller import DownloadController, ExpectedFilesPostProcessor
+from models import DownloadProgress
+from progress_replay import record_stream, replay, replay_merged
+
+MIB = 1048576
+
+
+def hook(status, downloaded, total, filename, autonumber=1):
+    """A progress hook event as yt-dlp sends it."""
+    return {'status': status, 'downloaded_bytes': downloaded, 'total_bytes': total, 'filename': filename,
+            'info_dict': {'playlist_autonumber': autonumber}}
+
+
+def test_percentage_follows_the_bytes_whatever_the_escape_codes():
+    result = replay(record_stream(8 * MIB, 4 * MIB, 1 * MIB))
+    assert result['wrong_percentages']['bytes'] == 0
+    # Parsing '_percent_str' went wrong with other escape codes
+    assert result['wrong_percentages']['previous'] > 0
+
+
+def test_smoothed_eta_beats_the_average_since_the_start():
+    errors = replay(record_stream(32 * MIB, 4 * MIB, 1 * MIB))['errors']
+    assert sum(errors['smoothed']) / len(errors['smoothed']) < sum(errors['yt-dlp']) / len(errors['yt-dlp'])
+
+
+def test_speed_is_measured_over_the_sample_period():
+    progress = DownloadProgress()
+    progress.set_total_items(1)
+    progress.update_item_bytes(0, 0, 10 * MIB, now=0.0)
+    # A burst within the sample period gives no speed yet
+    progress.update_item_bytes(0, MIB, 10 * MIB, now=0.01)
+    assert progress.item_transfer(0) == (10.0, None, None)
+    progress.update_item_bytes(0, 2 * MIB, 10 * MIB, now=1.0)
+    percentage, speed, eta = progress.item_transfer(0)
+    assert (percentage, speed, eta) == (20.0, 2 * MIB, 4.0)
+    # A stall only pulls the speed down by the time it covers
+    progress.update_item_bytes(0, 2 * MIB, 10 * MIB, now=1.5)
+    assert 1.5 * MIB < progress.item_transfer(0)[1] < 2 * MIB
+
+
+def test_merged_formats_finish_with_the_last_file():
+    states = replay_merged(record_stream(4 * MIB, 4 * MIB, 2 * MIB),
+                           record_stream(MIB // 2, 4 * MIB, 2 * MIB, seed=2))
+    percentages = [percentage for percentage, _ in states]
+    assert percentages == sorted(percentages)
+    assert [finished for _, finished in states].index(True) == len(states) - 1
+    assert percentages[-1] == 100.0
+
+
+def test_hook_stream_of_a_merged_playlist_item():
+    controller = DownloadController()
+    progress = controller.progress
+    progress.set_total_items(2)
+    ExpectedFilesPostProcessor(progress).run({'playlist_autonumber': 2, 'requested_formats': [{}, {}]})
+    
+    for event in (hook('downloading', 0, 4 * MIB, 'a.f247.webm', 2),
+                  hook('downloading', 4 * MIB, 4 * MIB, 'a.f247.webm', 2),
+                  hook('finished', 4 * MIB, 4 * MIB, 'a.f247.webm', 2),
+                  # yt-dlp may report a finished file twice, it still counts once
+                  hook('finished', 4 * MIB, 4 * MIB, 'a.f247.webm', 2)):
+        controller._progress_hook(None, event)
+    assert 1 not in progress.finished_items
+    assert progress.item_transfer(1)[0] == 50.0
+    assert progress.total_percentage == 25.0
+    
+    # The audio file's bytes still count after the video file finished
+    controller._progress_hook(None, hook('downloading', MIB // 2, MIB, 'a.f140.m4a', 2))
+    assert progress.item_transfer(1)[0] == 75.0
+    controller._progress_hook(None, hook('finished', MIB, MIB, 'a.f140.m4a', 2))
+    assert 1 in progress.finished_items
+    assert progress.total_percentage == 50.0
+
+
+@pytest.mark.parametrize("info, files", [
+    ({}, 1),
+    ({'requested_formats': None}, 1),
+    ({'requested_formats': [{}, {}]}, 2),
+])
+def test_single_formats_finish_with_their_file(info, files):
+    progress = DownloadProgress()
+    ExpectedFilesPostProcessor(progress).run(info)
+    assert progress.item_files[0] == files
+    assert progress.finish_file(0, 'a.f1') == (files == 1)
+
+
+def test_retry_forgets_the_finished_files():
+    progress = DownloadProgress()
+    progress.set_total_items(1)
+    progress.expect_files(0, 2)
+    assert not progress.finish_file(0, 'a.f247.webm')
+    progress.record_retry(0, "HTTP Error 503")
+    assert progress.total_percentage == 0.0
+    assert not progress.finish_file(0, 'a.f140.m4a')
+    assert progress.finish_file(0, 'a.f247.webm')
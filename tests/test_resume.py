@@ -0,0 +1,117 @@
+"""
+Resumable downloads: a dropped connection or a killed job continues from the partial file.
+"""
+import dataclasses
+import glob
+import json
+import os
+import subprocess
+import sys
+import time
+
+from config import RESUME_JOURNAL_PREFIX
+
+from conftest import ROOT_DIR
+
+# Downloads a job given as JSON in a process of its own, so it can be killed like a closed application
+CHILD_SCRIPT = """
+import json, sys
+from e2e_throughput import isolate_caches
+from controllers.download_controller import DownloadController
+from models import DownloadConfig, DownloadJob
+
+config = DownloadConfig(**json.loads(sys.argv[1]))
+isolate_caches(sys.argv[2])
+controller = DownloadController()
+controller.notifications_enabled = False
+controller.ffmpeg_path = None
+controller.fetch_video_info(config)
+controller.download(DownloadJob.create(config))
+"""
+
+
+def wait_for(condition, timeout: float = 30.0):
+    """Poll a condition until it returns a true value."""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        value = condition()
+        if value:
+            return value
+        time.sleep(0.02)
+    raise AssertionError("timed out")
+
+
+def completed_items(directory: str) -> list:
+    """Items recorded as done in the journal of the directory."""
+    for path in glob.glob(os.path.join(directory, f"{RESUME_JOURNAL_PREFIX}*.json")):
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f).get('completed_items', [])
+        except (OSError, ValueError):
+            pass
+    return []
+
+
+def partial_file(directory: str):
+    """Path and size of the partial file of the directory, once it has data."""
+    for path in glob.glob(os.path.join(directory, '*.part')):
+        size = os.path.getsize(path)
+        if size:
+            return path, size
+    return None
+
+
+def test_dropped_connection_resumes_from_the_received_bytes(media_server, run_job, tmp_path):
+    media_server.inject_cuts('single-0', 100000)
+    controller = run_job(f"{media_server.base_url}/watch/single-0", resumable=True)
+    
+    assert controller.progress.failed_items == {}
+    # The first request was cut, the retry of the item keeps the partial file and asks for the rest only
+    assert controller.progress.retry_counts == {0: 1}
+    assert media_server.media_requests['single-0'] == [None, "bytes=100000-"]
+    output_directory = str(tmp_path / 'downloads')
+    assert partial_file(output_directory) is None
+    media = glob.glob(os.path.join(output_directory, '*.m4a'))
+    assert len(media) == 1
+    with open(media[0], 'rb') as f:
+        assert f.read() == media_server.media
+
+
+def test_killed_job_resumes_partial_file_and_skips_finished_items(media_server, job_config, run_job, tmp_path):
+    # About a second per item, so the job can be killed during the second one
+    media_server.bandwidth = 256 * 1024
+    url = f"{media_server.base_url}/playlist/3"
+    config = job_config(url, resumable=True)
+    environment = dict(os.environ, PYTHONPATH=os.pathsep.join(
+        [os.path.join(ROOT_DIR, 'src'), os.path.join(ROOT_DIR, 'benchmarks')]
+    ))
+    child = subprocess.Popen(
+        [sys.executable, '-c', CHILD_SCRIPT, json.dumps(dataclasses.asdict(config)), str(tmp_path / 'child-cache')],
+        env=environment, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        wait_for(lambda: completed_items(config.output_directory))
+        wait_for(lambda: (partial_file(config.output_directory) or (None, 0))[1] >= 64 * 1024)
+    finally:
+        child.kill()
+        child.wait()
+    
+    assert len(completed_items(config.output_directory)) == 1
+    _, offset = partial_file(config.output_directory)
+    assert len(media_server.media_requests['p3-1']) == 1
+    
+    media_server.bandwidth = 0
+    controller = run_job(url, resumable=True)
+    
+    assert controller.progress.failed_items == {}
+    # The finished item is not downloaded again, the partial one continues where it stopped
+    assert len(media_server.media_requests['p3-0']) == 1
+    assert media_server.media_requests['p3-1'][-1] == f"bytes={offset}-"
+    assert media_server.media_requests['p3-2'] == [None]
+    # The job completed, its journal and partial files are gone
+    assert completed_items(config.output_directory) == []
+    assert partial_file(config.output_directory) is None
+    media = sorted(name for name in os.listdir(config.output_directory) if name.endswith('.m4a'))
+    assert len(media) == 3
+    resumed = [name for name in media if 'p3-1' in name]
+    assert os.path.getsize(os.path.join(config.output_directory, resumed[0])) == len(media_server.media)
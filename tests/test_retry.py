@@ -0,0 +1,76 @@
+"""
+Retry engine against the fake site answering some media requests with HTTP errors.
+"""
+from controllers.retry import RetryBudget, RetryPolicy
+
+# No waiting between attempts
+FAST = dict(base_delay=0.001, max_delay=0.001)
+
+
+def test_transient_error_is_retried_until_the_item_succeeds(media_server, run_job):
+    media_server.inject_failures('p3-1', 503, count=2)
+    
+    controller = run_job(f"{media_server.base_url}/playlist/3", RetryPolicy(**FAST))
+    
+    progress = controller.progress
+    assert progress.failed_items == {}
+    assert progress.retry_counts == {1: 2}
+    assert "HTTP Error 503" in progress.retry_reasons[1]
+    assert progress.job_retries == 2
+    assert len(media_server.media_requests['p3-1']) == 3
+
+
+def test_permanent_error_is_not_retried(media_server, run_job):
+    media_server.inject_failures('p3-0', 404)
+    
+    controller = run_job(f"{media_server.base_url}/playlist/3", RetryPolicy(**FAST))
+    
+    progress = controller.progress
+    assert list(progress.failed_items) == [0]
+    assert "HTTP Error 404" in progress.failed_items[0]
+    assert progress.retry_counts == {}
+    assert len(media_server.media_requests['p3-0']) == 1
+    # The other items are unaffected
+    assert len(media_server.media_requests['p3-1']) == len(media_server.media_requests['p3-2']) == 1
+
+
+def test_item_gives_up_after_its_retry_budget(media_server, run_job):
+    media_server.inject_failures('single-0', 503)
+    
+    controller = run_job(f"{media_server.base_url}/watch/single-0", RetryPolicy(max_item_retries=2, **FAST))
+    
+    progress = controller.progress
+    assert progress.retry_counts == {0: 2}
+    assert "HTTP Error 503" in progress.failed_items[0]
+    assert len(media_server.media_requests['single-0']) == 3
+
+
+def test_job_retry_budget_is_shared_by_all_items(media_server, run_job):
+    for number in range(4):
+        media_server.inject_failures(f'p4-{number}', 503)
+    
+    controller = run_job(f"{media_server.base_url}/playlist/4",
+                         RetryPolicy(max_item_retries=3, max_job_retries=2, **FAST))
+    
+    progress = controller.progress
+    assert sorted(progress.failed_items) == [0, 1, 2, 3]
+    assert progress.job_retries == 2
+    assert sum(progress.retry_counts.values()) == 2
+    assert sum(len(requests) for requests in media_server.media_requests.values()) == 4 + 2
+
+
+def test_budget_limits():
+    budget = RetryBudget(RetryPolicy(max_item_retries=2, max_job_retries=3))
+    assert budget.try_acquire(1) and budget.try_acquire(2)
+    assert not budget.try_acquire(3)
+    assert budget.try_acquire(1)
+    assert not budget.try_acquire(1)
+    assert budget.used == 3
+
+
+def test_backoff_is_exponential_and_capped():
+    policy = RetryPolicy(base_delay=2.0, max_delay=5.0)
+    for _ in range(20):
+        assert 1.0 <= policy.backoff_delay(1) <= 2.0
+        assert 2.0 <= policy.backoff_delay(2) <= 4.0
+        assert 2.5 <= policy.backoff_delay(5) <= 5.0
@@ -0,0 +1,86 @@
+"""
+Settings write-behind: debounced writes, exit flush and failed writes.
+"""
+import json
+import os
+import time
+
+import pytest
+
+from utils import settings as settings_module
+from utils.settings import SettingsManager
+
+
+@pytest.fixture
+def manager(tmp_path, monkeypatch):
+    """A settings manager writing to a temporary file, counting its disk writes."""
+    registered = []
+    monkeypatch.setattr(settings_module.atexit, 'register', registered.append)
+    monkeypatch.setattr(settings_module, 'SETTINGS_FLUSH_DELAY', 0.1)
+    manager = SettingsManager()
+    manager.config_file = tmp_path / "yt-dlp-gui-config.json"
+    manager.exit_handlers = registered
+    
+    manager.writes = 0
+    replace = os.replace
+    
+    def counting_replace(source, destination):
+        manager.writes += 1
+        replace(source, destination)
+    
+    monkeypatch.setattr(settings_module.os, 'replace', counting_replace)
+    yield manager
+    with manager._lock:
+        if manager._flush_timer is not None:
+            manager._flush_timer.cancel()
+
+
+def test_rapid_changes_are_written_once_after_the_debounce(manager):
+    for index in range(50):
+        manager.set_setting("concurrent_downloads", index)
+        manager.save_format_preferences(2, f"{index}Kbps", "720p", index % 2 == 0)
+    assert manager.writes == 0
+    
+    time.sleep(0.5)
+    assert manager.writes == 1
+    saved = json.loads(manager.config_file.read_text(encoding='utf-8'))
+    assert saved["concurrent_downloads"] == 49
+    assert saved["last_bitrate"] == "49Kbps"
+
+
+def test_exit_flush_writes_pending_changes_once(manager):
+    assert manager.flush in manager.exit_handlers
+    manager.set_setting("video_format_policy", "best")
+    
+    for handler in manager.exit_handlers:
+        handler()
+    assert manager.writes == 1
+    assert json.loads(manager.config_file.read_text(encoding='utf-8'))["video_format_policy"] == "best"
+    
+    # Nothing left for the timer nor a second exit flush
+    time.sleep(0.3)
+    manager.flush()
+    assert manager.writes == 1
+
+
+def test_unchanged_values_are_not_written(manager):
+    manager.set_setting("last_quality", manager.get_setting("last_quality"))
+    manager.flush()
+    assert manager.writes == 0
+
+
+def test_failed_write_keeps_the_changes_pending(manager, monkeypatch):
+    manager.set_setting("audio_passthrough", True)
+    
+    def failing_replace(source, destination):
+        raise OSError("disk full")
+    
+    with monkeypatch.context() as patch:
+        patch.setattr(settings_module.os, 'replace', failing_replace)
+        manager.flush()
+    assert not manager.config_file.exists()
+    assert not list(manager.config_file.parent.glob("*.tmp"))
+    
+    manager.flush()
+    assert manager.writes == 1
+    assert json.loads(manager.config_file.read_text(encoding='utf-8'))["audio_passthrough"] is True
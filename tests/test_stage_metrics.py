@@ -0,0 +1,62 @@
+"""
+Stage timings: aggregation per job and extractor, JSON and Prometheus exports.
+"""
+import json
+
+from utils.stage_metrics import StageMetrics, extractor_of
+
+
+def make_metrics(tmp_path, max_jobs: int = 50) -> StageMetrics:
+    metrics = StageMetrics(str(tmp_path / 'metrics.json'), str(tmp_path / 'metrics.prom'), max_jobs)
+    metrics.record('network', 1, 'Youtube', 2.0)
+    metrics.record('network', 1, 'Youtube', 1.0)
+    metrics.record('extraction', 1, 'Youtube', 0.5)
+    metrics.record('ffmpeg', 2, 'Generic', 3.0)
+    return metrics
+
+
+def test_extractor_of_flat_and_resolved_entries():
+    assert extractor_of({'extractor_key': 'Youtube', 'ie_key': 'YoutubeTab'}) == 'Youtube'
+    assert extractor_of({'ie_key': 'Youtube'}) == 'Youtube'
+    assert extractor_of(None) == 'unknown'
+
+
+def test_json_export_aggregates_per_job_and_extractor(tmp_path):
+    metrics = make_metrics(tmp_path)
+    metrics.export()
+    
+    with open(metrics.json_path, 'r', encoding='utf-8') as f:
+        snapshot = json.load(f)
+    assert snapshot['jobs']['1']['Youtube']['network'] == {'count': 2, 'total_seconds': 3.0, 'max_seconds': 2.0}
+    assert snapshot['jobs']['1']['Youtube']['extraction']['count'] == 1
+    assert snapshot['jobs']['2']['Generic']['ffmpeg']['total_seconds'] == 3.0
+    assert snapshot['extractors']['Youtube']['network']['count'] == 2
+    assert metrics.format_job(1) == "extraction 0.50s/1, network 3.00s/2"
+    assert metrics.format_job(3) == "no timings"
+
+
+def test_prometheus_export(tmp_path):
+    metrics = make_metrics(tmp_path)
+    metrics.record('tagging', None, 'Odd "name"\n', 0.25)
+    metrics.export()
+    
+    with open(metrics.prometheus_path, 'r', encoding='utf-8') as f:
+        lines = f.read().splitlines()
+    assert '# TYPE ytdlp_gui_stage_seconds_total counter' in lines
+    assert '# TYPE ytdlp_gui_job_stage_max_seconds gauge' in lines
+    assert 'ytdlp_gui_stage_seconds_total{extractor="Youtube",stage="network"} 3' in lines
+    assert 'ytdlp_gui_stage_runs_total{extractor="Youtube",stage="network"} 2' in lines
+    assert 'ytdlp_gui_job_stage_max_seconds{job="1",extractor="Youtube",stage="network"} 2' in lines
+    assert 'ytdlp_gui_stage_seconds_total{extractor="Odd \\"name\\"\\n",stage="tagging"} 0.25' in lines
+    # Timings without a job only count for the extractor
+    assert not [line for line in lines if line.startswith('ytdlp_gui_job_') and 'tagging' in line]
+
+
+def test_only_the_most_recent_jobs_are_kept(tmp_path):
+    metrics = StageMetrics(str(tmp_path / 'metrics.json'), str(tmp_path / 'metrics.prom'), max_jobs=2)
+    for job_id in range(1, 5):
+        metrics.record('network', job_id, 'Youtube', 1.0)
+    
+    snapshot = metrics.snapshot()
+    assert list(snapshot['jobs']) == ['4', '3']
+    assert snapshot['extractors']['Youtube']['network']['count'] == 4
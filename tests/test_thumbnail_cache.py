@@ -0,0 +1,87 @@
+"""
+Thumbnail cache: one fetch per URL under concurrent misses, disk size kept without rescans.
+"""
+import os
+import threading
+import time
+
+from utils.thumbnail_cache import ThumbnailCache
+
+
+def make_cache(tmp_path, monkeypatch, disk_bytes=1024 * 1024, delay=0.0):
+    """A cache over a temporary directory whose fetches are counted instead of downloaded."""
+    cache = ThumbnailCache(str(tmp_path / 'thumbnails'), 4, disk_bytes)
+    cache.fetches = []
+    
+    def fetch(url):
+        cache.fetches.append(url)
+        time.sleep(delay)
+        return None if 'missing' in url else url.encode('utf-8') * 100
+    
+    monkeypatch.setattr(cache, '_fetch', fetch)
+    return cache
+
+
+def test_concurrent_misses_share_one_fetch(tmp_path, monkeypatch):
+    cache = make_cache(tmp_path, monkeypatch, delay=0.2)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get('https://example.com/a.jpg')))
+               for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    assert cache.fetches == ['https://example.com/a.jpg']
+    assert results == [b'https://example.com/a.jpg' * 100] * 8
+    assert cache.stats() == {'memory_hits': 7, 'disk_hits': 0, 'local_hits': 0, 'misses': 1}
+
+
+def test_failed_fetch_is_not_retried_by_the_waiters(tmp_path, monkeypatch):
+    cache = make_cache(tmp_path, monkeypatch, delay=0.2)
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get('https://example.com/missing.jpg')))
+               for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    
+    assert results == [None] * 4
+    assert len(cache.fetches) == 1
+    # Nothing left in flight, a later miss fetches again
+    assert cache.get('https://example.com/missing.jpg') is None
+    assert len(cache.fetches) == 2
+
+
+def test_disk_store_is_scanned_once_and_evicted_when_full(tmp_path, monkeypatch):
+    cache = make_cache(tmp_path, monkeypatch, disk_bytes=10000)
+    scans = []
+    scandir = os.scandir
+    monkeypatch.setattr(os, 'scandir', lambda path: scans.append(path) or scandir(path))
+    
+    for index in range(3):
+        cache.put(f'https://example.com/{index}.jpg', bytes([index]) * 3000)
+    # The first write measured the empty store, the others kept the running total
+    assert len(scans) == 1
+    assert cache._disk_usage == 9000
+    
+    cache.put('https://example.com/3.jpg', b'3' * 3000)
+    assert len(scans) == 2
+    assert cache._disk_usage <= 10000
+    assert sum(entry.stat().st_size for entry in scandir(cache.objects_dir)) == cache._disk_usage
+    
+    # Storing the same image again adds nothing
+    cache.put('https://example.com/copy.jpg', b'3' * 3000)
+    assert len(scans) == 2
+
+
+def test_existing_store_is_measured_on_first_use(tmp_path, monkeypatch):
+    cache = make_cache(tmp_path, monkeypatch)
+    cache.put('https://example.com/a.jpg', b'a' * 5000)
+    
+    reopened = make_cache(tmp_path, monkeypatch)
+    reopened.put('https://example.com/b.jpg', b'b' * 2000)
+    assert reopened._disk_usage == 7000
+    assert reopened.get('https://example.com/a.jpg') == b'a' * 5000
+    assert reopened.stats()['disk_hits'] == 1
@@ -0,0 +1,37 @@
+"""
+Remux-first post-processing: the plan of each downloaded file and the time it saves.
+"""
+import pytest
+
+from controllers.transcoding import PostprocessLog, PostprocessPlan, plan_postprocessing
+
+
+@pytest.mark.parametrize("info, action", [
+    ({'ext': 'mp4', 'vcodec': 'avc1.640028', 'acodec': 'mp4a.40.2'}, 'keep'),
+    ({'ext': 'mp4', 'vcodec': 'vp9', 'acodec': 'opus'}, 'keep'),
+    ({'ext': 'webm', 'vcodec': 'vp9', 'acodec': 'opus'}, 'remux'),
+    ({'ext': 'mkv', 'vcodec': 'avc1.4d401f', 'acodec': 'mp4a.40.2'}, 'remux'),
+    ({'ext': 'mkv', 'vcodec': 'av01.0.08M.08', 'acodec': 'none'}, 'remux'),
+    ({'ext': 'webm', 'vcodec': 'vp8', 'acodec': 'vorbis'}, 'transcode'),
+    ({'ext': 'mkv', 'vcodec': 'avc1', 'acodec': 'vorbis'}, 'transcode'),
+    ({'ext': 'flv', 'vcodec': None, 'acodec': 'mp3'}, 'transcode'),
+    ({'ext': 'webm'}, 'transcode'),
+])
+def test_plan_postprocessing(info, action):
+    assert plan_postprocessing(info).action == action
+
+
+def test_plans_map_to_postprocessors():
+    assert PostprocessPlan('keep', "").postprocessors == []
+    assert PostprocessPlan('remux', "").postprocessors == [{'key': 'FFmpegVideoRemuxer', 'preferedformat': 'mp4'}]
+    assert PostprocessPlan('transcode', "").postprocessors == [{'key': 'FFmpegVideoConvertor', 'preferedformat': 'mp4'}]
+
+
+def test_remuxes_save_the_measured_reencode_time():
+    log = PostprocessLog(transcode_speed=1.0)
+    # A transcode of 60s of media in 20s moves the speed halfway to 3x
+    assert log.record(PostprocessPlan('transcode', ""), 60, 20.0) == 0.0
+    assert log.transcode_speed == pytest.approx(2.0)
+    assert log.record(PostprocessPlan('remux', ""), 100, 1.0) == pytest.approx(49.0)
+    assert log.record(PostprocessPlan('keep', ""), 100, 0.0) == 0.0
+    assert log.format_stats() == "1 kept, 1 remuxed, 1 transcoded, ~49s of re-encoding saved"
@@ -0,0 +1,79 @@
+"""
+Score-based video format selection on a YouTube-like format list.
+"""
+import pytest
+
+from controllers.video_formats import VideoFormatSelector
+
+
+def fmt(format_id, ext, vcodec, acodec, height=None, kbps=None, abr=None):
+    """A 10 minute format, its size following from its bitrate."""
+    bitrate = kbps or abr
+    return {
+        'format_id': format_id, 'url': f'https://example.com/{format_id}', 'ext': ext, 'protocol': 'https',
+        'vcodec': vcodec, 'acodec': acodec, 'height': height, 'fps': 30 if height else None, 'abr': abr,
+        'vbr': kbps if acodec == 'none' else None, 'tbr': bitrate, 'filesize': bitrate * 125 * 600
+    }
+
+
+# Sorted worst to best, as yt-dlp hands them to format selectors
+FORMATS = [
+    fmt('249', 'webm', 'none', 'opus', abr=55),
+    fmt('140', 'm4a', 'none', 'mp4a.40.2', abr=129),
+    fmt('251', 'webm', 'none', 'opus', abr=140),
+    fmt('18', 'mp4', 'avc1.42001E', 'mp4a.40.2', 360, kbps=550),
+    fmt('134', 'mp4', 'avc1.4d401e', 'none', 360, kbps=420),
+    fmt('136', 'mp4', 'avc1.4d401f', 'none', 720, kbps=1500),
+    fmt('247', 'webm', 'vp9', 'none', 720, kbps=1000),
+    fmt('22', 'mp4', 'avc1.64001F', 'mp4a.40.2', 720, kbps=2200),
+    fmt('137', 'mp4', 'avc1.640028', 'none', 1080, kbps=3000),
+]
+
+
+def ranked_ids(selector):
+    return [candidate['format']['format_id'] for candidate in selector.rank(FORMATS)]
+
+
+@pytest.mark.parametrize("policy, format_id", [
+    ('smallest', '247+140'),
+    ('fastest', '247+140'),
+    ('best', '22'),
+])
+def test_policy_choice_at_720p(policy, format_id):
+    assert VideoFormatSelector("720", policy).select(FORMATS)['format_id'] == format_id
+
+
+def test_candidates_are_the_formats_at_the_chosen_height():
+    assert sorted(ranked_ids(VideoFormatSelector("720", 'smallest'))) == ['136+140', '22', '247+140']
+    assert sorted(ranked_ids(VideoFormatSelector("480", 'smallest'))) == ['134+140', '18']
+    # Below every height, the lowest there is
+    assert sorted(ranked_ids(VideoFormatSelector("144", 'smallest'))) == ['134+140', '18']
+
+
+def test_merged_candidates_carry_both_formats():
+    candidate = VideoFormatSelector("720", 'smallest').rank(FORMATS)[0]
+    assert candidate['merged']
+    assert [part['format_id'] for part in candidate['format']['requested_formats']] == ['247', '140']
+    assert candidate['size'] == (1000 + 129) * 125 * 600
+    # The best quality policy pairs the video with the best audio stream
+    assert '136+251' in ranked_ids(VideoFormatSelector("720", 'best'))
+
+
+@pytest.mark.parametrize("height", ["abc", None, "best"])
+def test_invalid_height_takes_the_highest(height):
+    selector = VideoFormatSelector(height, 'smallest')
+    assert selector.height is None
+    assert ranked_ids(selector) == ['137+140']
+
+
+def test_without_merging_only_formats_with_audio():
+    assert ranked_ids(VideoFormatSelector("720", 'smallest', can_merge=False)) == ['22']
+    assert ranked_ids(VideoFormatSelector("1080", 'smallest', can_merge=False)) == ['22']
+
+
+def test_unknown_policy_and_no_video():
+    assert VideoFormatSelector("720", 'cheapest').policy == 'smallest'
+    audio_only = FORMATS[:3]
+    assert VideoFormatSelector("720").rank(audio_only) == []
+    assert VideoFormatSelector("720").select(audio_only)['format_id'] == '251'
+    assert VideoFormatSelector("720").select([]) is None